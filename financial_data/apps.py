@@ -9,3 +9,4 @@ class FinancialDataConfig(AppConfig):
 
     def ready(self):
         import financial_data.signals  # This imports the signals
+        import financial_data.checks  # Registers the system checks
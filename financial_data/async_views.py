@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+from .models import BacktestResult
+from .offload import run_cpu_bound
+from .progress import JOB_ID_PATTERN
+from .renderers import dumps, response_shape
+from .response_cache import acached_response
+from .streaming import FEED_KEY, aintraday_stream, ajob_stream
+from .utils.alpha_vantage_api import (
+    QuotaExceeded, fetch_stock_data, intraday_columns, quota_error, setup_alpha_vantage_api,
+)
+from .utils.alpha_vantage_async import aget_company_overview, aget_intraday_data
+from .utils.company_overview import aload_company_overview, load_company_overviews
+from .utils.ml_integration import update_predictions
+from .utils.report_generation import chart_etag, chart_inputs, render_chart
+from .views import _event_stream_response
+
+logger = logging.getLogger(__name__)
+
+
+# Plain Django views: DRF's APIView cannot be async. Bodies use the API renderer's orjson options.
+def _json(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def _upstream_error(e, view):
+    if isinstance(e, httpx.TimeoutException):
+        return _json({'error': 'Alpha Vantage did not respond in time'}, 504)
+    logger.error("Error in %s: %s", view, e)
+    return _json({'error': str(e)}, 500)
+
+
+@require_GET
+async def intraday_data(request, symbol):
+    """IntradayDataView, behind the same response cache and ETags for INTRADAY_CACHE_TTL."""
+    return await acached_response('IntradayDataView', request, lambda: _intraday_data(request, symbol),
+                                  getattr(settings, 'INTRADAY_CACHE_TTL', 60))
+
+
+async def _intraday_data(request, symbol):
+    # The upstream payload is also shared with the intraday stream through the default cache.
+    try:
+        shape = response_shape(request)
+        key = FEED_KEY.format(symbol)
+        payload = await cache.aget(key)
+        if payload is None:
+            payload = await aget_intraday_data(symbol)
+            # A rate-limit note (sent as a 200) must not reach the feed or the response cache.
+            quota = quota_error(payload, f"intraday data for {symbol}")
+            if quota is not None:
+                raise quota
+            await cache.aset(key, payload, getattr(settings, 'INTRADAY_CACHE_TTL', 60))
+        return _json(intraday_columns(payload) if shape == 'columns' else payload)
+    except QuotaExceeded as e:
+        response = _json({'error': str(e)}, 429)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    except ValueError as ve:
+        return _json({'error': str(ve)}, 400)
+    except Exception as e:
+        return _upstream_error(e, 'intraday_data')
+
+
+@require_GET
+async def company_overview(request, symbol=None):
+    try:
+        if symbol is None:
+            symbols = [s.strip() for s in request.GET.get('symbols', '').split(',') if s.strip()]
+            if not symbols:
+                return _json({'error': 'Symbols parameter is required'}, 400)
+            # Cache and one table query, never upstream: not worth an async rewrite.
+            overviews, missing = await sync_to_async(load_company_overviews)(symbols)
+            return _json({'results': overviews, 'missing': missing})
+
+        overview = await aload_company_overview(symbol)
+        if overview is None:
+            return _json({'error': f'Unknown symbol: {symbol}'}, 404)
+        return _json(overview)
+    except ValueError as ve:
+        return _json({'error': str(ve)}, 400)
+    except Exception as e:
+        return _upstream_error(e, 'company_overview')
+
+
+async def test_alpha_vantage(request):
+    """Fetches AAPL's overview and intraday bars concurrently, then a week of daily bars."""
+    symbol = 'AAPL'
+    try:
+        setup_alpha_vantage_api()
+        overview, intraday = await asyncio.gather(aget_company_overview(symbol), aget_intraday_data(symbol))
+        for payload, what in ((overview, f'overview for {symbol}'), (intraday, f'intraday data for {symbol}')):
+            error = quota_error(payload, what)
+            if error is not None:
+                raise error
+        end_date = date.today()
+        await sync_to_async(fetch_stock_data)(symbol, end_date - timedelta(days=7), end_date)
+        return HttpResponse("Alpha Vantage API test successful!")
+    except Exception as e:
+        logger.error("Error in test_alpha_vantage: %s", e)
+        return HttpResponse(f"Error: {str(e)}", status=500)
+
+
+@require_GET
+async def report_chart(request, backtest_id):
+    """ReportChartView; the PNG is drawn in the offload process pool instead of on the event loop."""
+    try:
+        backtest_result = await BacktestResult.objects.aget(id=backtest_id)
+    except BacktestResult.DoesNotExist:
+        return _json({'error': 'Backtest result not found'}, 404)
+
+    try:
+        # May train a model; it runs on a worker thread like any sync view under ASGI.
+        await sync_to_async(update_predictions)(backtest_result.symbol)
+    except Exception as e:
+        logger.error("Error generating predictions: %s", e)
+
+    etag = quote_etag(await sync_to_async(chart_etag)(backtest_result))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is None:
+        try:
+            inputs = await sync_to_async(chart_inputs)(backtest_result)
+            chart_png = await run_cpu_bound(render_chart, *inputs)
+        except ValueError as e:
+            return _json({'error': str(e)}, 404)
+        except Exception as e:
+            logger.error("Error generating performance chart: %s", e)
+            return _json({'error': 'Error generating performance chart'}, 500)
+        response = HttpResponse(chart_png, content_type='image/png')
+    else:
+        response = not_modified
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'REPORT_CHART_MAX_AGE', 300))
+    return response
+
+
+@require_GET
+async def intraday_stream(request, symbol):
+    return _event_stream_response(aintraday_stream(symbol, request.headers.get('Last-Event-ID')))
+
+
+@require_GET
+async def job_events(request, job_id):
+    if not JOB_ID_PATTERN.match(job_id):
+        return _json({'error': 'Invalid job id'}, 400)
+    return _event_stream_response(ajob_stream(job_id))
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from .benchmarks import synthetic_bars, daily_payload
+
+logger = logging.getLogger(__name__)
+
+SECTORS = ('TECHNOLOGY', 'FINANCE', 'HEALTHCARE', 'ENERGY', 'INDUSTRIALS', 'CONSUMER CYCLICAL')
+
+NOTE_MESSAGE = (
+    'Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute '
+    'and 500 calls per day.'
+)
+INFORMATION_MESSAGE = (
+    'Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day.'
+)
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 stalls bursts of concurrent connects for a SYN retry.
+    request_queue_size = 512
+
+
+def _seed(symbol):
+    # Stable across processes, unlike hash().
+    return zlib.crc32(symbol.encode())
+
+
+class AlphaVantageSimulator:
+    """Local stand-in for https://www.alphavantage.co/query.
+
+    Serves TIME_SERIES_DAILY, TIME_SERIES_INTRADAY and OVERVIEW. A response
+    recorded as ``<fixtures_dir>/<FUNCTION>_<SYMBOL>.json`` is replayed verbatim;
+    anything else is synthesized deterministically from the symbol. Symbols
+    starting with ``UNKNOWN`` behave like symbols Alpha Vantage does not list.
+
+    Faults are injected per request: ``error_rate`` answers HTTP 500,
+    ``note_rate`` the per-minute "Note" and ``information_rate`` the daily
+    "Information" rate-limit message.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures_dir=None, latency_ms=0.0, jitter_ms=0.0,
+                 error_rate=0.0, note_rate=0.0, information_rate=0.0, days=2500, seed=None):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.note_rate = note_rate
+        self.information_rate = information_rate
+        self.days = days
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self.counts = {}
+        self._server = _Server((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/query'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='av-simulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _roll(self):
+        with self._random_lock:
+            return self._random.random(), self._random.gauss(0, 1)
+
+    def respond(self, query):
+        """Return (status, body bytes) for a parsed query string."""
+        function = (query.get('function') or [''])[0]
+        symbol = (query.get('symbol') or [''])[0].upper()
+
+        roll, noise = self._roll()
+        delay = max(self.latency_ms + noise * self.jitter_ms, 0) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.error_rate:
+            self._count('error')
+            return 500, b'{"error": "simulated upstream failure"}'
+        roll -= self.error_rate
+        if roll < self.note_rate:
+            self._count('note')
+            return 200, json.dumps({'Note': NOTE_MESSAGE}).encode()
+        roll -= self.note_rate
+        if roll < self.information_rate:
+            self._count('information')
+            return 200, json.dumps({'Information': INFORMATION_MESSAGE}).encode()
+
+        self._count(function or 'unknown')
+        key = (function, symbol, (query.get('interval') or ['5min'])[0])
+        body = self._payloads.get(key)
+        if body is None:
+            body = self._payloads[key] = self._recorded(function, symbol) or self._synthesize(*key)
+        return 200, body
+
+    def _recorded(self, function, symbol):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, f'{function}_{symbol}.json')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        return None
+
+    def _synthesize(self, function, symbol, interval):
+        if symbol.startswith('UNKNOWN'):
+            if function == 'OVERVIEW':
+                return b'{}'
+            return json.dumps({'Error Message': f'Invalid API call. Please retry or visit the documentation for {function}.'}).encode()
+
+        if function == 'TIME_SERIES_DAILY':
+            start = date.today() - timedelta(days=int(self.days * 7 / 5) + 7)
+            bars = [bar for bar in synthetic_bars(self.days + 10, seed=_seed(symbol), start=start) if bar[0] <= date.today()]
+            return daily_payload(symbol, bars[-self.days:])
+        if function == 'TIME_SERIES_INTRADAY':
+            return self._intraday(symbol, interval)
+        if function == 'OVERVIEW':
+            return self._overview(symbol)
+        return json.dumps({'Error Message': f'This API function ({function}) does not exist.'}).encode()
+
+    def _intraday(self, symbol, interval):
+        minutes = int(interval.replace('min', '') or 5)
+        bars = synthetic_bars(100, seed=_seed(symbol) + minutes)
+        now = datetime.now().replace(second=0, microsecond=0)
+        series = {}
+        for i, (_, o, h, l, c, v) in enumerate(reversed(bars)):
+            stamp = (now - timedelta(minutes=minutes * i)).strftime('%Y-%m-%d %H:%M:%S')
+            series[stamp] = {
+                '1. open': f'{o:.4f}', '2. high': f'{h:.4f}', '3. low': f'{l:.4f}',
+                '4. close': f'{c:.4f}', '5. volume': str(v // 100),
+            }
+        return json.dumps({
+            'Meta Data': {'2. Symbol': symbol, '4. Interval': interval},
+            f'Time Series ({interval})': series,
+        }).encode()
+
+    def _overview(self, symbol):
+        rng = random.Random(_seed(symbol))
+        high = round(rng.uniform(50, 500), 2)
+        return json.dumps({
+            'Symbol': symbol,
+            'Name': f'{symbol.title()} Corp',
+            'Description': f'Simulated company {symbol}.',
+            'Exchange': rng.choice(['NYSE', 'NASDAQ']),
+            'Currency': 'USD',
+            'Country': 'USA',
+            'Sector': rng.choice(SECTORS),
+            'Industry': 'SIMULATED',
+            'MarketCapitalization': str(rng.randint(10**8, 10**12)),
+            'PERatio': f'{rng.uniform(5, 60):.2f}',
+            'DividendYield': f'{rng.uniform(0, 0.05):.4f}',
+            'Beta': f'{rng.uniform(0.5, 2):.3f}',
+            '52WeekHigh': str(high),
+            '52WeekLow': str(round(high * rng.uniform(0.4, 0.9), 2)),
+        }).encode()
+
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body = simulator.respond(parse_qs(urlparse(self.path).query))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("av-simulator: " + format, *args)
+
+        return Handler
@@ -0,0 +1,194 @@
+import json
+import platform
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from django.db import transaction
+from django.test.utils import override_settings
+from financial_data.models import StockData, BacktestResult
+from financial_data.utils.bulk_writer import bulk_upsert
+
+DEFAULT_SIZES = (500, 2500)
+BENCH_SYMBOL = 'BENCH'
+
+
+def synthetic_bars(days, seed=0, start=date(2000, 1, 3)):
+    """Geometric random walk over ``days`` business days as (date, open, high, low, close, volume)."""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(start, 'D'), np.arange(days), roll='forward')
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    open_ = close * (1 + rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, days))
+    volume = rng.integers(100_000, 10_000_000, days)
+    return [
+        (day.item(), round(float(o), 4), round(float(h), 4), round(float(l), 4), round(float(c), 4), int(v))
+        for day, o, h, l, c, v in zip(dates, open_, high, low, close, volume)
+    ]
+
+
+def daily_payload(symbol, bars):
+    """Render bars as an Alpha Vantage TIME_SERIES_DAILY response body (newest first)."""
+    series = {
+        day.isoformat(): {
+            '1. open': f'{o:.4f}',
+            '2. high': f'{h:.4f}',
+            '3. low': f'{l:.4f}',
+            '4. close': f'{c:.4f}',
+            '5. volume': str(v),
+        }
+        for day, o, h, l, c, v in reversed(bars)
+    }
+    return json.dumps({
+        'Meta Data': {'1. Information': 'Daily Prices (open, high, low, close) and Volumes', '2. Symbol': symbol},
+        'Time Series (Daily)': series,
+    }).encode()
+
+
+@contextmanager
+def stub_server(body, content_type='application/json'):
+    """Serve ``body`` for every GET on an ephemeral localhost port; yields the base URL."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}/query'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def seed_prices(symbol, bars):
+    objs = (
+        StockData(symbol=symbol, date=day, open_price=o, high_price=h, low_price=l, close_price=c, volume=v)
+        for day, o, h, l, c, v in bars
+    )
+    bulk_upsert(
+        StockData, objs,
+        unique_fields=['symbol', 'date'],
+        update_fields=['open_price', 'high_price', 'low_price', 'close_price', 'volume'],
+    )
+
+
+def time_case(func, repeat):
+    func()  # warm-up: imports, caches, first-touch allocations
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': statistics.median(timings), 'min_ms': min(timings), 'repeat': repeat}
+
+
+def _cases(bars):
+    # Imported here so listing or comparing baselines does not load pandas/matplotlib.
+    from financial_data.utils.alpha_vantage_api import fetch_stock_data
+    from financial_data.utils.analysis import run_analysis
+    from financial_data.utils.backtesting import backtest_strategy
+    from financial_data.utils.ml_integration import train_model, predict_stock_prices, compare_predictions
+    from financial_data.utils.report_generation import generate_performance_chart, generate_pdf_report
+
+    start, end = bars[0][0], bars[-1][0]
+    params = {
+        'symbol': BENCH_SYMBOL, 'start_date': start, 'end_date': end,
+        'initial_investment': 10000, 'short_window': 50, 'long_window': 200,
+    }
+    state = {}
+
+    def backtest():
+        state['backtest_id'] = backtest_strategy(params)['backtest_id']
+
+    def chart():
+        state['chart'] = generate_performance_chart(BacktestResult.objects.get(id=state['backtest_id']))
+
+    def pdf():
+        generate_pdf_report(BacktestResult.objects.get(id=state['backtest_id']), state['chart'])
+
+    def fetch():
+        # ALPHA_VANTAGE_BASE_URL points at the stub server for the whole run.
+        fetch_stock_data(f'{BENCH_SYMBOL}F', start, end)
+
+    # Order matters: later cases read what earlier ones stored.
+    return [
+        ('backtest_strategy', backtest),
+        ('train_model', lambda: train_model(BENCH_SYMBOL, start, end)),
+        ('predict_stock_prices', lambda: predict_stock_prices(BENCH_SYMBOL, start, end)),
+        ('compare_predictions', lambda: compare_predictions(BENCH_SYMBOL, start, end)),
+        ('generate_performance_chart', chart),
+        ('generate_pdf_report', pdf),
+        ('fetch_stock_data', fetch),
+        ('run_analysis', lambda: run_analysis(params)),
+    ]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, only=None, progress=None):
+    """Time every hot path at each size; all rows written are rolled back afterwards
+    and models are trained into a throwaway store.
+    """
+    results = {}
+    for size in sizes:
+        bars = synthetic_bars(size, seed=size)
+        payload = daily_payload(f'{BENCH_SYMBOL}F', bars)
+        with stub_server(payload) as url, tempfile.TemporaryDirectory() as model_dir, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=url, MODEL_STORE_DIR=model_dir), transaction.atomic():
+            seed_prices(BENCH_SYMBOL, bars)
+            cases = _cases(bars)
+            last = max((i for i, (name, _) in enumerate(cases) if not only or name in only), default=-1)
+            for i, (name, func) in enumerate(cases[:last + 1]):
+                if only and name not in only:
+                    func()  # untimed: a selected case later in the list depends on its output
+                    continue
+                key = f'{name}[{size}]'
+                results[key] = time_case(func, repeat)
+                if progress:
+                    progress(key, results[key])
+            transaction.set_rollback(True)
+    return {
+        'meta': {
+            'created': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'node': platform.node(),
+        },
+        'results': results,
+    }
+
+
+def compare_results(current, baseline, max_regression):
+    """Compare medians against a baseline; a case regresses when it is more than
+    ``max_regression`` percent slower. Returns rows sorted by case name.
+    """
+    rows = []
+    base_results = baseline.get('results', {})
+    for key, result in sorted(current['results'].items()):
+        base = base_results.get(key)
+        if base is None:
+            rows.append({'case': key, 'current_ms': result['median_ms'], 'baseline_ms': None, 'change_pct': None, 'regressed': False})
+            continue
+        change = (result['median_ms'] - base['median_ms']) / base['median_ms'] * 100 if base['median_ms'] else 0.0
+        rows.append({
+            'case': key,
+            'current_ms': result['median_ms'],
+            'baseline_ms': base['median_ms'],
+            'change_pct': change,
+            'regressed': change > max_regression,
+        })
+    return rows
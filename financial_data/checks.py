@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # Job progress, the intraday feed and the Alpha Vantage quota are handed between processes
+    # through the default cache; a per-process one quietly confines each to a single worker.
+    if settings.DEBUG or not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache)):
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint='Job progress streams, the shared intraday feed and the API quota only reach other web and '
+             'Celery worker processes through a shared cache; set CACHE_URL (e.g. redis://redis:6379/1), '
+             'or run a single web worker and no Celery workers.',
+        id='financial_data.W001',
+    )]
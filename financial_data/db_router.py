@@ -0,0 +1,121 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models whose reads are heavy range scans that a lagging replica can serve.
+ANALYTICS_MODELS = {'financial_data.stockdata', 'financial_data.prediction'}
+
+LAST_WRITE_KEY = 'db_router:last_analytics_write'
+
+# True once the current request/task has written analytics rows (or asked to be pinned).
+_pinned = contextvars.ContextVar('db_router_pinned', default=False)
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica."""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_primary():
+    """Route every read in the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def _recently_written():
+    window = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 0)
+    if not window:
+        return False
+    last = cache.get(LAST_WRITE_KEY)
+    return last is not None and time.time() - last < window
+
+
+class AnalyticsRouter:
+    """Send StockData/Prediction reads to DATABASE_REPLICA_ALIAS; everything else uses ``default``.
+
+    Reads stay on the primary (read-your-writes) when:
+
+    - the current request or task already wrote analytics rows;
+    - the primary is inside a transaction, whose uncommitted rows the replica cannot see;
+    - any process wrote analytics rows in the last DATABASE_REPLICA_PIN_SECONDS,
+      which covers replication lag right after an ingest.
+
+    That last write time is kept in the default cache, so with a replica and a
+    pin window the cache must be shared between processes (CACHE_URL).
+    """
+
+    def __init__(self):
+        if (replica_alias() is not None and getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 0)
+                and isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))):
+            raise ImproperlyConfigured(
+                "DATABASE_REPLICA_PIN_SECONDS needs a default cache shared by every process; set CACHE_URL "
+                "(or DATABASE_REPLICA_PIN_SECONDS=0 to rely on per-request pinning only)"
+            )
+
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        if replica is None or model._meta.label_lower not in ANALYTICS_MODELS:
+            return None
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block or _recently_written():
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        if model._meta.label_lower in ANALYTICS_MODELS and replica_alias() is not None:
+            _pinned.set(True)
+            if getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 0):
+                cache.set(LAST_WRITE_KEY, time.time(), settings.DATABASE_REPLICA_PIN_SECONDS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary; its schema arrives through replication.
+        return db != replica_alias()
+
+
+class PrimaryPinMiddleware:
+    """Scope read-your-writes pinning to one request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+    async def __acall__(self, request):
+        token = _pinned.set(False)
+        try:
+            return await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+
+def task_prerun_handler(**kwargs):
+    # Worker threads run many tasks; start each one unpinned.
+    _pinned.set(False)
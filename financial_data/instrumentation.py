@@ -0,0 +1,227 @@
+import contextvars
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def total(self, **labels):
+        """Sum over every series whose labels include ``labels``."""
+        indexes = [(self.labelnames.index(name), value) for name, value in labels.items()]
+        with self._lock:
+            items = list(self._values.items())
+        return sum(value for key, value in items if all(key[i] == wanted for i, wanted in indexes))
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(tuple(labels.get(name, '') for name in self.labelnames))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (bucket_counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", bound)])} {bucket_count}'
+            yield f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", "+Inf")])} {count}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, key)} {count}'
+
+
+class Registry:
+    """In-process metric registry; each gunicorn/Celery process exports its own series."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        # ``collector()`` returns (name, kind, documentation, value) tuples computed at scrape time.
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            for name, kind, documentation, value in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'financial_data_stage_seconds', 'Time spent in hot-path stages', ['stage']
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'financial_data_http_request_seconds', 'Request latency by view', ['view', 'method', 'status']
+))
+ALPHA_VANTAGE_REQUESTS = REGISTRY.register(Counter(
+    'alpha_vantage_requests_total', 'Alpha Vantage HTTP calls by function and status', ['function', 'status']
+))
+ALPHA_VANTAGE_SECONDS = REGISTRY.register(Histogram(
+    'alpha_vantage_request_seconds', 'Alpha Vantage time to response headers', ['function']
+))
+ALPHA_VANTAGE_QUOTA_HITS = REGISTRY.register(Counter(
+    'alpha_vantage_quota_hits_total', 'Responses carrying a rate-limit Note or Information message', ['function']
+))
+ALPHA_VANTAGE_BYTES = REGISTRY.register(Counter(
+    'alpha_vantage_response_bytes_total', 'Response bytes received from Alpha Vantage', ['function']
+))
+
+
+@REGISTRY.register_collector
+def _shared_price_stats():
+    module = sys.modules.get('financial_data.utils.shared_prices')
+    if module is None:
+        return []
+    stats = module.reader.stats()
+    return [
+        ('shared_prices_hits_total', 'counter', 'Series served from the shared price segment', stats['hits']),
+        ('shared_prices_misses_total', 'counter', 'Series lookups that fell back to the database', stats['misses']),
+        ('shared_prices_symbols', 'gauge', 'Symbols in the attached shared price segment', stats['symbols']),
+    ]
+
+
+_request_timings = contextvars.ContextVar('financial_data_request_timings', default=None)
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+class ServerTimingMiddleware:
+    """Records request latency and, when enabled, adds a Server-Timing header.
+
+    The header is sent for every request when SERVER_TIMING_ENABLED is true, or
+    for a single request that carries ``X-Server-Timing: 1``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    def _finish(self, request, response, timings, started):
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        HTTP_REQUEST_SECONDS.observe(elapsed, view=view, method=request.method, status=response.status_code)
+
+        if getattr(settings, 'SERVER_TIMING_ENABLED', False) or request.headers.get('X-Server-Timing') == '1':
+            entries = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items()]
+            entries.append(f'total;dur={elapsed * 1000:.1f}')
+            response['Server-Timing'] = ', '.join(entries)
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+import requests
+
+# Share of requests per scenario; roughly what the dashboard generates.
+DEFAULT_MIX = {'backtest': 30, 'predict': 25, 'report': 10, 'overview': 35}
+DEFAULT_SYMBOLS = ('AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', 'TSLA', 'JPM', 'XOM', 'UNH')
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown scenario '{name}'; expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples, elapsed):
+    """``samples`` is a list of (scenario, seconds, ok). Latencies are reported in ms."""
+    groups = {}
+    for name, seconds, ok in samples:
+        groups.setdefault(name, []).append((seconds, ok))
+    groups['all'] = [(seconds, ok) for _, seconds, ok in samples]
+
+    summary = {}
+    for name, entries in groups.items():
+        latencies = sorted(seconds * 1000 for seconds, _ in entries)
+        summary[name] = {
+            'requests': len(entries),
+            'errors': sum(1 for _, ok in entries if not ok),
+            'rps': len(entries) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+    return summary
+
+
+class LoadTest:
+    """Closed-loop load generator: ``concurrency`` workers each pick a scenario by
+    weight, wait for the response and go again until ``duration`` elapses.
+    """
+
+    def __init__(self, base_url, mix=None, symbols=DEFAULT_SYMBOLS, concurrency=8, duration=30.0,
+                 history_days=730, timeout=60.0, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix or DEFAULT_MIX
+        self.symbols = list(symbols)
+        self.concurrency = concurrency
+        self.duration = duration
+        self.history_days = history_days
+        self.timeout = timeout
+        self.seed = seed
+        self.samples = []
+        self.backtest_ids = []
+        self._lock = threading.Lock()
+
+    def _backtest(self, session, rng):
+        end = date.today()
+        response = session.post(f'{self.base_url}/backtest/', json={
+            'symbol': rng.choice(self.symbols),
+            'start_date': (end - timedelta(days=self.history_days)).isoformat(),
+            'end_date': end.isoformat(),
+            'initial_investment': 10000,
+        }, timeout=self.timeout)
+        if response.ok:
+            with self._lock:
+                self.backtest_ids.append(response.json()['backtest_id'])
+        return response
+
+    def _predict(self, session, rng):
+        return session.get(f'{self.base_url}/predict/', params={'symbol': rng.choice(self.symbols)}, timeout=self.timeout)
+
+    def _report(self, session, rng):
+        with self._lock:
+            backtest_id = rng.choice(self.backtest_ids) if self.backtest_ids else None
+        if backtest_id is None:
+            return None
+        return session.get(f'{self.base_url}/report/', params={'backtest_id': backtest_id, 'format': 'json'},
+                           timeout=self.timeout)
+
+    def _overview(self, session, rng):
+        if rng.random() < 0.2:
+            symbols = ','.join(rng.sample(self.symbols, min(5, len(self.symbols))))
+            return session.get(f'{self.base_url}/company-overview/', params={'symbols': symbols}, timeout=self.timeout)
+        return session.get(f'{self.base_url}/company-overview/{rng.choice(self.symbols)}/', timeout=self.timeout)
+
+    def _worker(self, index, deadline):
+        rng = random.Random(None if self.seed is None else self.seed + index)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        samples = []
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = getattr(self, f'_{name}')(session, rng)
+                    if response is None:
+                        # No backtest to report on yet; warm up with one.
+                        name = 'backtest'
+                        response = self._backtest(session, rng)
+                    ok = response.ok
+                except requests.RequestException:
+                    ok = False
+                samples.append((name, time.perf_counter() - started, ok))
+        with self._lock:
+            self.samples.extend(samples)
+
+    def run(self):
+        deadline = time.monotonic() + self.duration
+        started = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._worker, args=(i, deadline), name=f'loadtest-{i}')
+            for i in range(self.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return summarize(self.samples, time.perf_counter() - started)
@@ -0,0 +1,109 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+import random
+import sys
+import weakref
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Passes every record above DEBUG and a random ``rate`` fraction of DEBUG records."""
+
+    def __init__(self, rate=0.01, name=''):
+        super().__init__(name)
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        return random.random() < self.rate
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that owns a QueueListener writing to a file and/or stderr.
+
+    The request thread only enqueues the record; formatting and disk I/O happen
+    on the listener thread. When the queue is full new records are dropped
+    rather than blocking the request.
+
+    The listener thread does not survive fork(), so a forked child (Celery
+    prefork and process pool workers) starts its own with a fresh queue.
+    """
+
+    def __init__(self, filename=None, stream=True, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self._closed = False
+        targets = []
+        if filename:
+            targets.append(logging.FileHandler(filename))
+        if stream:
+            targets.append(logging.StreamHandler(sys.stderr))
+        self.targets = targets
+        self._start_listener()
+        atexit.register(self._stop_listener)
+        restart = weakref.WeakMethod(self._restart_after_fork)
+        os.register_at_fork(after_in_child=lambda: restart() and restart()())
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart_after_fork(self):
+        # Runs in the child right after fork(), before any other thread exists. Records the
+        # parent had queued belong to the parent's listener, and the queue's lock may be held.
+        if self._closed:
+            return
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._start_listener()
+        # multiprocessing children leave through os._exit(), which skips atexit.
+        multiprocessing.util.Finalize(self, self._stop_listener, exitpriority=10)
+
+    def _stop_listener(self):
+        # Flushes queued records; safe to call more than once.
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for target in self.targets:
+            target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Leave msg/args untouched so %-style arguments are formatted on the
+        # listener thread, not in the request.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._closed = True
+        self._stop_listener()
+        for target in self.targets:
+            target.close()
+        super().close()
@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import override_settings
+from financial_data import async_views
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.utils.alpha_vantage_async import aclose_client
+from financial_data.views import IntradayDataView
+
+
+def _serve(latency_ms, connection):
+    simulator = AlphaVantageSimulator(latency_ms=latency_ms, days=30)
+    connection.send(simulator.url)
+    simulator.serve_forever()
+
+
+@contextmanager
+def simulator_process(latency_ms):
+    """URL of an Alpha Vantage simulator in a child process, so it does not compete with the views for the GIL."""
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.get_context('fork').Process(target=_serve, args=(latency_ms, child), daemon=True)
+    process.start()
+    try:
+        yield parent.recv()
+    finally:
+        process.terminate()
+        process.join()
+
+
+class InFlight:
+    """Counts requests inside the view at once and keeps the peak."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+def run_sync(symbols, threads):
+    # A gthread worker: a request holds one of ``threads`` threads until the upstream call returns.
+    view = IntradayDataView.as_view()
+    factory = RequestFactory()
+    in_flight = InFlight()
+    started = time.perf_counter()
+
+    def call(symbol):
+        with in_flight:
+            response = view(factory.get(f'/api/intraday-data/{symbol}/'), symbol=symbol)
+            response.render()
+        return time.perf_counter() - started, response.status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(call, symbols))
+    return results, in_flight.peak
+
+
+async def run_async(symbols):
+    # An ASGI worker: every request is a task on the one event loop.
+    factory = AsyncRequestFactory()
+    in_flight = InFlight()
+    started = time.perf_counter()
+
+    async def call(symbol):
+        with in_flight:
+            response = await async_views.intraday_data(factory.get(f'/api/intraday-data/{symbol}/'), symbol=symbol)
+        return time.perf_counter() - started, response.status_code
+
+    results = await asyncio.gather(*(call(symbol) for symbol in symbols))
+    return results, in_flight.peak
+
+
+class Command(BaseCommand):
+    help = ('In-flight request capacity of one worker on the intraday endpoint: '
+            'sync view on a thread pool (WSGI gthread) vs async view on one event loop (ASGI)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256],
+                            help='Simultaneous requests per round')
+        parser.add_argument('--threads', type=int, default=16, help='Threads of the sync worker (gunicorn --threads)')
+        parser.add_argument('--latency-ms', type=float, default=200.0, help='Simulated Alpha Vantage latency')
+        parser.add_argument('--max-connections', type=int, default=None,
+                            help='Async client pool size (default: ALPHA_VANTAGE_MAX_CONNECTIONS)')
+
+    def handle(self, *args, **options):
+        max_connections = options['max_connections'] or getattr(settings, 'ALPHA_VANTAGE_MAX_CONNECTIONS', 100)
+        latency = options['latency_ms']
+        with simulator_process(latency) as url, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=url, ALPHA_VANTAGE_MAX_CONNECTIONS=max_connections):
+            self.stdout.write(f"upstream latency {latency:.0f} ms, sync worker {options['threads']} threads, "
+                              f"async pool {max_connections} connections; views called directly")
+            self.stdout.write(f"{'mode':<6} {'requests':>8} {'in flight':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+            # Fresh symbols every round, so neither view answers from its cache.
+            rounds = [[f'C{round_number}X{i}' for i in range(concurrency)]
+                      for round_number, concurrency in enumerate(options['concurrency'])]
+            run_sync(['WARMUP'], options['threads'])
+            for symbols in rounds:
+                cache.clear()
+                self.report('sync', *run_sync(symbols, options['threads']))
+            asyncio.run(self.async_rounds(rounds))
+
+    async def async_rounds(self, rounds):
+        # One loop for every round, like a long-running ASGI worker with a warm connection pool.
+        try:
+            await run_async(['WARMUP'])
+            for symbols in rounds:
+                await cache.aclear()
+                self.report('async', *await run_async(symbols))
+        finally:
+            await aclose_client()
+
+    def report(self, mode, results, peak):
+        finished = np.array([seconds for seconds, _ in results])
+        failed = sum(1 for _, status in results if status != 200)
+        line = (f'{mode:<6} {len(results):>8} {peak:>10} {len(results) / finished.max():>8.1f} '
+                f'{np.percentile(finished, 50) * 1000:>8.0f} {np.percentile(finished, 95) * 1000:>8.0f}')
+        self.stdout.write(line + (f'  ({failed} failed)' if failed else ''))
@@ -0,0 +1,80 @@
+import logging
+import os
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from financial_data.logging_utils import AsyncQueueHandler, DebugSamplingFilter, JsonFormatter
+
+ROWS = [{'date': f'2024-01-{day:02d}', 'close_price': 100.0 + day} for day in range(1, 29)]
+
+
+def simulated_request_eager(logger, symbol):
+    # Mirrors the old hot-path style: f-strings are formatted whether or not anyone reads them.
+    logger.debug(f"Starting backtest for {symbol} from 2024-01-01 to 2024-12-31")
+    logger.debug(f"Fetched {len(ROWS)} stock data points")
+    logger.debug(f"Actual price range: {min(r['close_price'] for r in ROWS)} to {max(r['close_price'] for r in ROWS)}")
+    logger.debug(f"Rows: {ROWS}")
+    logger.info(f"Successfully fetched and stored {len(ROWS)} rows for {symbol}")
+
+
+def simulated_request_lazy(logger, symbol):
+    logger.debug("Starting backtest for %s from %s to %s", symbol, '2024-01-01', '2024-12-31')
+    logger.debug("Fetched %s stock data points", len(ROWS))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Actual price range: %s to %s", min(r['close_price'] for r in ROWS), max(r['close_price'] for r in ROWS))
+    logger.debug("Rows: %s", ROWS)
+    logger.info("Successfully fetched and stored %s rows for %s", len(ROWS), symbol)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request logging latency: synchronous DEBUG handlers vs the production queue pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--sample-rate', type=float, default=0.01)
+
+    def run(self, logger, request, count):
+        timings = []
+        for i in range(count):
+            started = time.perf_counter()
+            request(logger, f'SYM{i % 50}')
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        with tempfile.TemporaryDirectory() as tmpdir, open(os.devnull, 'w') as devnull:
+            sync_logger = logging.getLogger('bench_logging.sync')
+            sync_logger.propagate = False
+            sync_logger.setLevel(logging.DEBUG)
+            file_handler = logging.FileHandler(os.path.join(tmpdir, 'sync.log'))
+            console_handler = logging.StreamHandler(devnull)
+            sync_logger.addHandler(file_handler)
+            sync_logger.addHandler(console_handler)
+
+            async_logger = logging.getLogger('bench_logging.async')
+            async_logger.propagate = False
+            async_logger.setLevel(logging.DEBUG)
+            async_handler = AsyncQueueHandler(filename=os.path.join(tmpdir, 'async.log'), stream=False, maxsize=count * 10)
+            async_handler.setFormatter(JsonFormatter())
+            async_handler.addFilter(DebugSamplingFilter(options['sample_rate']))
+            async_logger.addHandler(async_handler)
+
+            info_logger = logging.getLogger('bench_logging.info')
+            info_logger.propagate = False
+            info_logger.setLevel(logging.INFO)
+            info_logger.addHandler(async_handler)
+
+            results = {
+                'sync DEBUG, eager f-strings': self.run(sync_logger, simulated_request_eager, count),
+                f'queue DEBUG sampled {options["sample_rate"]:.0%}, lazy': self.run(async_logger, simulated_request_lazy, count),
+                'queue INFO, lazy': self.run(info_logger, simulated_request_lazy, count),
+            }
+            async_handler.close()
+            file_handler.close()
+
+        self.stdout.write(f'{count} simulated requests, 5 log calls each')
+        for name, (p50, p99) in results.items():
+            self.stdout.write(f'{name:<36} p50 {p50:8.1f} us   p99 {p99:8.1f} us')
@@ -0,0 +1,45 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from financial_data.utils.screener import PriceMatrix, sma_crossover, top_returns
+
+
+class Command(BaseCommand):
+    help = 'Benchmark screener filters over a synthetic (symbols x dates) universe'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=300)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--budget-ms', type=float, default=50.0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(42)
+        n_symbols, n_days = options['symbols'], options['days']
+        returns = rng.normal(0.0003, 0.02, size=(n_symbols, n_days))
+        close = 100 * np.exp(np.cumsum(returns, axis=1))
+        dates = np.datetime64('2023-01-02') + np.arange(n_days)
+        matrix = PriceMatrix([f'SYM{i:05d}' for i in range(n_symbols)], dates, close)
+
+        cases = {
+            'sma_cross(50, 200)': lambda: sma_crossover(matrix, 50, 200),
+            'top_return(252, 20)': lambda: top_returns(matrix, 252, 20),
+        }
+        failed = False
+        self.stdout.write(f'Universe: {n_symbols} symbols x {n_days} dates')
+        for name, case in cases.items():
+            case()
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                case()
+                timings.append((time.perf_counter() - started) * 1000)
+            median = float(np.median(timings))
+            line = f'{name:<22} median {median:8.2f} ms   min {min(timings):8.2f} ms'
+            if median > options['budget_ms']:
+                failed = True
+                self.stdout.write(self.style.ERROR(f'{line}   over budget ({options["budget_ms"]} ms)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+        if failed:
+            raise SystemExit(1)
@@ -0,0 +1,64 @@
+import decimal
+import time
+from datetime import date, timedelta
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from financial_data.renderers import ORJSONRenderer, shape_table
+
+
+def legacy_rows(dates, closes, predicted):
+    # What PredictionView used to hand DRF: dicts per row holding date and Decimal objects.
+    return {
+        'predictions': [{'date': day, 'predicted_price': float(price)} for day, price in zip(dates, predicted)],
+        'actual_prices': [{'date': day, 'close_price': decimal.Decimal(f'{close:.2f}')}
+                          for day, close in zip(dates, closes)],
+    }
+
+
+def array_payload(dates, closes, predicted, shape):
+    return {
+        'predictions': shape_table({'date': dates, 'predicted_price': predicted}, shape),
+        'actual_prices': shape_table({'date': dates, 'close_price': closes}, shape),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON rendering of a prediction-sized response: DRF JSONRenderer vs orjson, rows vs columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=252 * 5, help='Rows per series (default: five years)')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, build, renderer):
+        # Building the payload is part of the cost the views pay, so it is timed too.
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            body = renderer.render(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        return float(np.median(timings)), len(body)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        days = options['days']
+        rng = np.random.default_rng(7)
+        closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, days))), 2)
+        predicted = closes * (1 + rng.normal(0, 0.005, days))
+        dates = np.datetime64(date.today() - timedelta(days=days), 'D') + np.arange(days)
+        date_objects = dates.tolist()
+
+        cases = [
+            ('drf   rows (dicts, Decimal)', lambda: legacy_rows(date_objects, closes.tolist(), predicted.tolist()),
+             JSONRenderer()),
+            ('orjson rows (dicts, Decimal)', lambda: legacy_rows(date_objects, closes.tolist(), predicted.tolist()),
+             ORJSONRenderer()),
+            ('orjson rows (from arrays)', lambda: array_payload(dates, closes, predicted, 'rows'), ORJSONRenderer()),
+            ('orjson columns', lambda: array_payload(dates, closes, predicted, 'columns'), ORJSONRenderer()),
+        ]
+        self.stdout.write(f'{days} rows per series, median of {self.repeat} runs')
+        baseline = None
+        for name, build, renderer in cases:
+            median, size = self.measure(build, renderer)
+            baseline = baseline or median
+            self.stdout.write(f'{name:<30} {median:8.2f} ms  {size / 1024:8.1f} KiB  {baseline / median:5.1f}x')
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SETUP = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_analyzer.settings')\n"
+)
+
+ENTRY_POINTS = {
+    # gunicorn boot plus URLconf resolution, which imports every view module.
+    'web': SETUP + (
+        "from stock_analyzer.wsgi import application\n"
+        "from django.urls import get_resolver; get_resolver().url_patterns\n"
+    ),
+    # Celery worker loading the task registry.
+    'worker': SETUP + (
+        "import django; django.setup()\n"
+        "import financial_data.tasks\n"
+    ),
+    'manage': SETUP + (
+        "import django; django.setup()\n"
+        "from financial_data.management.commands import test_alpha_vantage\n"
+    ),
+}
+
+HEAVY_MODULES = ('pandas', 'sklearn', 'matplotlib', 'reportlab', 'joblib', 'numpy', 'httpx')
+
+
+def measure(code):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, capture_output=True, text=True, env=os.environ.copy()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    total_us = 0
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        total_us += int(self_us)
+        top_level[package] = top_level.get(package, 0) + int(self_us)
+    return total_us / 1000, top_level
+
+
+class Command(BaseCommand):
+    help = 'Measure import time of the web, worker and manage.py entry points with python -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), action='append')
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--web-budget-ms', type=float, default=1000.0)
+        parser.add_argument('--worker-budget-ms', type=float, default=1000.0)
+        parser.add_argument('--manage-budget-ms', type=float, default=1000.0)
+        parser.add_argument('--top', type=int, default=8)
+
+    def handle(self, *args, **options):
+        failed = False
+        for entry in options['entry'] or sorted(ENTRY_POINTS):
+            runs = [measure(ENTRY_POINTS[entry]) for _ in range(options['runs'])]
+            total_ms, packages = min(runs, key=lambda run: run[0])
+            budget = options[f'{entry}_budget_ms']
+            heavy = sorted(name for name in HEAVY_MODULES if name in packages)
+
+            line = f'{entry:<8} {total_ms:8.1f} ms (budget {budget:.0f} ms)'
+            if total_ms > budget:
+                failed = True
+                self.stdout.write(self.style.ERROR(line + '  OVER BUDGET'))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
+            if heavy:
+                self.stdout.write(f'         heavy packages imported at startup: {", ".join(heavy)}')
+            for name, us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]:
+                self.stdout.write(f'         {name:<28} {us / 1000:8.1f} ms')
+        if failed:
+            raise SystemExit(1)
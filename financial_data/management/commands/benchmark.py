@@ -0,0 +1,67 @@
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from financial_data.benchmarks import DEFAULT_SIZES, run_benchmarks, compare_results
+
+
+class Command(BaseCommand):
+    help = 'Time the backtest, model, chart, PDF and ingest paths on synthetic data and compare with a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='Comma-separated series lengths in trading days')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--case', action='append', dest='cases', help='Only run this case (repeatable)')
+        parser.add_argument('--baseline', default=None, help='Baseline JSON path (default: BENCHMARK_BASELINE)')
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--output', help='Also write this run to the given JSON file')
+        parser.add_argument('--max-regression', type=float, default=None,
+                            help='Fail when a median is this many percent slower than the baseline')
+
+    def handle(self, *args, **options):
+        baseline_path = options['baseline'] or getattr(
+            settings, 'BENCHMARK_BASELINE', os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+        )
+        max_regression = options['max_regression']
+        if max_regression is None:
+            max_regression = getattr(settings, 'BENCHMARK_MAX_REGRESSION', 20.0)
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+
+        def progress(key, result):
+            self.stdout.write(f'{key:<36} median {result["median_ms"]:10.2f} ms   min {result["min_ms"]:10.2f} ms')
+
+        current = run_benchmarks(sizes, options['repeat'], options['cases'], progress)
+
+        if options['output']:
+            self._write(options['output'], current)
+
+        failed = False
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            self.stdout.write(f'\nAgainst {baseline_path} (threshold {max_regression:.0f}%):')
+            for row in compare_results(current, baseline, max_regression):
+                if row['baseline_ms'] is None:
+                    self.stdout.write(f'{row["case"]:<36} new')
+                    continue
+                line = (f'{row["case"]:<36} {row["baseline_ms"]:10.2f} -> {row["current_ms"]:10.2f} ms'
+                        f'   {row["change_pct"]:+7.1f}%')
+                if row['regressed']:
+                    failed = True
+                    self.stdout.write(self.style.ERROR(f'{line}   REGRESSION'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(line))
+        else:
+            self.stdout.write(f'\nNo baseline at {baseline_path}; run with --save-baseline to record one.')
+
+        if options['save_baseline']:
+            self._write(baseline_path, current)
+            self.stdout.write(f'Baseline written to {baseline_path}')
+        if failed:
+            raise SystemExit(1)
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
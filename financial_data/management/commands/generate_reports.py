@@ -0,0 +1,60 @@
+import os
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from financial_data.models import BacktestResult
+from financial_data.utils.batch_reports import load_report_jobs, render_reports, stream_zip, write_reports
+
+
+class Command(BaseCommand):
+    help = 'Render PDF reports for many backtests in a worker pool, into a directory or a ZIP file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', help='Comma-separated backtest ids')
+        parser.add_argument('--symbol', action='append', dest='symbols', help='Every backtest for this symbol (repeatable)')
+        parser.add_argument('--output-dir', help='Write PDFs and manifest.json here')
+        parser.add_argument('--zip', help='Write a ZIP archive to this path instead')
+        parser.add_argument('--workers', type=int, help='Render processes (default: REPORT_WORKERS or CPU count)')
+
+    def handle(self, *args, **options):
+        if bool(options['output_dir']) == bool(options['zip']):
+            raise CommandError('Pass exactly one of --output-dir or --zip')
+        backtest_ids = [int(i) for i in (options['ids'] or '').split(',') if i.strip()]
+        if options['symbols']:
+            backtest_ids += list(BacktestResult.objects.filter(symbol__in=[s.upper() for s in options['symbols']])
+                                 .order_by('id').values_list('id', flat=True))
+        if not backtest_ids:
+            raise CommandError('No backtests selected; use --ids or --symbol')
+
+        started = time.perf_counter()
+        jobs, missing = load_report_jobs(backtest_ids)
+        for backtest_id in missing:
+            self.stdout.write(self.style.WARNING(f'Backtest {backtest_id} not found'))
+
+        rendered = []
+
+        def progress(results):
+            for outcome in results:
+                rendered.append(outcome)
+                if outcome['error']:
+                    self.stdout.write(self.style.ERROR(f'{outcome["filename"]:<28} {outcome["error"]}'))
+                else:
+                    self.stdout.write(f'{outcome["filename"]:<28} chart {outcome["chart_ms"]:8.1f} ms'
+                                      f'   pdf {outcome["pdf_ms"]:8.1f} ms')
+                yield outcome
+
+        workers = options['workers'] or getattr(settings, 'REPORT_WORKERS', None) or os.cpu_count() or 1
+        results = progress(render_reports(jobs, workers))
+        if options['zip']:
+            with open(options['zip'], 'wb') as f:
+                for chunk in stream_zip(results, missing):
+                    f.write(chunk)
+        else:
+            write_reports(results, options['output_dir'], missing)
+
+        elapsed = time.perf_counter() - started
+        succeeded = sum(1 for outcome in rendered if not outcome['error'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {succeeded}/{len(backtest_ids)} reports in {elapsed:.2f}s'
+            f' ({succeeded / elapsed if elapsed else 0:.1f} reports/s) -> {options["zip"] or options["output_dir"]}'
+        ))
@@ -0,0 +1,40 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from financial_data.loadtest import DEFAULT_MIX, DEFAULT_SYMBOLS, LoadTest, parse_mix
+
+
+class Command(BaseCommand):
+    help = 'Drive /backtest/, /predict/, /report/ and /company-overview/ with a weighted mix and report latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api')
+        parser.add_argument('--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+                            help='Scenario weights, e.g. backtest=30,predict=25,report=10,overview=35')
+        parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds')
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--output', help='Write the summary to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        test = LoadTest(
+            options['base_url'], mix=mix, symbols=[s for s in options['symbols'].split(',') if s],
+            concurrency=options['concurrency'], duration=options['duration'], seed=options['seed'],
+        )
+        self.stdout.write(f'{options["concurrency"]} workers for {options["duration"]:.0f}s against {options["base_url"]}')
+        summary = test.run()
+
+        self.stdout.write(f'{"scenario":<10} {"requests":>9} {"errors":>7} {"req/s":>8} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9}')
+        for name, row in sorted(summary.items(), key=lambda item: item[0] == 'all'):
+            self.stdout.write(
+                f'{name:<10} {row["requests"]:>9} {row["errors"]:>7} {row["rps"]:>8.1f} '
+                f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} {row["p99_ms"]:>9.1f}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(summary, f, indent=2)
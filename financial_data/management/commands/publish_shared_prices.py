@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from financial_data.utils.shared_prices import hot_symbols, publish_hot_symbols, reader
+
+
+class Command(BaseCommand):
+    help = 'Publish the most requested symbols into the shared-memory price segment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*',
+                            help='Symbols to publish, kept across refreshes (defaults to the hot set)')
+
+    def handle(self, *args, **options):
+        symbols = options['symbols'] or hot_symbols()
+        segment = publish_hot_symbols(symbols, pinned=bool(options['symbols']))
+        self.stdout.write(self.style.SUCCESS(f'Published {len(symbols)} symbols to {segment}'))
+        self.stdout.write(str(reader.stats()))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from financial_data.av_simulator import AlphaVantageSimulator
+
+
+class Command(BaseCommand):
+    help = 'Serve a local Alpha Vantage simulator (point ALPHA_VANTAGE_BASE_URL at it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fixtures', help='Directory of recorded <FUNCTION>_<SYMBOL>.json responses to replay')
+        parser.add_argument('--latency-ms', type=float, default=150.0)
+        parser.add_argument('--jitter-ms', type=float, default=50.0)
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--note-rate', type=float, default=0.0, help='Share of per-minute "Note" responses')
+        parser.add_argument('--information-rate', type=float, default=0.0, help='Share of daily "Information" responses')
+        parser.add_argument('--days', type=int, default=2500, help='Length of synthesized daily series')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        simulator = AlphaVantageSimulator(
+            host=options['host'], port=options['port'], fixtures_dir=options['fixtures'],
+            latency_ms=options['latency_ms'], jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'], note_rate=options['note_rate'],
+            information_rate=options['information_rate'], days=options['days'], seed=options['seed'],
+        )
+        self.stdout.write(f'Alpha Vantage simulator listening on {simulator.url}')
+        self.stdout.write(f'Start the app with ALPHA_VANTAGE_BASE_URL={simulator.url}')
+        try:
+            simulator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            simulator.stop()
+            self.stdout.write(f'Served: {simulator.counts}')
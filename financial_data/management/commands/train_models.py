@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from financial_data.utils.batch_training import train_symbols
+
+
+class Command(BaseCommand):
+    help = 'Retrain per-symbol prediction models in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', help='Comma-separated symbols (default: every symbol with price data)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: TRAINING_WORKERS or CPU count)')
+        parser.add_argument('--shard-size', type=int, help='Symbols per pool task')
+
+    def handle(self, *args, **options):
+        symbols = [s.strip().upper() for s in options['symbols'].split(',') if s.strip()] if options['symbols'] else None
+        summary = train_symbols(symbols, workers=options['workers'], shard_size=options['shard_size'])
+
+        self.stdout.write(f'Feature set: {summary["features"]}')
+        self.stdout.write(f'Prepared arrays in {summary["prepare_seconds"]:.2f}s')
+        for symbol, error in summary['failed'].items():
+            self.stdout.write(self.style.ERROR(f'{symbol}: {error}'))
+        if summary['skipped']:
+            self.stdout.write(f'Skipped (not enough history): {", ".join(summary["skipped"])}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Trained {summary["trained"]} models in {summary["seconds"]:.2f}s with {summary["workers"]} workers '
+            f'({summary["symbols_per_second"]:.1f} symbols/s)'
+        ))
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial_data', '0002_remove_stockdata_financial_d_symbol_108401_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyoverview',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial_data', '0003_companyoverview_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10, unique=True)),
+                ('model_version', models.CharField(max_length=64)),
+                ('last_date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
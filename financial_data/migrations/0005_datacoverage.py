@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial_data', '0004_predictioncursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['symbol', 'start_date'], name='financial_d_symbol_6343f3_idx')],
+            },
+        ),
+    ]
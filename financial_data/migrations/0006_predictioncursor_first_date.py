@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial_data', '0005_datacoverage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictioncursor',
+            name='first_date',
+            field=models.DateField(null=True),
+        ),
+    ]
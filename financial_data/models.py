@@ -29,6 +29,38 @@ class Prediction(models.Model):
     def __str__(self):
         return f"{self.symbol} - {self.date} - Predicted: {self.predicted_price}"
 
+class PredictionCursor(models.Model):
+    """Span of a symbol's bars with stored Predictions, and the model version that produced them.
+
+    ``first_date`` is the earliest bar the predictions were built from, ``last_date`` the last predicted date.
+    """
+    symbol = models.CharField(max_length=10, unique=True)
+    model_version = models.CharField(max_length=64)
+    first_date = models.DateField(null=True)
+    last_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.symbol} - {self.model_version} through {self.last_date}"
+
+class DataCoverage(models.Model):
+    """A span of trading days for which a symbol's daily bars have been ingested.
+
+    Spans of one symbol never overlap or touch; see utils/coverage.py.
+    """
+    symbol = models.CharField(max_length=10)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['symbol', 'start_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} - {self.start_date} to {self.end_date}"
+
 class BacktestResult(models.Model):
     symbol = models.CharField(max_length=10)
     start_date = models.DateField()
@@ -59,6 +91,7 @@ class CompanyOverview(models.Model):
     beta = models.FloatField(null=True, blank=True)
     fifty_two_week_high = models.FloatField()
     fifty_two_week_low = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.symbol} - {self.name}"
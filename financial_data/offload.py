@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # Pay for the matplotlib import once per worker rather than per chart.
+    from .utils.report_generation import _pyplot
+    _pyplot()
+
+
+def process_pool():
+    """The process-wide pool for CPU-bound work from async views; None when OFFLOAD_PROCESSES is 0."""
+    global _pool
+    workers = getattr(settings, 'OFFLOAD_PROCESSES', 2)
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(getattr(settings, 'OFFLOAD_START_METHOD', None))
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_cpu_bound(func, *args):
+    """Await ``func(*args)`` without blocking the event loop.
+
+    Runs in the offload process pool, so ``func`` and its arguments must be
+    picklable and it must not touch the database; with OFFLOAD_PROCESSES = 0
+    it runs in a worker thread instead. A pool whose worker died is replaced
+    on the next call.
+    """
+    pool = process_pool()
+    if pool is None:
+        return await sync_to_async(func, thread_sensitive=False)(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(func, *args))
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
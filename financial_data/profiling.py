@@ -0,0 +1,222 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME_RE = re.compile(r'^[\w.\-]+\.(prof|speedscope\.json)$')
+
+
+def profiles_dir():
+    path = getattr(settings, 'PROFILING_DIR', None) or os.path.join(tempfile.gettempdir(), 'stock_analyzer_profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def list_profiles():
+    directory = profiles_dir()
+    entries = []
+    for name in os.listdir(directory):
+        if not PROFILE_NAME_RE.match(name):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        entries.append({'name': name, 'size': stat.st_size, 'created': stat.st_mtime})
+    return sorted(entries, key=lambda entry: entry['created'], reverse=True)
+
+
+def profile_path(name):
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(profiles_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune():
+    keep = getattr(settings, 'PROFILING_MAX_FILES', 200)
+    for entry in list_profiles()[keep:]:
+        try:
+            os.remove(os.path.join(profiles_dir(), entry['name']))
+        except FileNotFoundError:
+            pass
+
+
+class SamplingProfiler:
+    """Low-overhead wall-clock sampler for one thread, exported as a speedscope profile."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.ended = time.perf_counter()
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+
+    def to_speedscope(self, name):
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.ended - self.started,
+                'samples': self.samples,
+                'weights': [self.interval] * len(self.samples),
+            }],
+            'name': name,
+            'exporter': 'financial_data.profiling',
+        }
+
+
+@contextmanager
+def capture(label, mode='cprofile'):
+    """Profile the enclosed block and store it under profiles_dir().
+
+    ``mode`` is 'cprofile' (deterministic, written as .prof for pstats) or
+    'sampling' (written as .speedscope.json). Yields a dict whose 'name' is set
+    once the profile has been written.
+    """
+    safe_label = re.sub(r'[^\w\-]+', '_', label).strip('_') or 'profile'
+    result = {'name': None}
+    stamp = time.strftime('%Y%m%dT%H%M%S')
+    base = f"{stamp}_{os.getpid()}_{threading.get_ident() % 100000}_{safe_label}"
+
+    if mode == 'sampling':
+        sampler = SamplingProfiler(threading.get_ident(), getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005))
+        sampler.start()
+        try:
+            yield result
+        finally:
+            sampler.stop()
+            name = f"{base}.speedscope.json"
+            with open(os.path.join(profiles_dir(), name), 'w') as f:
+                json.dump(sampler.to_speedscope(label), f)
+            result['name'] = name
+    else:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread.
+            yield result
+            return
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            name = f"{base}.prof"
+            profiler.dump_stats(os.path.join(profiles_dir(), name))
+            result['name'] = name
+    _prune()
+    logger.info("Stored %s profile %s", mode, result['name'])
+
+
+def _requested_mode(request):
+    token = getattr(settings, 'PROFILING_HEADER_TOKEN', None)
+    header = request.headers.get('X-Profile')
+    if token and header and header == token:
+        return request.headers.get('X-Profile-Mode', getattr(settings, 'PROFILING_MODE', 'cprofile'))
+
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+    prefixes = getattr(settings, 'PROFILING_PATHS', ())
+    if rate and request.path.startswith(tuple(prefixes)) and random.random() < rate:
+        # Sampled production traffic always uses the low-overhead sampler.
+        return 'sampling'
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles a request when it carries ``X-Profile: <PROFILING_HEADER_TOKEN>``,
+    or at random with probability PROFILING_SAMPLE_RATE for paths in PROFILING_PATHS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = _requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        with capture(f"{request.method}_{request.path}", mode) as result:
+            response = self.get_response(request)
+        if result['name']:
+            response['X-Profile-Id'] = result['name']
+        return response
+
+    async def __acall__(self, request):
+        mode = _requested_mode(request)
+        if mode is None:
+            return await self.get_response(request)
+
+        # Profiles the event loop thread, so requests served concurrently show up too.
+        with capture(f"{request.method}_{request.path}", mode) as result:
+            response = await self.get_response(request)
+        if result['name']:
+            response['X-Profile-Id'] = result['name']
+        return response
+
+
+_task_profiles = {}
+
+
+def task_prerun_handler(task_id=None, task=None, **kwargs):
+    names = getattr(settings, 'PROFILING_TASKS', ())
+    rate = getattr(settings, 'PROFILING_TASK_SAMPLE_RATE', 0.0)
+    if task is None or task.name not in names or random.random() >= rate:
+        return
+    ctx = capture(f"task_{task.name}", getattr(settings, 'PROFILING_MODE', 'cprofile'))
+    ctx.__enter__()
+    _task_profiles[task_id] = ctx
+
+
+def task_postrun_handler(task_id=None, **kwargs):
+    ctx = _task_profiles.pop(task_id, None)
+    if ctx is not None:
+        ctx.__exit__(None, None, None)
@@ -0,0 +1,108 @@
+import re
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+JOB_KEY = 'job_progress:{}'
+JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+FINISHED = ('done', 'failed')
+
+
+def _ttl():
+    return getattr(settings, 'JOB_PROGRESS_TTL', 3600)
+
+
+def read_progress(job_id):
+    """Latest progress state of ``job_id``, or None when nothing was published (yet)."""
+    return cache.get(JOB_KEY.format(job_id))
+
+
+async def aread_progress(job_id):
+    return await cache.aget(JOB_KEY.format(job_id))
+
+
+class JobProgress:
+    """Progress of one long-running job, published through the default cache.
+
+    Every update replaces the job's state and bumps ``seq``, so a stream in
+    any process can poll read_progress() and emit only what changed. The
+    cache must be shared between processes (CACHE_URL) for that to work
+    across workers; ``manage.py check --deploy`` warns when it is not.
+    """
+
+    def __init__(self, job_id, kind):
+        self.job_id = job_id
+        self.kind = kind
+        self.state = {'job_id': job_id, 'kind': kind, 'seq': 0, 'status': 'running', 'stage': None,
+                      'done': 0, 'total': None, 'message': None, 'result': None}
+        self._publish()
+
+    def _publish(self):
+        self.state['seq'] += 1
+        self.state['updated_at'] = time.time()
+        cache.set(JOB_KEY.format(self.job_id), dict(self.state), _ttl())
+
+    def stage(self, name, total=None):
+        self.state.update(stage=name, done=0, total=total)
+        self._publish()
+
+    def advance(self, done=None, message=None):
+        self.state['done'] = self.state['done'] + 1 if done is None else done
+        self.state['message'] = message
+        self._publish()
+
+    def finish(self, result=None):
+        self.state.update(status='done', result=result)
+        self._publish()
+
+    def fail(self, message):
+        self.state.update(status='failed', message=message)
+        self._publish()
+
+
+class _NoProgress:
+    """Stand-in for requests that did not ask for progress; every call is a no-op."""
+    job_id = None
+
+    def stage(self, name, total=None):
+        pass
+
+    def advance(self, done=None, message=None):
+        pass
+
+    def finish(self, result=None):
+        pass
+
+    def fail(self, message):
+        pass
+
+
+NO_PROGRESS = _NoProgress()
+
+
+def job_progress(job_id, kind):
+    """A JobProgress for a client-chosen ``job_id``, or NO_PROGRESS when there is none."""
+    if not job_id:
+        return NO_PROGRESS
+    if not JOB_ID_PATTERN.match(str(job_id)):
+        raise ValueError('job_id must be 8-64 letters, digits, "-" or "_"')
+    return JobProgress(str(job_id), kind)
+
+
+def track(items, progress):
+    """Yield ``items`` unchanged, advancing ``progress`` after each and finishing it at the end."""
+    done = 0
+    try:
+        for item in items:
+            yield item
+            done += 1
+            progress.advance(done)
+    except Exception as e:
+        progress.fail(str(e))
+        raise
+    progress.finish({'items': done})
+
+
+def request_job_id(request):
+    # Clients pick the id and subscribe to /api/jobs/<id>/events/ before sending the request.
+    return request.headers.get('X-Job-Id') or (request.data.get('job_id') if hasattr(request.data, 'get') else None)
@@ -0,0 +1,104 @@
+import decimal
+import orjson
+from rest_framework.renderers import BaseRenderer
+
+SHAPES = ('rows', 'columns')
+
+
+def _is_numpy(obj):
+    # Checked by module so that rendering plain data never imports numpy.
+    return type(obj).__module__ == 'numpy'
+
+
+def _default(obj):
+    # Everything orjson does not serialize natively.
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if _is_numpy(obj):
+        # Arrays become lists and scalars (np.generic) native Python numbers.
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """JSON bytes for ``data`` with the same type handling as ORJSONRenderer."""
+    return orjson.dumps(data, default=_default, option=ORJSONRenderer.options)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """application/json through orjson.
+
+    NumPy numeric arrays are written straight from their buffers, and dates,
+    datetimes and UUIDs natively; Decimals become floats like DRF's encoder.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=self.options)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """text/event-stream, so EventSource clients pass content negotiation.
+
+    Streaming views return their own StreamingHttpResponse; this only renders
+    error responses, as a single 'error' event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data)
+
+
+def sse_event(event, data, event_id=None):
+    """One Server-Sent Events frame with a JSON payload."""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {dumps(data).decode()}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def response_shape(request):
+    """The table layout asked for with ``?shape=`` ('rows', the default, or 'columns')."""
+    params = getattr(request, 'query_params', request.GET)  # DRF or plain Django request
+    shape = params.get('shape', 'rows')
+    if shape not in SHAPES:
+        raise ValueError(f"shape must be one of {', '.join(SHAPES)}")
+    return shape
+
+
+def _dates_as_objects(values):
+    # orjson writes datetime64 as full timestamps; date objects keep the YYYY-MM-DD form.
+    if _is_numpy(values) and values.dtype.kind == 'M':
+        return values.astype('datetime64[D]').tolist()
+    return values
+
+
+def _row_values(values):
+    if _is_numpy(values):
+        import numpy as np
+
+        if values.dtype.kind == 'f' and np.isnan(values).any():
+            return np.where(np.isnan(values), None, values).tolist()
+        return values.tolist()
+    return list(values)
+
+
+def shape_table(columns, shape='rows'):
+    """A table given as ``{name: array}``, laid out as column arrays or as one dict per row.
+
+    Column arrays are handed to the renderer as they are (NaN renders as null).
+    """
+    if shape == 'columns':
+        return {name: _dates_as_objects(values) for name, values in columns.items()}
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(_row_values(values) for values in columns.values()))]
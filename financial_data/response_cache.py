@@ -0,0 +1,166 @@
+import hashlib
+import zlib
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+from .instrumentation import REGISTRY, Counter
+from .utils.data_version import symbol_version
+
+RESPONSE_CACHE = REGISTRY.register(Counter(
+    'financial_data_response_cache_total', 'Cached GET lookups by view and result (hit, miss, not_modified)',
+    ['view', 'result']
+))
+
+
+@REGISTRY.register_collector
+def _hit_ratio():
+    total = RESPONSE_CACHE.total()
+    hits = total - RESPONSE_CACHE.total(result='miss')
+    return [('financial_data_response_cache_hit_ratio', 'gauge',
+             'Share of cached GET lookups served without running the view', hits / total if total else 0.0)]
+
+
+def _store():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'responses')]
+
+
+def _if_none_match(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return header.strip() == '*' or etag in (tag.strip() for tag in header.split(','))
+
+
+def cache_key(view, request, version=''):
+    raw = '|'.join([view, request.path, request.GET.urlencode(), request.META.get('HTTP_ACCEPT', ''), version])
+    return 'response:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def cached_response(view, request, entry):
+    """The response for a stored ``entry`` (a 304 when If-None-Match matches), or None on a miss."""
+    if entry is None:
+        RESPONSE_CACHE.inc(view=view, result='miss')
+        return None
+    etag, content_type, compressed = entry
+    if _if_none_match(request, etag):
+        RESPONSE_CACHE.inc(view=view, result='not_modified')
+        response = HttpResponseNotModified()
+    else:
+        RESPONSE_CACHE.inc(view=view, result='hit')
+        response = HttpResponse(zlib.decompress(compressed), content_type=content_type)
+    response['ETag'] = etag
+    response['X-Cache'] = 'hit'
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def cache_entry(response):
+    """``(etag, content_type, compressed)`` to store for a rendered response, or None if it is too large."""
+    content = response.content
+    if len(content) > getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 1 << 20):
+        return None
+    return quote_etag(hashlib.sha1(content).hexdigest()), response['Content-Type'], zlib.compress(content, 6)
+
+
+def tagged_response(request, response, etag):
+    """Tag a freshly stored response with its ETag; a matching If-None-Match gets a 304 instead."""
+    response['ETag'] = etag
+    response['X-Cache'] = 'miss'
+    if _if_none_match(request, etag):
+        not_modified = HttpResponseNotModified()
+        not_modified['ETag'] = etag
+        return not_modified
+    return response
+
+
+def cache_timeout(timeout=None):
+    return timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+
+async def acached_response(view, request, get_response, timeout=None):
+    """CachedResponseMixin for an async view, keyed by time only (no data version).
+
+    ``view`` names the cache entries and metrics, so an async view shares them
+    with the APIView it replaces; ``get_response()`` is awaited on a miss.
+    """
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return await get_response()
+    store = _store()
+    key = cache_key(view, request)
+    hit = cached_response(view, request, await store.aget(key))
+    if hit is not None:
+        return hit
+
+    response = await get_response()
+    if response.status_code != 200:
+        return response
+    entry = cache_entry(response)
+    if entry is None:
+        return response
+    await store.aset(key, entry, cache_timeout(timeout))
+    return tagged_response(request, response, entry[0])
+
+
+class CachedResponseMixin:
+    """Serve repeated GETs of an APIView from a compressed response cache.
+
+    The key covers the view, path, query string, Accept header and, when
+    ``cache_versioned``, the symbol_version() of each symbol from cache_symbol(),
+    so any price or prediction write for those symbols makes old entries
+    unreachable. Eviction is left to the cache backend (LRU with MAX_ENTRIES for
+    RESPONSE_CACHE_ALIAS).
+    Only 200 DRF responses are stored; every cached response carries an ETag and
+    a matching If-None-Match gets a 304.
+
+    Hits are answered before authentication and the key ignores the user, so
+    only use it on views whose responses are the same for everyone.
+    """
+    cache_timeout = None  # seconds; None uses RESPONSE_CACHE_TTL
+    cache_versioned = True
+
+    def cache_request(self, request):
+        """Whether this GET may be served from / stored in the cache."""
+        return True
+
+    def cache_symbol(self, request, *args, **kwargs):
+        """The symbol (or list of symbols) whose data the response depends on."""
+        return kwargs.get('symbol') or request.GET.get('symbol')
+
+    def _cache_key(self, request, version):
+        return cache_key(type(self).__name__, request, version)
+
+    def _version(self, request, *args, **kwargs):
+        if not self.cache_versioned:
+            return ''
+        symbols = self.cache_symbol(request, *args, **kwargs)
+        if not symbols:
+            return ''
+        if isinstance(symbols, str):
+            return symbol_version(symbols)
+        return ','.join(symbol_version(symbol) for symbol in symbols)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or not getattr(settings, 'RESPONSE_CACHE_ENABLED', True) \
+                or not self.cache_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        view = type(self).__name__
+        store = _store()
+        key = self._cache_key(request, self._version(request, *args, **kwargs))
+        hit = cached_response(view, request, store.get(key))
+        if hit is not None:
+            return hit
+
+        response = super().dispatch(request, *args, **kwargs)
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response
+
+        response.render()
+        entry = cache_entry(response)
+        if entry is None:
+            return response
+        # The view may itself have written (e.g. appended predictions); store under the version it left behind.
+        key = self._cache_key(request, self._version(request, *args, **kwargs))
+        store.set(key, entry, cache_timeout(self.cache_timeout))
+        return tagged_response(request, response, entry[0])
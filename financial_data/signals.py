@@ -1,15 +1,32 @@
+from django.conf import settings
 from django.db.models.signals import post_save, post_migrate
 from django.dispatch import receiver
-from .models import StockData
+from celery.signals import task_prerun, task_postrun
+from .models import StockData, Prediction
 from .tasks import update_stock_data
 from .utils.alpha_vantage_api import setup_alpha_vantage_api
+from .utils.data_version import bump_data_version
+from .profiling import task_prerun_handler, task_postrun_handler
+from . import db_router
+
+task_prerun.connect(task_prerun_handler, weak=False)
+task_postrun.connect(task_postrun_handler, weak=False)
+task_prerun.connect(db_router.task_prerun_handler, weak=False)
 
 @receiver(post_save, sender=StockData)
 def trigger_stock_data_update(sender, instance, created, **kwargs):
     if created:
         update_stock_data.delay(instance.symbol)
 
+@receiver(post_save, sender=StockData)
+@receiver(post_save, sender=Prediction)
+def invalidate_symbol_version(sender, instance, **kwargs):
+    # Single-row edits that keep the count and latest date would otherwise go unnoticed.
+    # Bulk writes and deletes change the row stats or the prediction cursor instead; no
+    # post_delete receiver, so queryset deletes stay a single DELETE.
+    bump_data_version(instance.symbol)
+
 @receiver(post_migrate)
 def run_post_migrate_tasks(sender, **kwargs):
-    if sender.name == 'financial_data':
+    if sender.name == 'financial_data' and getattr(settings, 'ALPHA_VANTAGE_CHECK_ON_MIGRATE', False):
         setup_alpha_vantage_api()
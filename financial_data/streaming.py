@@ -0,0 +1,305 @@
+import asyncio
+import collections
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .instrumentation import REGISTRY, Counter
+from .progress import FINISHED, aread_progress, read_progress
+from .renderers import shape_table, sse_event
+from .utils.alpha_vantage_api import get_intraday_data, intraday_columns, quota_error
+
+logger = logging.getLogger(__name__)
+
+FEED_KEY = 'intraday_feed:{}'
+
+STREAM_POLLS = REGISTRY.register(Counter(
+    'financial_data_stream_upstream_polls_total', 'Intraday polls made on behalf of streaming subscribers'
+))
+STREAM_EVENTS = REGISTRY.register(Counter(
+    'financial_data_stream_events_total', 'Events queued for streaming subscribers', ['event']
+))
+STREAM_DROPPED = REGISTRY.register(Counter(
+    'financial_data_stream_dropped_total', 'Events dropped because a subscriber fell behind'
+))
+
+
+class Subscription:
+    """A subscriber's bounded event queue; the oldest events are dropped when it falls behind."""
+
+    def __init__(self, channel, topic, maxsize):
+        self.channel = channel
+        self.topic = topic
+        self._queue = queue.Queue(maxsize)
+        self.closed = False
+
+    def put(self, frame):
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    STREAM_DROPPED.inc()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next frame, or None after ``timeout`` seconds without one."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.channel.unsubscribe(self)
+
+
+class Channel:
+    """In-process fan-out: every frame published to a topic is queued for each of its subscribers."""
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'STREAM_QUEUE_SIZE', 100)
+        self._topics = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self.on_empty = None  # called with the topic when its last subscriber leaves
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic, self.queue_size)
+        with self._lock:
+            self._topics[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            emptied = not subscribers
+            if emptied:
+                del self._topics[subscription.topic]
+        if emptied and self.on_empty is not None:
+            self.on_empty(subscription.topic)
+
+    def publish(self, topic, frame, event='message'):
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            subscription.put(frame)
+        STREAM_EVENTS.inc(len(subscribers), event=event)
+        return len(subscribers)
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+
+def fetch_intraday_bars(symbol):
+    """Intraday bars for ``symbol`` as row dicts, oldest first.
+
+    The payload is shared through the cache for STREAM_INTRADAY_INTERVAL, so
+    hubs in other processes reuse one upstream call per interval (given a
+    shared default cache, see CACHE_URL).
+    """
+    key = FEED_KEY.format(symbol)
+    payload = cache.get(key)
+    if payload is None:
+        payload = get_intraday_data(symbol)
+        quota = quota_error(payload, f"intraday data for {symbol}")
+        if quota is not None:
+            raise quota
+        cache.set(key, payload, getattr(settings, 'STREAM_INTRADAY_INTERVAL', 60))
+    shaped = intraday_columns(payload)
+    if 'columns' not in shaped:
+        raise ValueError(f"No intraday series for {symbol}: {payload}")
+    return shape_table(shaped['columns'])
+
+
+class IntradayHub:
+    """One upstream poller per symbol, fanning new intraday bars out to every subscriber.
+
+    The poller thread starts with a symbol's first subscriber and stops when the
+    last one leaves. New subscribers get the recent bars as a snapshot, so they
+    do not have to wait for the next poll.
+    """
+
+    def __init__(self, fetch=None, interval=None, backlog=100):
+        self.fetch = fetch or fetch_intraday_bars
+        self._interval = interval
+        self.channel = Channel()
+        self.channel.on_empty = self._stop
+        self._recent = {}
+        self._pollers = {}
+        self._lock = threading.Lock()
+        self.backlog = backlog
+        self.polls = collections.Counter()
+
+    @property
+    def interval(self):
+        return self._interval if self._interval is not None else getattr(settings, 'STREAM_INTRADAY_INTERVAL', 60)
+
+    def subscribe(self, symbol, last_event_id=None):
+        symbol = symbol.upper()
+        subscription = self.channel.subscribe(symbol)
+        with self._lock:
+            recent = [bar for bar in self._recent.get(symbol, ())
+                      if last_event_id is None or bar['timestamp'] > last_event_id]
+            poller = self._pollers.get(symbol)
+            if poller is None or poller[1].is_set():
+                stop = threading.Event()
+                thread = threading.Thread(target=self._poll, args=(symbol, stop), name=f'intraday-{symbol}',
+                                          daemon=True)
+                self._pollers[symbol] = (thread, stop)
+                thread.start()
+        if recent:
+            subscription.put(sse_event('bars', {'symbol': symbol, 'bars': recent}, recent[-1]['timestamp']))
+        return subscription
+
+    def subscriber_count(self, symbol=None):
+        return self.channel.subscriber_count(symbol.upper() if symbol else None)
+
+    def _stop(self, symbol):
+        with self._lock:
+            if self.channel.subscriber_count(symbol):
+                return  # someone subscribed again in between
+            poller = self._pollers.pop(symbol, None)
+            self._recent.pop(symbol, None)
+        if poller is not None:
+            poller[1].set()
+
+    def _poll(self, symbol, stop):
+        last_seen = None
+        while not stop.is_set():
+            try:
+                self.polls[symbol] += 1
+                STREAM_POLLS.inc()
+                bars = [bar for bar in self.fetch(symbol) if last_seen is None or bar['timestamp'] > last_seen]
+            except Exception as e:
+                logger.warning("Intraday poll for %s failed: %s", symbol, e)
+                bars = []
+            if bars and not stop.is_set():
+                last_seen = bars[-1]['timestamp']
+                with self._lock:
+                    recent = self._recent.setdefault(symbol, collections.deque(maxlen=self.backlog))
+                    recent.extend(bars)
+                self.channel.publish(symbol, sse_event('bars', {'symbol': symbol, 'bars': bars}, last_seen), 'bars')
+            stop.wait(self.interval)
+
+
+hub = IntradayHub()
+
+
+@REGISTRY.register_collector
+def _subscribers():
+    return [('financial_data_stream_subscribers', 'gauge', 'Open intraday stream subscriptions in this process',
+             hub.subscriber_count())]
+
+
+def _retry_frame():
+    # Reconnect delay for EventSource clients; they resend Last-Event-ID.
+    return f"retry: {int(getattr(settings, 'STREAM_RETRY_MS', 3000))}\n\n".encode()
+
+
+def _stream_seconds():
+    return getattr(settings, 'STREAM_HEARTBEAT_SECONDS', 15), getattr(settings, 'STREAM_MAX_SECONDS', 300)
+
+
+def _poll_seconds():
+    return getattr(settings, 'STREAM_JOB_POLL_SECONDS', 0.5)
+
+
+def intraday_stream(symbol, last_event_id=None, source=None):
+    """SSE frames of new bars for ``symbol`` with keep-alive comments, ending after STREAM_MAX_SECONDS.
+
+    Subscribes to ``source`` (the process-wide hub by default) on the first
+    iteration and unsubscribes when the server closes the stream, which is
+    also what happens when the client disconnects.
+    """
+    heartbeat, max_seconds = _stream_seconds()
+    subscription = (source or hub).subscribe(symbol, last_event_id)
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield _retry_frame()
+        while time.monotonic() < deadline:
+            frame = subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            yield frame if frame is not None else b': keep-alive\n\n'
+    finally:
+        subscription.close()
+
+
+def job_stream(job_id):
+    """SSE 'progress' frames for ``job_id`` as its state changes, until it finishes.
+
+    Polls the shared progress state every STREAM_JOB_POLL_SECONDS; the job does
+    not have to exist yet when the stream opens.
+    """
+    heartbeat, max_seconds = _stream_seconds()
+    poll = _poll_seconds()
+    deadline = time.monotonic() + max_seconds
+    last_seq, last_sent = None, time.monotonic()
+    yield _retry_frame()
+    while time.monotonic() < deadline:
+        state = read_progress(job_id)
+        if state is not None and state['seq'] != last_seq:
+            last_seq, last_sent = state['seq'], time.monotonic()
+            yield sse_event('progress', state, state['seq'])
+            if state['status'] in FINISHED:
+                return
+        elif time.monotonic() - last_sent >= heartbeat:
+            last_sent = time.monotonic()
+            yield b': keep-alive\n\n'
+        time.sleep(poll)
+
+
+# Async variants for ASGI: Django reads a synchronous iterator to the end before sending any
+# of it there, and a thread parked per open stream is what ASGI is meant to avoid.
+
+async def aintraday_stream(symbol, last_event_id=None, source=None):
+    """intraday_stream() as an async iterator; the subscription queue is polled every STREAM_JOB_POLL_SECONDS."""
+    heartbeat, max_seconds = _stream_seconds()
+    poll = _poll_seconds()
+    subscription = (source or hub).subscribe(symbol, last_event_id)
+    deadline = time.monotonic() + max_seconds
+    last_sent = time.monotonic()
+    try:
+        yield _retry_frame()
+        while time.monotonic() < deadline:
+            frame = subscription.get(timeout=0)
+            if frame is not None:
+                last_sent = time.monotonic()
+                yield frame
+                continue
+            if time.monotonic() - last_sent >= heartbeat:
+                last_sent = time.monotonic()
+                yield b': keep-alive\n\n'
+            await asyncio.sleep(poll)
+    finally:
+        subscription.close()
+
+
+async def ajob_stream(job_id):
+    """job_stream() as an async iterator."""
+    heartbeat, max_seconds = _stream_seconds()
+    poll = _poll_seconds()
+    deadline = time.monotonic() + max_seconds
+    last_seq, last_sent = None, time.monotonic()
+    yield _retry_frame()
+    while time.monotonic() < deadline:
+        state = await aread_progress(job_id)
+        if state is not None and state['seq'] != last_seq:
+            last_seq, last_sent = state['seq'], time.monotonic()
+            yield sse_event('progress', state, state['seq'])
+            if state['status'] in FINISHED:
+                return
+        elif time.monotonic() - last_sent >= heartbeat:
+            last_sent = time.monotonic()
+            yield b': keep-alive\n\n'
+        await asyncio.sleep(poll)
@@ -1,45 +1,152 @@
-from celery import shared_task
+from celery import group, shared_task
 from datetime import date, timedelta
-from .utils.alpha_vantage_api import fetch_stock_data, get_company_overview
-from .models import CompanyOverview
+from django.conf import settings
+from django.core.cache import cache
+import math
+import random
+from .models import DataCoverage, StockData
+from .utils.alpha_vantage_api import (
+    QUOTA_KEY, QuotaExceeded, ensure_stock_data, get_company_overview, shared_session,
+)
+from .utils.company_overview import store_company_overview
+from .utils.coverage import missing_spans
+from .utils.rate_limiter import DAY, MINUTE, remaining, seconds_until_reset
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def update_stock_data(self, symbol):
+HISTORY_DAYS = 730  # 2 years of data
+
+
+def backoff(retries):
+    """Seconds before retry number ``retries + 1``: doubling from TASK_RETRY_BACKOFF, capped, with jitter."""
+    ceiling = min(getattr(settings, 'TASK_RETRY_BACKOFF_MAX', 3600),
+                  getattr(settings, 'TASK_RETRY_BACKOFF', 30) * 2 ** retries)
+    # Half fixed, half random, so retries of a failed batch do not hit the API together.
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def retry_delay(task, exc):
+    # A quota refusal says exactly when the window reopens; retrying earlier only burns calls.
+    if isinstance(exc, QuotaExceeded):
+        return exc.retry_after
+    return backoff(task.request.retries)
+
+
+def _history_range():
     end_date = date.today()
-    start_date = end_date - timedelta(days=730)  # 2 years of data
+    return end_date - timedelta(days=HISTORY_DAYS), end_date
+
+
+@shared_task(bind=True, max_retries=5)
+def update_stock_data(self, symbol):
+    start_date, end_date = _history_range()
     try:
-        fetch_stock_data(symbol, start_date, end_date)
-        logger.info(f"Successfully updated stock data for {symbol}")
+        # Only the sessions since the last ingest are fetched, usually through a compact request.
+        ensure_stock_data(symbol, start_date, end_date)
+        logger.info("Successfully updated stock data for %s", symbol)
     except Exception as e:
-        logger.error(f"Error updating stock data for {symbol}: {e}")
-        raise self.retry(exc=e)
+        logger.error("Error updating stock data for %s: %s", symbol, e)
+        raise self.retry(exc=e, countdown=retry_delay(self, e))
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+@shared_task(bind=True, max_retries=5)
 def update_company_overview(self, symbol):
     try:
         overview = get_company_overview(symbol)
-        CompanyOverview.objects.update_or_create(
-            symbol=symbol,
-            defaults={
-                'name': overview.get('Name'),
-                'description': overview.get('Description'),
-                'exchange': overview.get('Exchange'),
-                'currency': overview.get('Currency'),
-                'country': overview.get('Country'),
-                'sector': overview.get('Sector'),
-                'industry': overview.get('Industry'),
-                'market_capitalization': int(overview.get('MarketCapitalization', 0)),
-                'pe_ratio': float(overview.get('PERatio', 0)) or None,
-                'dividend_yield': float(overview.get('DividendYield', 0)) or None,
-                'beta': float(overview.get('Beta', 0)) or None,
-                'fifty_two_week_high': float(overview.get('52WeekHigh', 0)),
-                'fifty_two_week_low': float(overview.get('52WeekLow', 0)),
-            }
-        )
-        logger.info(f"Successfully updated company overview for {symbol}")
+        if store_company_overview(symbol, overview) is None:
+            logger.warning("Alpha Vantage has no company overview for %s", symbol)
+            return
+        logger.info("Successfully updated company overview for %s", symbol)
     except Exception as e:
-        logger.error(f"Error updating company overview for {symbol}: {e}")
-        raise self.retry(exc=e)
+        logger.error("Error updating company overview for %s: %s", symbol, e)
+        raise self.retry(exc=e, countdown=retry_delay(self, e))
+
+@shared_task(bind=True, max_retries=5)
+def refresh_symbols(self, symbols):
+    """Bring a chunk of symbols up to date over one HTTP session and one DB connection.
+
+    Calls are paced to ALPHA_VANTAGE_CALLS_PER_MINUTE: once the minute's calls
+    are spent, the symbols not yet refreshed are retried when the window
+    reopens, as they are after a quota refusal. Other failures are reported
+    per symbol without failing the chunk.
+    """
+    start_date, end_date = _history_range()
+    calls_per_minute = getattr(settings, 'ALPHA_VANTAGE_CALLS_PER_MINUTE', 5)
+    refreshed, failed = {}, {}
+    with shared_session():
+        for position, symbol in enumerate(symbols):
+            if not remaining(QUOTA_KEY, calls_per_minute, MINUTE):
+                countdown = seconds_until_reset(MINUTE)
+                logger.info("Minute quota spent after %s of %s symbols; continuing in %ss",
+                            position, len(symbols), countdown)
+                # Pacing, not a failure: a window wait can never exhaust max_retries.
+                raise self.retry(args=[symbols[position:]], countdown=countdown,
+                                 max_retries=self.request.retries + 1)
+            try:
+                refreshed[symbol] = ensure_stock_data(symbol, start_date, end_date)
+            except QuotaExceeded as e:
+                logger.warning("Quota reached after %s of %s symbols; retrying the rest in %ss",
+                               position, len(symbols), e.retry_after)
+                raise self.retry(args=[symbols[position:]], exc=e, countdown=e.retry_after)
+            except ValueError as e:
+                logger.error("Error refreshing %s: %s", symbol, e)
+                failed[symbol] = str(e)
+    return {'refreshed': refreshed, 'failed': failed}
+
+
+def plan_refresh(symbols, chunk_size=None):
+    """Split the stale ``symbols`` into chunks that fit today's remaining API budget.
+
+    Each stale symbol costs one call. Returns ``(chunks, countdowns, deferred)``:
+    countdowns space the chunks so they stay under ALPHA_VANTAGE_CALLS_PER_MINUTE,
+    and ``deferred`` lists stale symbols left for the next run.
+    """
+    chunk_size = chunk_size or getattr(settings, 'INGEST_CHUNK_SIZE', 25)
+    start_date, end_date = _history_range()
+    stale = [symbol for symbol in symbols if missing_spans(symbol, start_date, end_date)]
+    budget = remaining(QUOTA_KEY, getattr(settings, 'ALPHA_VANTAGE_DAILY_LIMIT', 500), DAY)
+    budget = max(budget - getattr(settings, 'ALPHA_VANTAGE_INTERACTIVE_RESERVE', 50), 0)
+    scheduled, deferred = stale[:budget], stale[budget:]
+    chunks = [scheduled[i:i + chunk_size] for i in range(0, len(scheduled), chunk_size)]
+    spacing = math.ceil(60 * chunk_size / getattr(settings, 'ALPHA_VANTAGE_CALLS_PER_MINUTE', 5))
+    return chunks, [i * spacing for i in range(len(chunks))], deferred
+
+
+@shared_task
+def refresh_universe(symbols=None, chunk_size=None):
+    """Refresh every tracked symbol (or ``symbols``) as a group of chunked bulk tasks.
+
+    Returns the saved group id (restore it with GroupResult.restore) and what
+    was deferred for lack of quota.
+    """
+    if symbols is None:
+        symbols = sorted(set(StockData.objects.values_list('symbol', flat=True).distinct())
+                         | set(DataCoverage.objects.values_list('symbol', flat=True).distinct()))
+    chunks, countdowns, deferred = plan_refresh(symbols, chunk_size)
+    if deferred:
+        logger.warning("Deferring %s stale symbols to the next run: daily quota is spent", len(deferred))
+    if not chunks:
+        return {'group_id': None, 'chunks': 0, 'deferred': deferred}
+    result = group(
+        refresh_symbols.s(chunk).set(countdown=countdown)
+        for chunk, countdown in zip(chunks, countdowns)
+    ).apply_async()
+    result.save()
+    logger.info("Queued %s refresh chunks (%s symbols)", len(chunks), sum(map(len, chunks)))
+    return {'group_id': result.id, 'chunks': len(chunks), 'deferred': deferred}
+
+@shared_task
+def refresh_shared_prices():
+    from .utils.shared_prices import REFRESH_PENDING_KEY, pinned_symbols, publish_hot_symbols
+
+    # Ingests from here on schedule another rebuild; this one may not see their rows.
+    cache.delete(REFRESH_PENDING_KEY)
+    pinned = pinned_symbols()
+    segment = publish_hot_symbols(pinned, pinned=pinned is not None)
+    logger.info("Refreshed shared price segment %s", segment)
+
+@shared_task
+def train_models(symbols=None):
+    from .utils.batch_training import train_symbols
+
+    return train_symbols(symbols)
@@ -0,0 +1,57 @@
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+from django.test import TestCase, override_settings
+from financial_data.models import StockData, Prediction, BacktestResult
+from financial_data.utils.backtesting import backtest_strategy
+from financial_data.utils.features import get_pipeline
+from financial_data.utils.coverage import record_coverage
+
+
+class AnalysisPipelineTestCase(TestCase):
+    def setUp(self):
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        rng = np.random.default_rng(5)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        StockData.objects.bulk_create([
+            StockData(symbol='AAPL', date=date(2020, 1, 1) + timedelta(days=i), open_price=c, high_price=c,
+                      low_price=c, close_price=round(float(c), 4), volume=1000000)
+            for i, c in enumerate(closes)
+        ])
+        # Everything the provider has for 2020 is already ingested.
+        record_coverage('AAPL', date(2020, 1, 1), date(2020, 12, 31))
+        self.params = {
+            'symbol': 'AAPL', 'start_date': '2020-01-01', 'end_date': '2020-12-31',
+            'initial_investment': 10000, 'short_window': 20, 'long_window': 50,
+        }
+
+    def test_analysis_matches_separate_endpoints(self):
+        response = self.client.post('/api/analysis/', {**self.params, 'include_chart': 'false'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        expected = backtest_strategy({
+            **self.params,
+            'start_date': date(2020, 1, 1), 'end_date': date(2020, 12, 31),
+        })
+        for key in ('final_value', 'total_return', 'max_drawdown', 'num_trades'):
+            self.assertAlmostEqual(body['backtest'][key], expected[key])
+        self.assertGreater(body['backtest']['num_trades'], 0)
+
+        # The first prediction needs a full feature window of history.
+        self.assertEqual(body['prediction']['count'], 300 - get_pipeline().window)
+        self.assertEqual(Prediction.objects.filter(symbol='AAPL').count(), body['prediction']['count'])
+        self.assertEqual(BacktestResult.objects.count(), 2)
+        self.assertIsNone(body['chart_image'])
+        self.assertTrue(body['report_url'].endswith(f"?backtest_id={body['backtest']['backtest_id']}"))
+        self.assertEqual(set(body['timings_ms']), {'load', 'backtest', 'predict', 'compare', 'total'})
+
+    def test_missing_parameter(self):
+        response = self.client.post('/api/analysis/', {'symbol': 'AAPL'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,132 @@
+import json
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from financial_data import async_views
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.instrumentation import ServerTimingMiddleware
+from financial_data.models import CompanyOverview
+from financial_data.offload import run_cpu_bound
+from financial_data.streaming import FEED_KEY, IntradayHub, aintraday_stream
+from financial_data.utils.alpha_vantage_api import LIMIT_REACHED_KEY
+from financial_data.utils.alpha_vantage_async import aclose_client
+
+
+class AsyncViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['responses'].clear()
+        self.factory = AsyncRequestFactory()
+
+    async def asyncTearDown(self):
+        await aclose_client()
+
+    async def test_intraday_payload_is_shared_through_the_cache(self):
+        with AlphaVantageSimulator(seed=1) as simulator, override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            rows = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+            columns = await async_views.intraday_data(
+                self.factory.get('/api/intraday-data/SIM/', {'shape': 'columns'}), symbol='SIM')
+            bad = await async_views.intraday_data(
+                self.factory.get('/api/intraday-data/SIM/', {'shape': 'grid'}), symbol='SIM')
+
+        self.assertEqual(simulator.counts, {'TIME_SERIES_INTRADAY': 1})
+        series = next(value for key, value in json.loads(rows.content).items() if key.startswith('Time Series'))
+        body = json.loads(columns.content)['columns']
+        self.assertEqual(body['timestamp'], sorted(series))
+        self.assertEqual(body['close'][-1], float(series[max(series)]['4. close']))
+        self.assertEqual(bad.status_code, 400)
+
+    async def test_intraday_responses_are_cached_with_etags(self):
+        with AlphaVantageSimulator(seed=1) as simulator, override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            first = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+            await cache.aclear()
+            second = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+            revalidated = await async_views.intraday_data(
+                self.factory.get('/api/intraday-data/SIM/', headers={'If-None-Match': first['ETag']}), symbol='SIM')
+
+        self.assertEqual(simulator.counts, {'TIME_SERIES_INTRADAY': 1})
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('miss', 'hit'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], first['ETag'])
+
+    async def test_daily_limit_short_circuits_upstream_calls(self):
+        await cache.aset(LIMIT_REACHED_KEY, True)
+        with AlphaVantageSimulator(seed=1) as simulator, override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            response = await async_views.intraday_data(self.factory.get('/api/intraday-data/LIMIT/'), symbol='LIMIT')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('limit', json.loads(response.content)['error'])
+        self.assertEqual(simulator.counts, {})
+
+    async def test_rate_limit_notes_reach_neither_cache(self):
+        with AlphaVantageSimulator(note_rate=1.0, seed=1) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            first = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+            second = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+
+        self.assertEqual((first.status_code, second.status_code), (429, 429))
+        self.assertTrue(int(first['Retry-After']) > 0)
+        self.assertIsNone(await cache.aget(FEED_KEY.format('SIM')))
+        self.assertEqual(simulator.counts, {'note': 2})
+
+    async def test_company_overview_reads_through_to_the_table(self):
+        with AlphaVantageSimulator(seed=1) as simulator, override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            first = await async_views.company_overview(self.factory.get('/api/company-overview/SIM/'), symbol='sim')
+            await cache.aclear()
+            second = await async_views.company_overview(self.factory.get('/api/company-overview/SIM/'), symbol='SIM')
+            unknown = await async_views.company_overview(
+                self.factory.get('/api/company-overview/UNKNOWN1/'), symbol='UNKNOWN1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(json.loads(first.content), json.loads(second.content))
+        self.assertEqual(json.loads(first.content)['symbol'], 'SIM')
+        self.assertTrue(await CompanyOverview.objects.filter(symbol='SIM').aexists())
+        self.assertEqual(unknown.status_code, 404)
+        self.assertEqual(simulator.counts, {'OVERVIEW': 2})
+
+    async def test_upstream_timeout_is_a_504(self):
+        with AlphaVantageSimulator(latency_ms=500) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url, ALPHA_VANTAGE_TIMEOUT=0.05):
+            response = await async_views.intraday_data(self.factory.get('/api/intraday-data/SIM/'), symbol='SIM')
+        self.assertEqual(response.status_code, 504)
+
+
+class StubFeed:
+    def __call__(self, symbol):
+        return [{'timestamp': '2024-01-02 10:00:00', 'close': 100.0}]
+
+
+class AsyncStreamingTestCase(SimpleTestCase):
+    @override_settings(STREAM_HEARTBEAT_SECONDS=0.05, STREAM_MAX_SECONDS=5, STREAM_JOB_POLL_SECONDS=0.01)
+    async def test_stream_yields_bars_and_unsubscribes(self):
+        hub = IntradayHub(fetch=StubFeed(), interval=10)
+        stream = aintraday_stream('SIM', source=hub)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        frame = await anext(stream)
+        self.assertIn(b'event: bars', frame)
+        self.assertEqual(await anext(stream), b': keep-alive\n\n')
+        self.assertEqual(hub.subscriber_count('SIM'), 1)
+        await stream.aclose()
+        self.assertEqual(hub.subscriber_count(), 0)
+
+
+class AsyncMiddlewareTestCase(SimpleTestCase):
+    async def test_server_timing_stays_async(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        middleware = ServerTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get('/', headers={'X-Server-Timing': '1'}))
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+
+class OffloadTestCase(SimpleTestCase):
+    @override_settings(OFFLOAD_PROCESSES=1)
+    async def test_runs_in_process_pool(self):
+        self.assertEqual(await run_cpu_bound(pow, 2, 10), 1024)
+
+    @override_settings(OFFLOAD_PROCESSES=0)
+    async def test_runs_on_thread_without_processes(self):
+        self.assertEqual(await run_cpu_bound(sorted, [3, 1, 2]), [1, 2, 3])
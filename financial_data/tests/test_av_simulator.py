@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+import requests
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.loadtest import parse_mix, percentile, summarize
+from financial_data.models import StockData
+from financial_data.utils.alpha_vantage_api import fetch_stock_data, get_company_overview
+
+
+class AlphaVantageSimulatorTestCase(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_synthesized_responses_feed_the_client(self):
+        with AlphaVantageSimulator(days=300, seed=1) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            end = date.today()
+            fetch_stock_data('SIM', end - timedelta(days=60), end)
+            overview = get_company_overview('SIM')
+            self.assertEqual(get_company_overview('SIM'), overview)
+            self.assertEqual(get_company_overview('UNKNOWNCO'), {})
+            intraday = requests.get(simulator.url, params={'function': 'TIME_SERIES_INTRADAY', 'symbol': 'SIM'}).json()
+
+        self.assertTrue(38 <= StockData.objects.filter(symbol='SIM').count() <= 44)
+        self.assertEqual(overview['Symbol'], 'SIM')
+        self.assertEqual(len(intraday['Time Series (5min)']), 100)
+        self.assertEqual(simulator.counts['OVERVIEW'], 3)
+
+    def test_fault_injection(self):
+        with AlphaVantageSimulator(information_rate=1.0) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            with self.assertRaises(ValueError):
+                fetch_stock_data('SIM', date(2024, 1, 1), date(2024, 2, 1))
+        self.assertTrue(cache.get('api_limit_reached'))
+
+        simulator = AlphaVantageSimulator(error_rate=0.5, note_rate=0.5, seed=7)
+        statuses = {simulator.respond({'function': ['OVERVIEW'], 'symbol': ['X']})[0] for _ in range(50)}
+        self.assertEqual(statuses, {200, 500})
+        self.assertEqual(simulator.counts['error'] + simulator.counts['note'], 50)
+
+
+class LoadTestSummaryTestCase(TestCase):
+    def test_summary_percentiles(self):
+        samples = [('predict', i / 1000, i != 100) for i in range(1, 101)] + [('backtest', 0.5, True)]
+        summary = summarize(samples, elapsed=10.0)
+        self.assertEqual(summary['predict']['requests'], 100)
+        self.assertEqual(summary['predict']['errors'], 1)
+        self.assertAlmostEqual(summary['predict']['p50_ms'], 50.5)
+        self.assertAlmostEqual(summary['all']['rps'], 10.1)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('backtest=3,overview=1'), {'backtest': 3.0, 'overview': 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix('screener=1')
@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from financial_data.models import StockData, BacktestResult
+from financial_data.utils import batch_reports
+from financial_data.utils.batch_reports import load_report_jobs, render_reports, stream_zip, write_reports
+
+
+class BatchReportTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        rows = []
+        for symbol in ('AAA', 'BBB'):
+            closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 120)))
+            rows += [
+                StockData(symbol=symbol, date=date(2022, 1, 1) + timedelta(days=i), open_price=c, high_price=c,
+                          low_price=c, close_price=round(float(c), 4), volume=1000)
+                for i, c in enumerate(closes)
+            ]
+        StockData.objects.bulk_create(rows)
+        metrics = dict(initial_investment=10000, final_value=11000, total_return=0.1, max_drawdown=0.05, num_trades=3)
+        self.ids = [
+            BacktestResult.objects.create(symbol=symbol, start_date=start, end_date=end, **metrics).id
+            for symbol, start, end in (
+                ('AAA', date(2022, 1, 1), date(2022, 3, 31)),
+                ('AAA', date(2022, 2, 1), date(2022, 4, 30)),
+                ('BBB', date(2022, 1, 15), date(2022, 4, 15)),
+            )
+        ]
+
+    def test_jobs_slice_each_backtest_range_from_one_load_per_symbol(self):
+        with self.assertNumQueries(1 + 2 * 2):
+            jobs, missing = load_report_jobs(self.ids + [999999])
+        self.assertEqual(missing, [999999])
+        self.assertEqual([job['backtest_id'] for job in jobs], self.ids)
+        self.assertEqual(str(jobs[1]['dates'][0]), '2022-02-01')
+        self.assertEqual(str(jobs[1]['dates'][-1]), '2022-04-30')
+        self.assertEqual(len(jobs[2]['actual']), 91)
+
+    def test_pool_renders_every_report_with_timings(self):
+        jobs, missing = load_report_jobs(self.ids)
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = write_reports(render_reports(jobs, workers=2), directory, missing)
+            self.assertEqual(sorted(entry['backtest_id'] for entry in manifest), sorted(self.ids))
+            for entry in manifest:
+                self.assertIsNone(entry['error'])
+                self.assertGreater(entry['chart_ms'], 0)
+                with open(os.path.join(directory, entry['filename']), 'rb') as f:
+                    self.assertTrue(f.read().startswith(b'%PDF'))
+
+    def test_batch_endpoint_streams_a_zip_with_manifest(self):
+        self.assertEqual(self.client.post('/api/report/batch/', {'backtest_ids': self.ids},
+                                          content_type='application/json').status_code, 403)
+        self.client.force_login(User.objects.create_user('analyst'))
+        response = self.client.post('/api/report/batch/', {'backtest_ids': [self.ids[2], 999999]},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), [f'BBB_{self.ids[2]}.pdf', 'manifest.json'])
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(manifest[-1], {'backtest_id': 999999, 'error': 'Backtest result not found'})
+
+        response = self.client.post('/api/report/batch/', {'backtest_ids': [999999]}, content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(REPORT_POOL_PROCESSES=2)
+    def test_requests_share_one_report_pool(self):
+        jobs, _ = load_report_jobs(self.ids)
+        first = list(render_reports(jobs))
+        pool, _ = batch_reports.report_pool()
+        self.addCleanup(batch_reports._discard_pool, pool)
+        second = list(render_reports(jobs))
+        self.assertIs(batch_reports.report_pool()[0], pool)
+        self.assertEqual(len(first), len(jobs))
+        self.assertEqual(len(second), len(jobs))
+        self.assertTrue(all(outcome['pdf'] for outcome in first + second))
+
+    def test_zip_stream_is_valid_without_seeking(self):
+        jobs, _ = load_report_jobs(self.ids[:1])
+        data = b''.join(stream_zip(render_reports(jobs, workers=1)))
+        self.assertIsNone(zipfile.ZipFile(io.BytesIO(data)).testzip())
+
+
+class ReportChartTestCase(TestCase):
+    def setUp(self):
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.02, 90)))
+        StockData.objects.bulk_create([
+            StockData(symbol='AAA', date=date(2022, 1, 1) + timedelta(days=i), open_price=c, high_price=c,
+                      low_price=c, close_price=round(float(c), 4), volume=1000)
+            for i, c in enumerate(closes)
+        ])
+        self.backtest = BacktestResult.objects.create(
+            symbol='AAA', start_date=date(2022, 1, 1), end_date=date(2022, 3, 31), initial_investment=10000,
+            final_value=11000, total_return=0.1, max_drawdown=0.05, num_trades=3,
+        )
+        self.url = f'/api/report/{self.backtest.id}/chart.png'
+
+    def test_json_report_links_the_binary_chart(self):
+        body = self.client.get('/api/report/', {'backtest_id': self.backtest.id, 'format': 'json'}).json()
+        self.assertNotIn('chart_image', body)
+        self.assertTrue(body['chart_url'].endswith(self.url))
+
+    def test_chart_is_png_and_revalidates_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertIn('max-age', response['Cache-Control'])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        # A new bar changes the chart, so the old ETag no longer matches.
+        etag = response['ETag']
+        StockData.objects.create(symbol='AAA', date=date(2022, 4, 1), open_price=1, high_price=1, low_price=1,
+                                 close_price=1, volume=1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_backtest(self):
+        self.assertEqual(self.client.get('/api/report/999999/chart.png').status_code, 404)
@@ -0,0 +1,69 @@
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+import numpy as np
+from celery.backends.filesystem import FilesystemBackend
+from celery.contrib.testing.worker import start_worker
+from django.test import TestCase, TransactionTestCase, override_settings
+from financial_data.models import StockData
+from financial_data.tasks import train_models
+from financial_data.utils.batch_training import train_symbols
+from financial_data.utils.features import feature_matrix, get_pipeline
+from financial_data.utils.model_store import load_model
+from stock_analyzer import celery_app
+
+
+class TrainingDataMixin:
+    def setUp(self):
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name, PREDICTION_ESTIMATOR='linear')
+        override.enable()
+        self.addCleanup(override.disable)
+
+        rng = np.random.default_rng(2)
+        rows = []
+        for symbol, days in (('AAA', 80), ('BBB', 80), ('CCC', 80), ('SPY', 80), ('TINY', 3)):
+            closes = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, days))), 2)
+            rows += [
+                StockData(symbol=symbol, date=date(2023, 1, 2) + timedelta(days=i), open_price=c, high_price=c + 1,
+                          low_price=c - 1, close_price=c, volume=1000 + i)
+                for i, c in enumerate(closes)
+            ]
+        StockData.objects.bulk_create(rows)
+
+
+class BatchTrainingTestCase(TrainingDataMixin, TestCase):
+    def test_pool_trains_and_publishes_every_symbol(self):
+        summary = train_symbols(workers=2, shard_size=1)
+
+        self.assertEqual(summary['trained'], 4)
+        self.assertEqual(summary['skipped'], ['TINY'])
+        self.assertEqual(summary['failed'], {})
+        self.assertGreater(summary['symbols_per_second'], 0)
+
+        # Models fitted from the memmapped batch arrays match the single-symbol path.
+        pipeline = get_pipeline()
+        X, y, _ = pipeline.training_set(*feature_matrix('BBB', pipeline))
+        entry = load_model('BBB')
+        self.assertEqual(entry['features'], summary['features'])
+        reference = np.linalg.lstsq(np.c_[X, np.ones(len(X))], y, rcond=None)[0]
+        np.testing.assert_allclose(entry['model'].predict(X), np.c_[X, np.ones(len(X))] @ reference, rtol=1e-6)
+
+
+class PreforkTrainingTestCase(TrainingDataMixin, TransactionTestCase):
+    # Committed rows: the worker's pool child opens its own database connection.
+
+    def test_task_trains_inside_a_prefork_worker(self):
+        # Prefork children are daemonic; the training pool must still start from one.
+        results = tempfile.TemporaryDirectory()
+        self.addCleanup(results.cleanup)
+        # The in-memory result backend would stay in the pool child; results go through files instead.
+        backend = FilesystemBackend(app=celery_app, url=f'file://{results.name}')
+        with mock.patch.object(celery_app, '_backend_cache', backend), \
+                start_worker(celery_app, pool='prefork', concurrency=1, queues=['bulk'], perform_ping_check=False):
+            summary = train_models.delay(['AAA', 'BBB']).get(timeout=60)
+
+        self.assertEqual(summary['trained'], 2)
+        self.assertEqual(summary['failed'], {})
+        self.assertEqual(load_model('AAA')['features'], summary['features'])
@@ -0,0 +1,44 @@
+from datetime import date
+from django.test import SimpleTestCase, TestCase, override_settings
+from financial_data.benchmarks import synthetic_bars, daily_payload, stub_server, compare_results
+from financial_data.management.commands.bench_startup import ENTRY_POINTS, HEAVY_MODULES, measure
+from financial_data.models import StockData
+from financial_data.utils.alpha_vantage_api import fetch_stock_data
+from financial_data.utils.stream_parser import iter_daily_bars
+
+
+class BenchmarkHelpersTestCase(TestCase):
+    def test_payload_round_trips_through_stream_parser(self):
+        bars = synthetic_bars(30, seed=1)
+        self.assertEqual(bars, synthetic_bars(30, seed=1))
+        self.assertTrue(all(day.weekday() < 5 for day, *_ in bars))
+
+        parsed = list(iter_daily_bars([daily_payload('X', bars)], date(2000, 1, 1), date(2001, 1, 1)))
+        self.assertEqual(sorted(parsed), bars)
+
+    def test_fetch_against_stub_server(self):
+        bars = synthetic_bars(20)
+        with stub_server(daily_payload('STUB', bars)) as url, override_settings(ALPHA_VANTAGE_BASE_URL=url):
+            fetch_stock_data('STUB', bars[0][0], bars[-1][0])
+        self.assertEqual(StockData.objects.filter(symbol='STUB').count(), 20)
+
+    def test_compare_flags_regressions_over_threshold(self):
+        baseline = {'results': {'a[500]': {'median_ms': 100.0}, 'b[500]': {'median_ms': 100.0}}}
+        current = {'results': {
+            'a[500]': {'median_ms': 115.0},
+            'b[500]': {'median_ms': 130.0},
+            'c[500]': {'median_ms': 1.0},
+        }}
+        rows = {row['case']: row for row in compare_results(current, baseline, max_regression=20)}
+        self.assertFalse(rows['a[500]']['regressed'])
+        self.assertTrue(rows['b[500]']['regressed'])
+        self.assertAlmostEqual(rows['b[500]']['change_pct'], 30.0)
+        self.assertIsNone(rows['c[500]']['baseline_ms'])
+
+
+class StartupImportsTestCase(SimpleTestCase):
+    def test_entry_points_import_no_heavy_packages(self):
+        for entry, code in ENTRY_POINTS.items():
+            with self.subTest(entry=entry):
+                _, packages = measure(code)
+                self.assertFalse([name for name in HEAVY_MODULES if name in packages])
@@ -0,0 +1,20 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase
+from financial_data.models import Prediction
+from financial_data.utils.bulk_writer import bulk_upsert
+
+
+class BulkUpsertTestCase(TestCase):
+    def test_insert_then_update(self):
+        start = date(2024, 1, 1)
+        rows = (Prediction(symbol='AAPL', date=start + timedelta(days=i), predicted_price=100 + i) for i in range(10))
+        stats = bulk_upsert(Prediction, rows, ['symbol', 'date'], ['predicted_price'], batch_size=3)
+
+        self.assertEqual(stats['rows'], 10)
+        self.assertEqual(Prediction.objects.filter(symbol='AAPL').count(), 10)
+
+        bulk_upsert(Prediction, [Prediction(symbol='AAPL', date=start, predicted_price=42)], ['symbol', 'date'], ['predicted_price'])
+
+        self.assertEqual(Prediction.objects.filter(symbol='AAPL').count(), 10)
+        self.assertEqual(Prediction.objects.get(symbol='AAPL', date=start).predicted_price, Decimal('42.00'))
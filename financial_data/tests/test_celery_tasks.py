@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest import mock
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.tasks import backoff, plan_refresh, refresh_symbols, refresh_universe, retry_delay, _history_range
+from financial_data.utils.alpha_vantage_api import QUOTA_KEY, QuotaExceeded
+from financial_data.utils.coverage import record_coverage
+from financial_data.utils.rate_limiter import DAY, MINUTE, calls_made, record_call
+from stock_analyzer import celery_app
+
+
+class RetryBackoffTestCase(SimpleTestCase):
+    @override_settings(TASK_RETRY_BACKOFF=10, TASK_RETRY_BACKOFF_MAX=100)
+    def test_backoff_doubles_up_to_the_cap(self):
+        for retries, ceiling in [(0, 10), (1, 20), (3, 80), (4, 100), (12, 100)]:
+            for _ in range(20):
+                self.assertTrue(ceiling / 2 <= backoff(retries) <= ceiling)
+
+    def test_quota_refusals_wait_for_the_window(self):
+        task = mock.Mock(request=mock.Mock(retries=0))
+        self.assertEqual(retry_delay(task, QuotaExceeded('limit', retry_after=42)), 42)
+
+
+class RefreshTasksTestCase(TestCase):
+    def setUp(self):
+        # Quota windows are counted in the cache; start every test with none spent.
+        cache.clear()
+
+    def test_chunk_shares_one_session(self):
+        with AlphaVantageSimulator(days=900, seed=5) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url), \
+                mock.patch('requests.Session', wraps=requests.Session) as session:
+            result = refresh_symbols.apply(args=[['AAA', 'BBB', 'UNKNOWNCO']]).get()
+
+        self.assertEqual(session.call_count, 1)
+        self.assertEqual(sorted(result['refreshed']), ['AAA', 'BBB'])
+        self.assertTrue(all(rows > 0 for rows in result['refreshed'].values()))
+        self.assertEqual(list(result['failed']), ['UNKNOWNCO'])
+        self.assertEqual(simulator.counts['TIME_SERIES_DAILY'], 3)
+        self.assertEqual(calls_made(QUOTA_KEY, MINUTE), 3)
+
+    def test_quota_retries_only_the_remaining_symbols(self):
+        with AlphaVantageSimulator(note_rate=1.0) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url), \
+                mock.patch.object(refresh_symbols, 'retry', side_effect=RuntimeError('retry')) as retry:
+            with self.assertRaises(RuntimeError):
+                refresh_symbols.apply(args=[['AAA', 'BBB']], throw=True)
+
+        kwargs = retry.call_args.kwargs
+        self.assertEqual(kwargs['args'], [['AAA', 'BBB']])
+        self.assertIsInstance(kwargs['exc'], QuotaExceeded)
+        self.assertTrue(0 < kwargs['countdown'] <= MINUTE + 1)
+
+    @override_settings(ALPHA_VANTAGE_CALLS_PER_MINUTE=5)
+    def test_chunk_is_paced_to_the_minute_quota(self):
+        symbols = [f'S{i:02}' for i in range(25)]
+        with AlphaVantageSimulator(days=100, seed=7) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url), \
+                mock.patch.object(refresh_symbols, 'retry', side_effect=RuntimeError('retry')) as retry:
+            with self.assertRaises(RuntimeError):
+                refresh_symbols.apply(args=[symbols], throw=True)
+
+        self.assertEqual(simulator.counts, {'TIME_SERIES_DAILY': 5})
+        kwargs = retry.call_args.kwargs
+        self.assertEqual(kwargs['args'], [symbols[5:]])
+        self.assertTrue(0 < kwargs['countdown'] <= MINUTE + 1)
+
+    @override_settings(ALPHA_VANTAGE_DAILY_LIMIT=10, ALPHA_VANTAGE_INTERACTIVE_RESERVE=3,
+                       ALPHA_VANTAGE_CALLS_PER_MINUTE=5)
+    def test_plan_fits_the_remaining_budget(self):
+        start_date, end_date = _history_range()
+        record_coverage('FRESH', start_date - timedelta(days=7), end_date)
+        for _ in range(2):
+            record_call(QUOTA_KEY)
+
+        symbols = ['FRESH'] + [f'S{i}' for i in range(8)]
+        chunks, countdowns, deferred = plan_refresh(symbols, chunk_size=2)
+        # 10 a day - 2 already made - 3 reserved for requests = 5 calls.
+        self.assertEqual(chunks, [['S0', 'S1'], ['S2', 'S3'], ['S4']])
+        self.assertEqual(countdowns, [0, 24, 48])
+        self.assertEqual(deferred, ['S5', 'S6', 'S7'])
+
+    def test_countdowns_stay_within_the_visibility_timeout(self):
+        # An ETA task still waiting when the broker's visibility timeout lapses is delivered twice.
+        _, countdowns, _ = plan_refresh([f'S{i}' for i in range(1000)])
+        self.assertLess(max(countdowns), celery_app.conf.broker_transport_options['visibility_timeout'])
+        self.assertLess(DAY, celery_app.conf.broker_transport_options['visibility_timeout'])
+
+    def test_refresh_universe_runs_chunks_eagerly(self):
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+        with AlphaVantageSimulator(days=900, seed=6) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            summary = refresh_universe.delay(['AAA', 'BBB', 'CCC'], chunk_size=2).get()
+
+        self.assertEqual(summary['chunks'], 2)
+        self.assertEqual(summary['deferred'], [])
+        self.assertEqual(simulator.counts['TIME_SERIES_DAILY'], 3)
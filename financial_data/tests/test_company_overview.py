@@ -0,0 +1,68 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from financial_data.models import CompanyOverview
+from financial_data.utils.company_overview import load_company_overview, load_company_overviews
+
+OVERVIEW = {
+    'Symbol': 'IBM', 'Name': 'International Business Machines', 'Description': 'IT services',
+    'Exchange': 'NYSE', 'Currency': 'USD', 'Country': 'USA', 'Sector': 'TECHNOLOGY',
+    'Industry': 'COMPUTER SERVICES', 'MarketCapitalization': '150000000000', 'PERatio': '22.5',
+    'DividendYield': '0.045', 'Beta': '0.75', '52WeekHigh': '199.18', '52WeekLow': '120.55',
+}
+
+
+@mock.patch('financial_data.utils.company_overview.get_company_overview')
+class CompanyOverviewCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_read_through_hits_api_once(self, mock_overview):
+        mock_overview.return_value = OVERVIEW
+        self.assertEqual(load_company_overview('ibm')['name'], 'International Business Machines')
+        self.assertEqual(load_company_overview('IBM')['name'], 'International Business Machines')
+        self.assertEqual(mock_overview.call_count, 1)
+        self.assertTrue(CompanyOverview.objects.filter(symbol='IBM').exists())
+
+    def test_placeholder_numbers_are_stored_as_null(self, mock_overview):
+        mock_overview.return_value = dict(OVERVIEW, PERatio='None', DividendYield='-', Beta='None',
+                                          MarketCapitalization='None')
+        self.assertIsNone(load_company_overview('IBM')['pe_ratio'])
+        company = CompanyOverview.objects.get(symbol='IBM')
+        self.assertIsNone(company.dividend_yield)
+        self.assertIsNone(company.beta)
+        self.assertEqual(company.market_capitalization, 0)
+        self.assertEqual(company.fifty_two_week_high, 199.18)
+
+    def test_zero_is_kept_as_zero(self, mock_overview):
+        mock_overview.return_value = dict(OVERVIEW, DividendYield='0', Beta='0.000')
+        load_company_overview('IBM')
+        company = CompanyOverview.objects.get(symbol='IBM')
+        self.assertEqual(company.dividend_yield, 0.0)
+        self.assertEqual(company.beta, 0.0)
+
+    def test_unknown_symbol_is_negatively_cached(self, mock_overview):
+        mock_overview.return_value = {}
+        self.assertIsNone(load_company_overview('NOPE'))
+        self.assertIsNone(load_company_overview('NOPE'))
+        self.assertEqual(mock_overview.call_count, 1)
+
+    @override_settings(COMPANY_OVERVIEW_TTL=-1)
+    @mock.patch('financial_data.utils.company_overview.schedule_refresh')
+    def test_stale_entry_served_while_refreshing(self, mock_refresh, mock_overview):
+        mock_overview.return_value = OVERVIEW
+        load_company_overview('IBM')
+        self.assertEqual(load_company_overview('IBM')['symbol'], 'IBM')
+        self.assertEqual(mock_overview.call_count, 1)
+        mock_refresh.assert_called_with('IBM')
+
+    @mock.patch('financial_data.utils.company_overview.schedule_refresh')
+    def test_bulk_lookup(self, mock_refresh, mock_overview):
+        mock_overview.return_value = OVERVIEW
+        load_company_overview('IBM')
+        cache.clear()
+        with self.assertNumQueries(1):
+            results, missing = load_company_overviews(['IBM', 'MSFT'])
+        self.assertEqual([r['symbol'] for r in results], ['IBM'])
+        self.assertEqual(missing, ['MSFT'])
+        mock_refresh.assert_called_once_with('MSFT')
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.models import DataCoverage, StockData
+from financial_data.utils.alpha_vantage_api import ensure_stock_data
+from financial_data.utils.coverage import covered_spans, missing_spans, record_coverage
+from financial_data.utils.market_calendar import (
+    EXCHANGE_TZ, count_trading_days, holidays, is_trading_day, latest_complete_session,
+)
+
+
+class MarketCalendarTestCase(SimpleTestCase):
+    def test_nyse_holidays(self):
+        self.assertEqual(sorted(holidays(2024)), [
+            date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+            date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+        ])
+        # Saturday New Year's Day is not observed; Sunday Juneteenth and Christmas move to Monday.
+        self.assertTrue(is_trading_day(date(2021, 12, 31)))
+        self.assertFalse(is_trading_day(date(2022, 6, 20)))
+        self.assertFalse(is_trading_day(date(2022, 12, 26)))
+        self.assertEqual(count_trading_days(date(2024, 1, 1), date(2024, 12, 31)), 252)
+
+    def test_latest_complete_session(self):
+        def at(*args):
+            return latest_complete_session(datetime(*args, tzinfo=EXCHANGE_TZ))
+        self.assertEqual(at(2024, 7, 8, 10, 0), date(2024, 7, 5))   # Monday morning -> Friday
+        self.assertEqual(at(2024, 7, 8, 17, 0), date(2024, 7, 8))   # after the bar is out
+        self.assertEqual(at(2024, 7, 5, 9, 0), date(2024, 7, 3))    # skips Independence Day
+
+
+class CoverageTestCase(TestCase):
+    def test_weekends_and_holidays_are_not_gaps(self):
+        record_coverage('AAA', date(2024, 6, 24), date(2024, 6, 28))
+        record_coverage('AAA', date(2024, 7, 1), date(2024, 7, 12))
+        self.assertEqual(covered_spans('AAA'), [(date(2024, 6, 24), date(2024, 7, 12))])
+        self.assertEqual(missing_spans('AAA', date(2024, 6, 22), date(2024, 7, 14)), [])
+
+    def test_missing_spans_are_exact(self):
+        record_coverage('AAA', date(2024, 3, 4), date(2024, 3, 8))
+        record_coverage('AAA', date(2024, 3, 18), date(2024, 3, 22))
+        self.assertEqual(missing_spans('AAA', date(2024, 3, 1), date(2024, 4, 2)), [
+            (date(2024, 3, 1), date(2024, 3, 1)),
+            (date(2024, 3, 11), date(2024, 3, 15)),
+            (date(2024, 3, 25), date(2024, 4, 2)),   # Good Friday 3/29 stays inside the span
+        ])
+
+    def test_bootstraps_spans_from_stored_bars(self):
+        days = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 5), date(2024, 1, 8)]
+        StockData.objects.bulk_create([
+            StockData(symbol='BBB', date=day, open_price=1, high_price=1, low_price=1, close_price=1, volume=1)
+            for day in days
+        ])
+        self.assertEqual(covered_spans('BBB'), [(date(2024, 1, 2), date(2024, 1, 3)), (date(2024, 1, 5), date(2024, 1, 8))])
+        self.assertEqual(DataCoverage.objects.filter(symbol='BBB').count(), 2)
+
+
+class EnsureStockDataTestCase(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_fetches_only_missing_sessions(self):
+        end = date.today()
+        with AlphaVantageSimulator(days=400, seed=3) as simulator, \
+                override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            self.assertGreater(ensure_stock_data('SIM', end - timedelta(days=30), end), 0)
+            self.assertEqual(ensure_stock_data('SIM', end - timedelta(days=20), end), 0)
+            self.assertEqual(simulator.counts['TIME_SERIES_DAILY'], 1)
+
+            # An earlier start fetches once more, for the older span only.
+            ensure_stock_data('SIM', end - timedelta(days=90), end)
+            self.assertEqual(simulator.counts['TIME_SERIES_DAILY'], 2)
+            self.assertEqual(missing_spans('SIM', end - timedelta(days=90), end), [])
+
+            # A range before the symbol's history is recorded as covered, not retried.
+            self.assertEqual(ensure_stock_data('SIM', date(1990, 1, 1), date(1990, 3, 1)), 0)
+            self.assertEqual(ensure_stock_data('SIM', date(1990, 1, 1), date(1990, 3, 1)), 0)
+            self.assertEqual(simulator.counts['TIME_SERIES_DAILY'], 3)
@@ -0,0 +1,85 @@
+import contextvars
+import unittest
+from datetime import date
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from financial_data.db_router import AnalyticsRouter, LAST_WRITE_KEY, PrimaryPinMiddleware, use_primary
+from financial_data.models import StockData, Prediction, BacktestResult
+
+
+@mock.patch('financial_data.db_router.replica_alias', return_value='replica')
+@override_settings(DATABASE_REPLICA_PIN_SECONDS=0)
+class AnalyticsRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.delete(LAST_WRITE_KEY)
+        self.router = AnalyticsRouter()
+
+    def route(self, func):
+        # Each call gets a fresh context, like a new request.
+        return contextvars.Context().run(func)
+
+    def test_analytics_reads_go_to_replica(self, _):
+        self.assertEqual(self.route(lambda: self.router.db_for_read(StockData)), 'replica')
+        self.assertEqual(self.route(lambda: self.router.db_for_read(Prediction)), 'replica')
+        self.assertIsNone(self.route(lambda: self.router.db_for_read(BacktestResult)))
+        self.assertEqual(self.route(lambda: self.router.db_for_write(StockData)), 'default')
+
+    def test_reads_after_a_write_stay_on_primary(self, _):
+        def write_then_read():
+            self.router.db_for_write(StockData)
+            return self.router.db_for_read(StockData)
+        self.assertEqual(self.route(write_then_read), 'default')
+        self.assertEqual(self.route(lambda: self.router.db_for_read(StockData)), 'replica')
+
+        def pinned():
+            with use_primary():
+                return self.router.db_for_read(Prediction)
+        self.assertEqual(self.route(pinned), 'default')
+
+    def test_recent_write_pins_other_processes_for_the_lag_window(self, _):
+        # The router is built at the default 0 seconds; LocMem stands in for the shared cache here.
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=30):
+            self.route(lambda: self.router.db_for_write(Prediction))
+            self.assertEqual(self.route(lambda: self.router.db_for_read(StockData)), 'default')
+
+    def test_pin_window_requires_a_shared_cache(self, _):
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=30):
+            with self.assertRaises(ImproperlyConfigured):
+                AnalyticsRouter()
+            shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                  'LOCATION': 'redis://localhost:6379/1'}}
+            with override_settings(CACHES=shared):
+                AnalyticsRouter()
+
+    def test_middleware_scopes_pinning_to_the_request(self, _):
+        def view(request):
+            self.router.db_for_write(StockData)
+            return self.router.db_for_read(StockData)
+        middleware = PrimaryPinMiddleware(view)
+        self.assertEqual(self.route(lambda: middleware(None)), 'default')
+        self.assertEqual(self.route(lambda: (middleware(None), self.router.db_for_read(StockData))[1]), 'replica')
+
+    def test_replica_is_never_migrated(self, _):
+        self.assertFalse(self.router.allow_migrate('replica', 'financial_data'))
+        self.assertTrue(self.router.allow_migrate('default', 'financial_data'))
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'set DATABASE_REPLICA_URL to test against a second database')
+@override_settings(DATABASE_REPLICA_PIN_SECONDS=0)
+class ReplicaIntegrationTestCase(TransactionTestCase):
+    databases = '__all__'
+
+    def test_range_scans_use_the_replica(self):
+        def run():
+            StockData.objects.create(symbol='AAA', date=date(2024, 1, 2), open_price=1, high_price=1, low_price=1,
+                                     close_price=1, volume=1)
+            return StockData.objects.filter(symbol='AAA').db, StockData.objects.filter(symbol='AAA').count()
+        self.assertEqual(contextvars.Context().run(run), ('default', 1))
+
+        def read():
+            queryset = StockData.objects.filter(symbol='AAA')
+            return queryset.db, queryset.count()
+        self.assertEqual(contextvars.Context().run(read), ('replica', 1))
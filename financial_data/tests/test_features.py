@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from financial_data.models import StockData
+from financial_data.utils.data_version import bump_data_version
+from financial_data.utils.features import (
+    FeaturePipeline, Lag, PctChange, RelativeToMean, Volatility, Range, MarketReturn, feature_matrix, get_pipeline
+)
+from financial_data.utils.ml_integration import make_estimator, ESTIMATORS
+
+START = date(2022, 1, 3)
+
+
+class FeaturePipelineTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        rng = np.random.default_rng(11)
+        self.close = np.round(50 * np.exp(np.cumsum(rng.normal(0, 0.01, 60))), 2)
+        self.market = np.round(400 * np.exp(np.cumsum(rng.normal(0, 0.01, 60))), 2)
+        rows = []
+        for symbol, closes in (('IBM', self.close), ('SPY', self.market)):
+            for i, c in enumerate(closes):
+                rows.append(StockData(symbol=symbol, date=START + timedelta(days=i), open_price=c - 0.5,
+                                      high_price=c + 1, low_price=c - 1, close_price=c, volume=1000 + i))
+        StockData.objects.bulk_create(rows)
+
+    def test_columns_match_pandas(self):
+        pipeline = FeaturePipeline('t', [
+            Lag('close', 2), PctChange('close', 1), RelativeToMean('close', 5), Volatility(5), Range(), MarketReturn(1),
+        ])
+        dates, close, matrix = pipeline.load('IBM', START, START + timedelta(days=100))
+        s = pd.Series(self.close)
+        np.testing.assert_allclose(matrix[:, 0], s.shift(2), equal_nan=True)
+        np.testing.assert_allclose(matrix[:, 1], s.pct_change(), equal_nan=True)
+        np.testing.assert_allclose(matrix[:, 2], s / s.rolling(5).mean() - 1, equal_nan=True)
+        np.testing.assert_allclose(matrix[:, 3], np.log(s).diff().rolling(5).std(ddof=0), equal_nan=True)
+        np.testing.assert_allclose(matrix[:, 4], 2 / s)
+        np.testing.assert_allclose(matrix[1:, 5], pd.Series(self.market).pct_change()[1:])
+        self.assertEqual(pipeline.window, 6)
+
+        X, y, target_dates = pipeline.training_set(dates, close, matrix)
+        self.assertEqual(len(X), 60 - pipeline.window)
+        self.assertEqual(target_dates[0], dates[pipeline.window])
+        np.testing.assert_allclose(X[:, 0], self.close[pipeline.window - 3:-3])
+
+    def test_matrix_cached_per_data_version(self):
+        feature_matrix('IBM')
+        with self.assertNumQueries(2):
+            # data versions of IBM and SPY; the matrix itself comes from the cache
+            feature_matrix('IBM')
+
+        bump_data_version('IBM')
+        with self.assertNumQueries(4):
+            feature_matrix('IBM')
+
+        self.assertNotEqual(get_pipeline('lag5').version, get_pipeline('extended').version)
+
+    @override_settings(PREDICTION_FEATURES='extended')
+    def test_estimators_share_fit_predict(self):
+        pipeline = get_pipeline()
+        X, y, _ = pipeline.training_set(*feature_matrix('IBM', pipeline))
+        for name in ESTIMATORS:
+            model = make_estimator(name).fit(X, y)
+            self.assertEqual(model.predict(X[-3:]).shape, (3,))
+        with self.assertRaises(ValueError):
+            make_estimator('svm')
@@ -0,0 +1,46 @@
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from financial_data.instrumentation import Counter, Histogram, Registry, span, STAGE_SECONDS
+from financial_data.utils.alpha_vantage_api import get_company_overview
+
+
+class MetricsRenderTestCase(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        registry = Registry()
+        calls = registry.register(Counter('calls_total', 'Calls', ['status']))
+        latency = registry.register(Histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0)))
+        calls.inc(status='200')
+        calls.inc(2, status='200')
+        latency.observe(0.5)
+
+        text = registry.render()
+        self.assertIn('# TYPE calls_total counter', text)
+        self.assertIn('calls_total{status="200"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 1', text)
+        self.assertIn('latency_seconds_count 1', text)
+
+    def test_span_observes_stage(self):
+        before = STAGE_SECONDS.count(stage='unit_test')
+        with span('unit_test'):
+            pass
+        self.assertEqual(STAGE_SECONDS.count(stage='unit_test'), before + 1)
+
+
+class MetricsEndpointTestCase(TestCase):
+    @mock.patch('financial_data.utils.alpha_vantage_api.requests.get')
+    def test_alpha_vantage_calls_are_counted(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b'{"Note": "slow down"}'
+        mock_get.return_value.json.return_value = {'Note': 'slow down'}
+        get_company_overview('IBM')
+
+        text = self.client.get('/metrics').content.decode()
+        self.assertIn('alpha_vantage_requests_total{function="OVERVIEW",status="200"}', text)
+        self.assertIn('alpha_vantage_quota_hits_total{function="OVERVIEW"}', text)
+        self.assertIn('alpha_vantage_response_bytes_total{function="OVERVIEW"}', text)
+
+    def test_server_timing_header_on_request(self):
+        response = self.client.get('/api/', HTTP_X_SERVER_TIMING='1')
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertNotIn('Server-Timing', self.client.get('/api/'))
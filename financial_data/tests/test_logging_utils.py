@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+import tempfile
+from django.test import SimpleTestCase
+from financial_data.logging_utils import AsyncQueueHandler, DebugSamplingFilter, JsonFormatter
+
+
+class AsyncLoggingTestCase(SimpleTestCase):
+    def test_records_written_as_json_off_thread(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'app.log')
+            handler = AsyncQueueHandler(filename=path, stream=False)
+            handler.setFormatter(JsonFormatter())
+            logger = logging.getLogger('financial_data.tests.async')
+            logger.propagate = False
+            logger.addHandler(handler)
+            try:
+                logger.warning("Fetched %s rows for %s", 3, 'IBM')
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+
+            with open(path) as f:
+                record = json.loads(f.readline())
+        self.assertEqual(record['message'], 'Fetched 3 rows for IBM')
+        self.assertEqual(record['level'], 'WARNING')
+
+    def test_forked_child_drains_its_own_records(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'app.log')
+            handler = AsyncQueueHandler(filename=path, stream=False)
+            handler.setFormatter(JsonFormatter())
+            logger = logging.getLogger('financial_data.tests.fork')
+            logger.propagate = False
+            logger.addHandler(handler)
+            try:
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        logger.warning("from child %s", os.getpid())
+                        handler.close()
+                        code = 0
+                    finally:
+                        os._exit(code)
+                _, status = os.waitpid(pid, 0)
+                self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+
+            with open(path) as f:
+                messages = [json.loads(line)['message'] for line in f]
+        self.assertEqual(messages, [f'from child {pid}'])
+
+    def test_debug_sampling(self):
+        never = DebugSamplingFilter(rate=0)
+        debug = logging.LogRecord('x', logging.DEBUG, __file__, 1, 'msg', (), None)
+        info = logging.LogRecord('x', logging.INFO, __file__, 1, 'msg', (), None)
+        self.assertFalse(never.filter(debug))
+        self.assertTrue(never.filter(info))
+        self.assertTrue(DebugSamplingFilter(rate=1).filter(debug))
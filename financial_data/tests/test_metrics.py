@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from financial_data.models import Prediction, StockData
+from financial_data.renderers import shape_table
+from financial_data.utils.metrics import (
+    comparison_detail, drawdown_detail, drawdown_metrics, prediction_error_metrics,
+)
+
+START = date(2024, 1, 1)
+CLOSES = {
+    'AAA': [100, 110, 99, 121, 96.8, 130],  # worst drawdown -20% on day 4
+    'BBB': [50, 40, 45, 60],                # -20% on day 1
+}
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        StockData.objects.bulk_create([
+            StockData(symbol=symbol, date=START + timedelta(days=i), open_price=close, high_price=close,
+                      low_price=close, close_price=close, volume=1000)
+            for symbol, closes in CLOSES.items() for i, close in enumerate(closes)
+        ])
+        # Predictions miss the first day and run one day past the last close.
+        Prediction.objects.bulk_create([
+            Prediction(symbol='AAA', date=START + timedelta(days=i), predicted_price=close + (1 if i % 2 else -3))
+            for i, close in enumerate(CLOSES['AAA'] + [131]) if i
+        ])
+        self.end = START + timedelta(days=10)
+
+    def test_database_and_numpy_paths_agree(self):
+        in_db = drawdown_metrics(['AAA', 'BBB', 'NONE'], START, self.end, in_database=True)
+        in_python = drawdown_metrics(['AAA', 'BBB', 'NONE'], START, self.end, in_database=False)
+        self.assertEqual(sorted(in_db), ['AAA', 'BBB'])
+        for symbol in in_db:
+            for key, value in in_db[symbol].items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(value, in_python[symbol][key], places=6)
+                else:
+                    self.assertEqual(value, in_python[symbol][key])
+
+        self.assertAlmostEqual(in_db['AAA']['max_drawdown'], -20.0)
+        self.assertEqual(in_db['AAA']['trough_date'], START + timedelta(days=4))
+        self.assertAlmostEqual(in_db['AAA']['total_return'], 30.0)
+        self.assertEqual(in_db['BBB']['trough_date'], START + timedelta(days=1))
+        self.assertEqual(in_db['BBB']['count'], 4)
+
+        errors_db = prediction_error_metrics(['AAA', 'BBB'], START, self.end, in_database=True)
+        errors_py = prediction_error_metrics(['AAA', 'BBB'], START, self.end, in_database=False)
+        self.assertEqual(list(errors_db), ['AAA'])
+        self.assertEqual(errors_db['AAA']['count'], 5)
+        # Errors on days 1..5: +1, -3, +1, -3, +1.
+        self.assertAlmostEqual(errors_db['AAA']['mse'], 21 / 5)
+        self.assertAlmostEqual(errors_db['AAA']['mae'], 9 / 5)
+        self.assertAlmostEqual(errors_db['AAA']['bias'], -3 / 5)
+        for key in ('count', 'mse', 'mae', 'bias'):
+            self.assertAlmostEqual(errors_db['AAA'][key], errors_py['AAA'][key])
+
+    def test_numpy_fallback_without_window_functions(self):
+        with override_settings(METRICS_IN_DATABASE=False), \
+                mock.patch('financial_data.utils.metrics._drawdown_sql') as in_database:
+            self.assertAlmostEqual(drawdown_metrics(['BBB'], START, self.end)['BBB']['max_drawdown'], -20.0)
+        in_database.assert_not_called()
+
+    def test_detail_rows(self):
+        rows = shape_table(comparison_detail('AAA', START, self.end))
+        self.assertEqual(len(rows), 7)  # outer join: day 0 has no prediction, day 6 no close
+        self.assertEqual(rows[0]['date'], START)
+        self.assertIsNone(rows[0]['predicted_price'])
+        self.assertIsNone(rows[-1]['close_price'])
+        self.assertEqual(rows[1]['error'], 1.0)
+        self.assertEqual(drawdown_detail('BBB', START, self.end)['drawdown'][:2].tolist(), [0.0, -20.0])
+
+    def test_endpoint_returns_summaries_unless_detail_requested(self):
+        params = {'symbols': 'AAA,BBB', 'start_date': START.isoformat(), 'end_date': self.end.isoformat()}
+        body = self.client.get('/api/metrics/', params).json()
+        self.assertEqual(set(body['metrics']), {'AAA', 'BBB'})
+        self.assertEqual(set(body['metrics']['AAA']), {'prices', 'predictions'})
+        self.assertIsNone(body['metrics']['BBB']['predictions'])
+
+        detailed = self.client.get('/api/metrics/', {**params, 'detail': '1'}).json()
+        self.assertEqual(len(detailed['metrics']['AAA']['comparison']), 7)
+        self.assertEqual(len(detailed['metrics']['BBB']['drawdown_detail']), 4)
+
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 400)
+        self.assertEqual(self.client.get('/api/metrics/', {'symbols': 'AAA', 'end_date': 'x'}).status_code, 400)
+
+    def test_cached_metrics_follow_every_symbol_version(self):
+        params = {'symbols': 'AAA,BBB', 'start_date': START.isoformat(), 'end_date': self.end.isoformat()}
+        self.assertEqual(self.client.get('/api/metrics/', params)['X-Cache'], 'miss')
+        self.assertEqual(self.client.get('/api/metrics/', params)['X-Cache'], 'hit')
+        StockData.objects.create(symbol='BBB', date=START + timedelta(days=4), open_price=70, high_price=70,
+                                 low_price=70, close_price=70, volume=1)
+        response = self.client.get('/api/metrics/', params)
+        self.assertEqual(response['X-Cache'], 'miss')
+        self.assertEqual(response.json()['metrics']['BBB']['prices']['count'], 5)
+
+    def test_api_root_links_to_the_metrics_summary(self):
+        links = self.client.get('/api/').json()
+        self.assertTrue(links['metrics'].endswith('/api/metrics/'))
@@ -0,0 +1,101 @@
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+from django.test import TestCase, override_settings
+from financial_data.models import StockData, Prediction, PredictionCursor
+from financial_data.utils.ml_integration import update_predictions, predict_stock_prices, train_model
+from financial_data.utils.features import get_pipeline
+from financial_data.utils.model_store import load_model
+
+START = date(2021, 1, 1)
+
+
+class IncrementalPredictionTestCase(TestCase):
+    def setUp(self):
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.closes = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, 120)))
+        StockData.objects.bulk_create([self._bar(i) for i in range(100)])
+
+    def _bar(self, i):
+        price = round(float(self.closes[i]), 2)
+        return StockData(symbol='MSFT', date=START + timedelta(days=i), open_price=price, high_price=price,
+                         low_price=price, close_price=price, volume=1000)
+
+    def _expected(self):
+        pipeline = get_pipeline()
+        return pipeline.training_set(*pipeline.load('MSFT', START, START + timedelta(days=200)))
+
+    def test_appends_only_new_dates(self):
+        _, _, target_dates = self._expected()
+        self.assertEqual(update_predictions('MSFT'), len(target_dates))
+        version = load_model('MSFT')['version']
+        first = {p.date: (p.id, p.predicted_price) for p in Prediction.objects.filter(symbol='MSFT')}
+
+        self.assertEqual(update_predictions('MSFT'), 0)
+
+        StockData.objects.bulk_create([self._bar(i) for i in range(100, 103)])
+        self.assertEqual(update_predictions('MSFT'), 3)
+
+        after = {p.date: (p.id, p.predicted_price) for p in Prediction.objects.filter(symbol='MSFT')}
+        self.assertEqual(len(after), len(first) + 3)
+        self.assertEqual({day: after[day] for day in first}, first)
+        cursor = PredictionCursor.objects.get(symbol='MSFT')
+        self.assertEqual(cursor.last_date, START + timedelta(days=102))
+        self.assertEqual(cursor.model_version, version)
+
+        # The appended rows match what a full recomputation with the same model gives.
+        X, _, target_dates = self._expected()
+        expected = load_model('MSFT')['model'].predict(X)
+        appended = [float(after[day][1]) for day in target_dates[-3:].tolist()]
+        np.testing.assert_allclose(appended, expected[-3:], atol=0.006)
+
+    def test_predicts_bars_backfilled_before_the_cursor(self):
+        update_predictions('MSFT')
+        first = {p.date: p.predicted_price for p in Prediction.objects.filter(symbol='MSFT')}
+        older = 100 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.01, 60)))
+        StockData.objects.bulk_create([
+            StockData(symbol='MSFT', date=START - timedelta(days=60 - i), open_price=price, high_price=price,
+                      low_price=price, close_price=price, volume=1000)
+            for i, price in enumerate(np.round(older, 2).tolist())
+        ])
+
+        self.assertGreater(update_predictions('MSFT'), 60 - get_pipeline().window)
+        self.assertEqual(update_predictions('MSFT'), 0)
+        self.assertEqual(PredictionCursor.objects.get(symbol='MSFT').first_date, START - timedelta(days=60))
+
+        # Every date a full recomputation predicts is stored, with the same values.
+        pipeline = get_pipeline()
+        X, _, target_dates = pipeline.training_set(
+            *pipeline.load('MSFT', START - timedelta(days=60), START + timedelta(days=200)))
+        expected = load_model('MSFT')['model'].predict(X)
+        stored = {p.date: float(p.predicted_price) for p in Prediction.objects.filter(symbol='MSFT')}
+        self.assertEqual(sorted(stored), target_dates.tolist())
+        np.testing.assert_allclose([stored[day] for day in target_dates.tolist()], expected, atol=0.006)
+        self.assertTrue(predict_stock_prices('MSFT', START - timedelta(days=40), START - timedelta(days=30)))
+        self.assertEqual({day: stored[day] for day in first if day > START + timedelta(days=40)},
+                         {day: float(price) for day, price in first.items() if day > START + timedelta(days=40)})
+
+    def test_new_model_version_rewrites_history(self):
+        update_predictions('MSFT')
+        old_ids = set(Prediction.objects.values_list('id', flat=True))
+
+        train_model('MSFT')
+        self.assertEqual(update_predictions('MSFT'), len(old_ids))
+        self.assertFalse(old_ids & set(Prediction.objects.values_list('id', flat=True)))
+        self.assertEqual(PredictionCursor.objects.get(symbol='MSFT').model_version, load_model('MSFT')['version'])
+
+    def test_reads_are_read_only_once_current(self):
+        update_predictions('MSFT')
+        with self.assertNumQueries(3):
+            # latest StockData date, cursor lookup, prediction read
+            predictions = predict_stock_prices('MSFT', START, START + timedelta(days=30))
+        self.assertEqual(predictions[-1].date, START + timedelta(days=30))
+
+    def test_unknown_symbol(self):
+        with self.assertRaises(ValueError):
+            update_predictions('NOPE')
@@ -0,0 +1,41 @@
+import json
+import os
+import pstats
+import tempfile
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from financial_data.profiling import capture
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.override = override_settings(PROFILING_DIR=self.tmpdir.name, PROFILING_HEADER_TOKEN='secret')
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.tmpdir.cleanup()
+
+    def test_capture_modes(self):
+        with capture('cprofile block') as result:
+            sum(range(10000))
+        pstats.Stats(os.path.join(self.tmpdir.name, result['name']))
+
+        with capture('sampled block', mode='sampling') as result:
+            sum(range(100000))
+        with open(os.path.join(self.tmpdir.name, result['name'])) as f:
+            self.assertEqual(json.load(f)['profiles'][0]['type'], 'sampled')
+
+    def test_header_triggers_profile_and_admin_listing(self):
+        response = self.client.get('/api/', HTTP_X_PROFILE='secret')
+        name = response['X-Profile-Id']
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/', HTTP_X_PROFILE='wrong'))
+
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.login(username='admin', password='pw')
+        listing = self.client.get('/api/profiles/').json()
+        self.assertEqual([p['name'] for p in listing['profiles']], [name])
+        self.assertEqual(self.client.get(f'/api/profiles/{name}/').status_code, 200)
+        self.assertEqual(self.client.get('/api/profiles/..%2Fsettings.py/').status_code, 404)
@@ -0,0 +1,69 @@
+import decimal
+import json
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from financial_data.av_simulator import AlphaVantageSimulator
+from financial_data.models import StockData
+from financial_data.renderers import ORJSONRenderer, shape_table
+from financial_data.utils.alpha_vantage_api import intraday_columns
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    def test_renders_numpy_decimal_and_dates_like_drf(self):
+        body = ORJSONRenderer().render({
+            'price': decimal.Decimal('101.25'),
+            'day': date(2024, 1, 2),
+            'closes': np.array([1.5, np.nan]),
+            'count': np.int64(3),
+        })
+        self.assertEqual(json.loads(body), {'price': 101.25, 'day': '2024-01-02', 'closes': [1.5, None], 'count': 3})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_shapes(self):
+        table = {'date': np.array(['2024-01-02', '2024-01-03'], dtype='datetime64[D]'),
+                 'close_price': np.array([10.0, np.nan])}
+        self.assertEqual(shape_table(table), [
+            {'date': date(2024, 1, 2), 'close_price': 10.0},
+            {'date': date(2024, 1, 3), 'close_price': None},
+        ])
+        columns = json.loads(ORJSONRenderer().render(shape_table(table, 'columns')))
+        self.assertEqual(columns, {'date': ['2024-01-02', '2024-01-03'], 'close_price': [10.0, None]})
+
+
+class ColumnarResponseTestCase(TestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.01, 60)))
+        start = date.today() - timedelta(days=60)
+        StockData.objects.bulk_create([
+            StockData(symbol='MSFT', date=start + timedelta(days=i), open_price=c, high_price=c, low_price=c,
+                      close_price=round(float(c), 2), volume=1000)
+            for i, c in enumerate(closes)
+        ])
+
+    def test_prediction_columns_match_rows(self):
+        rows = self.client.get('/api/predict/', {'symbol': 'MSFT'}).json()
+        columns = self.client.get('/api/predict/', {'symbol': 'MSFT', 'shape': 'columns'}).json()
+        self.assertEqual(columns['actual_prices']['date'], [row['date'] for row in rows['actual_prices']])
+        self.assertEqual(columns['actual_prices']['close_price'], [row['close_price'] for row in rows['actual_prices']])
+        self.assertEqual(columns['predictions']['predicted_price'],
+                         [row['predicted_price'] for row in rows['predictions']])
+        self.assertEqual(len(columns['actual_prices']['date']), 60)
+        self.assertEqual(self.client.get('/api/predict/', {'symbol': 'MSFT', 'shape': 'wide'}).status_code, 400)
+
+    def test_intraday_columns(self):
+        with AlphaVantageSimulator() as simulator, override_settings(ALPHA_VANTAGE_BASE_URL=simulator.url):
+            body = self.client.get('/api/intraday-data/MSFT/', {'shape': 'columns'}).json()
+        self.assertEqual(body['meta_data']['2. Symbol'], 'MSFT')
+        self.assertEqual(len(body['columns']['close']), 100)
+        self.assertEqual(body['columns']['timestamp'], sorted(body['columns']['timestamp']))
+        self.assertEqual(intraday_columns({'Note': 'slow down'}), {'Note': 'slow down'})
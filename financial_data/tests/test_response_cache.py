@@ -0,0 +1,78 @@
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+import numpy as np
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from financial_data.instrumentation import REGISTRY
+from financial_data.models import StockData
+from financial_data.response_cache import RESPONSE_CACHE
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        override = override_settings(MODEL_STORE_DIR=model_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(8).normal(0, 0.01, 80)))
+        start = date.today() - timedelta(days=80)
+        StockData.objects.bulk_create([
+            StockData(symbol='MSFT', date=start + timedelta(days=i), open_price=c, high_price=c, low_price=c,
+                      close_price=round(float(c), 2), volume=1000)
+            for i, c in enumerate(closes)
+        ])
+
+    def test_repeated_prediction_request_is_a_cache_lookup(self):
+        first = self.client.get('/api/predict/', {'symbol': 'MSFT'})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Cache'], 'miss')
+
+        hits = RESPONSE_CACHE.value(view='PredictionView', result='hit')
+        with mock.patch('financial_data.views.predict_price_series') as predict, self.assertNumQueries(2):
+            second = self.client.get('/api/predict/', {'symbol': 'MSFT'})
+        predict.assert_not_called()
+        self.assertEqual(second['X-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(RESPONSE_CACHE.value(view='PredictionView', result='hit'), hits + 1)
+        self.assertIn('financial_data_response_cache_hit_ratio', REGISTRY.render())
+
+        not_modified = self.client.get('/api/predict/', {'symbol': 'MSFT'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+    def test_price_write_invalidates_the_symbol(self):
+        self.client.get('/api/predict/', {'symbol': 'MSFT'})
+        bar = StockData.objects.filter(symbol='MSFT').order_by('date').first()
+        bar.close_price = 1
+        bar.save()
+
+        response = self.client.get('/api/predict/', {'symbol': 'MSFT'})
+        self.assertEqual(response['X-Cache'], 'miss')
+        self.assertEqual(self.client.get('/api/predict/', {'symbol': 'MSFT'})['X-Cache'], 'hit')
+
+    def test_errors_are_not_cached(self):
+        self.assertEqual(self.client.get('/api/predict/', {'symbol': 'NOPE'}).status_code, 400)
+        self.assertNotIn('X-Cache', self.client.get('/api/predict/', {'symbol': 'NOPE'}))
+
+    def test_intraday_is_cached_by_time(self):
+        payload = {'Meta Data': {'2. Symbol': 'MSFT'}}
+        with mock.patch('financial_data.views.get_intraday_data', return_value=payload) as fetch:
+            self.client.get('/api/intraday-data/MSFT/')
+            response = self.client.get('/api/intraday-data/MSFT/')
+            self.client.get('/api/intraday-data/AAPL/')
+        self.assertEqual(response.json(), payload)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_intraday_rate_limit_note_is_a_429_and_not_cached(self):
+        payload = {'Note': 'Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute.'}
+        with mock.patch('financial_data.views.get_intraday_data', return_value=payload) as fetch:
+            response = self.client.get('/api/intraday-data/MSFT/')
+            self.client.get('/api/intraday-data/MSFT/')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(fetch.call_count, 2)
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+import numpy as np
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from financial_data.models import StockData
+from financial_data.utils import screener
+from financial_data.utils.screener import PriceMatrix, sma_crossover, top_returns
+
+
+class ScreenerTestCase(SimpleTestCase):
+    def setUp(self):
+        days = 30
+        falling_then_jump = np.concatenate([np.linspace(20, 10, days - 1), [50.0]])
+        flat = np.full(days, 10.0)
+        rising = np.linspace(10, 20, days)
+        dates = np.datetime64('2024-01-01') + np.arange(days)
+        self.matrix = PriceMatrix(['JUMP', 'FLAT', 'RISE'], dates, np.vstack([falling_then_jump, flat, rising]))
+
+    def test_sma_crossover_on_last_bar(self):
+        crossed = sma_crossover(self.matrix, short_window=3, long_window=10)
+        self.assertEqual([row['symbol'] for row in crossed], ['JUMP'])
+        self.assertEqual(sma_crossover(self.matrix, short_window=3, long_window=10, offset=1), [])
+
+    def test_top_returns(self):
+        ranked = top_returns(self.matrix, period=29, limit=2)
+        self.assertEqual([row['symbol'] for row in ranked], ['JUMP', 'RISE'])
+        self.assertEqual([row['symbol'] for row in top_returns(self.matrix, period=29, symbols=['FLAT'])], ['FLAT'])
+
+    def test_from_arrays_forward_fills_gaps(self):
+        start = date(2024, 1, 1)
+        matrix = PriceMatrix.from_arrays(
+            ['A', 'A', 'B', 'B', 'B'],
+            [start, start + timedelta(days=2), start, start + timedelta(days=1), start + timedelta(days=2)],
+            [1.0, 3.0, 5.0, 6.0, 7.0],
+        )
+        np.testing.assert_array_equal(matrix.close[matrix.index['A']], [1.0, 1.0, 3.0])
+        self.assertEqual(matrix.as_of, start + timedelta(days=2))
+
+
+class UniverseMatrixTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        screener.invalidate_universe_matrix()
+        self.addCleanup(screener.invalidate_universe_matrix)
+
+    def _bar(self, symbol, day):
+        return StockData(symbol=symbol, date=date.today() - timedelta(days=day), open_price=1, high_price=1,
+                         low_price=1, close_price=1, volume=1)
+
+    def test_ingest_elsewhere_reloads_the_matrix(self):
+        StockData.objects.bulk_create([self._bar('AAA', day) for day in range(1, 6)])
+        self.assertEqual(screener.get_universe_matrix().symbols, ['AAA'])
+        StockData.objects.bulk_create([self._bar('BBB', day) for day in range(1, 6)])
+        self.assertEqual(screener.get_universe_matrix().symbols, ['AAA'])
+
+        # Another process's ingest only reaches this one through the shared cache stamp.
+        with mock.patch.object(screener, '_matrix_cache', dict(screener._matrix_cache)):
+            screener.invalidate_universe_matrix()
+        self.assertEqual(screener.get_universe_matrix().symbols, ['AAA', 'BBB'])
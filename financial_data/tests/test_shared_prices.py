@@ -0,0 +1,95 @@
+import os
+import tempfile
+from datetime import date
+from unittest import mock
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from financial_data.utils.shared_prices import SharedPriceReader, notify_ingested, publish
+
+
+class SharedPricesTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.override = override_settings(SHARED_PRICES_POINTER=os.path.join(self.tmpdir.name, 'pointer.json'))
+        self.override.enable()
+
+    def tearDown(self):
+        from multiprocessing import shared_memory
+        from financial_data.utils.shared_prices import _read_pointer, _pointer_path
+        pointer = _read_pointer(_pointer_path())
+        if pointer:
+            shm = shared_memory.SharedMemory(name=pointer['name'])
+            shm.close()
+            shm.unlink()
+        self.override.disable()
+        self.tmpdir.cleanup()
+
+    def series(self, closes):
+        dates = np.datetime64('2024-01-01') + np.arange(len(closes))
+        return dates, np.array(closes, dtype=float), np.full(len(closes), 1000.0)
+
+    def test_publish_and_read_views(self):
+        publish({'AAPL': self.series([1, 2, 3, 4]), 'MSFT': self.series([10, 20])})
+        reader = SharedPriceReader()
+
+        dates, close, volume = reader.get('AAPL', date(2024, 1, 2), date(2024, 1, 3))
+        np.testing.assert_array_equal(close, [2, 3])
+        self.assertEqual(dates[0], np.datetime64('2024-01-02'))
+        self.assertFalse(close.flags.writeable)
+        self.assertFalse(close.flags.owndata)
+
+        self.assertIsNone(reader.get('GOOG'))
+        self.assertEqual((reader.hits, reader.misses), (1, 1))
+
+    def test_swap_to_new_segment(self):
+        publish({'AAPL': self.series([1, 2])})
+        reader = SharedPriceReader()
+        self.assertTrue(reader.contains('AAPL'))
+
+        publish({'MSFT': self.series([5, 6, 7])})
+        os.utime(os.path.join(self.tmpdir.name, 'pointer.json'), ns=(1, 1))
+        self.assertFalse(reader.contains('AAPL'))
+        np.testing.assert_array_equal(reader.get('MSFT')[1], [5, 6, 7])
+
+    def test_empty_range_is_a_miss(self):
+        publish({'AAPL': self.series([1, 2, 3])})
+        reader = SharedPriceReader()
+        self.assertIsNone(reader.get('AAPL', date(2023, 1, 1), date(2023, 12, 31)))
+        self.assertEqual((reader.hits, reader.misses), (0, 1))
+
+    @mock.patch('financial_data.tasks.refresh_shared_prices.apply_async')
+    def test_ingest_sends_ranges_past_the_published_span_to_the_table(self, mock_refresh):
+        publish({'AAPL': self.series([1, 2, 3, 4])})
+        reader = SharedPriceReader()
+        self.assertIsNotNone(reader.get('AAPL', date(2023, 1, 1), date(2024, 12, 31)))
+
+        notify_ingested('AAPL')
+        notify_ingested('AAPL')
+        mock_refresh.assert_called_once()  # one rebuild for both ingests
+
+        # Rows may now exist before 2024-01-01 or after 2024-01-04 that the segment lacks.
+        self.assertIsNone(reader.get('AAPL', date(2023, 1, 1), date(2024, 1, 3)))
+        self.assertIsNone(reader.get('AAPL', date(2024, 1, 2), date(2024, 12, 31)))
+        np.testing.assert_array_equal(reader.get('AAPL', date(2024, 1, 2), date(2024, 1, 3))[1], [2, 3])
+
+        # A segment built after the ingest answers the whole range again.
+        publish({'AAPL': self.series([1, 2, 3, 4, 5])})
+        os.utime(os.path.join(self.tmpdir.name, 'pointer.json'), ns=(2, 2))
+        np.testing.assert_array_equal(reader.get('AAPL', date(2023, 1, 1), date(2024, 12, 31))[1], [1, 2, 3, 4, 5])
+
+    @mock.patch('financial_data.utils.shared_prices.publish_hot_symbols')
+    def test_refresh_keeps_publishing_pinned_symbols(self, mock_publish):
+        from financial_data.tasks import refresh_shared_prices
+        from financial_data.utils.shared_prices import pinned_symbols
+
+        publish({'AAPL': self.series([1, 2])})
+        self.assertIsNone(pinned_symbols())
+        refresh_shared_prices()
+        mock_publish.assert_called_with(None, pinned=False)
+
+        publish({'AAPL': self.series([1, 2]), 'TSLA': self.series([3])}, pinned=['AAPL', 'TSLA'])
+        self.assertEqual(pinned_symbols(), ['AAPL', 'TSLA'])
+        refresh_shared_prices()
+        mock_publish.assert_called_with(['AAPL', 'TSLA'], pinned=True)
@@ -0,0 +1,51 @@
+import json
+from datetime import date
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from financial_data.models import StockData
+from financial_data.utils.alpha_vantage_api import fetch_stock_data
+from financial_data.utils.stream_parser import iter_daily_bars, batched, UnexpectedPayload
+
+PAYLOAD = json.dumps({
+    'Meta Data': {'1. Information': 'Daily Prices', '2. Symbol': 'IBM'},
+    'Time Series (Daily)': {
+        '2024-01-04': {'1. open': '10.5', '2. high': '11.0', '3. low': '10.0', '4. close': '10.75', '5. volume': '300'},
+        '2024-01-03': {'1. open': '9.5', '2. high': '10.0', '3. low': '9.0', '4. close': '9.75', '5. volume': '200'},
+        '2024-01-02': {'1. open': '8.5', '2. high': '9.0', '3. low': '8.0', '4. close': '8.75', '5. volume': '100'},
+    }
+}, indent=4).encode()
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class StreamParserTestCase(SimpleTestCase):
+    def test_chunk_boundaries(self):
+        expected = list(iter_daily_bars([PAYLOAD], date(2024, 1, 1), date(2024, 12, 31)))
+        self.assertEqual(len(expected), 3)
+        for size in (1, 7, 64):
+            self.assertEqual(list(iter_daily_bars(split(PAYLOAD, size), date(2024, 1, 1), date(2024, 12, 31))), expected)
+
+    def test_range_filter(self):
+        bars = list(iter_daily_bars(split(PAYLOAD, 16), date(2024, 1, 3), date(2024, 1, 3)))
+        self.assertEqual(bars, [(date(2024, 1, 3), 9.5, 10.0, 9.0, 9.75, 200)])
+
+    def test_error_payload(self):
+        with self.assertRaises(UnexpectedPayload) as ctx:
+            list(iter_daily_bars([b'{"Note": "slow down"}'], date(2024, 1, 1), date(2024, 1, 2)))
+        self.assertEqual(ctx.exception.payload, {'Note': 'slow down'})
+
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+class FetchStockDataStreamingTestCase(TestCase):
+    @mock.patch('financial_data.utils.alpha_vantage_api.requests.get')
+    def test_fetch_stores_rows_in_range(self, mock_get):
+        mock_get.return_value.iter_content.return_value = split(PAYLOAD, 32)
+        fetch_stock_data('IBM', date(2024, 1, 3), date(2024, 1, 4))
+        self.assertEqual(
+            list(StockData.objects.filter(symbol='IBM').order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 3), date(2024, 1, 4)]
+        )
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
+from unittest import mock
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from financial_data.checks import check_shared_cache
+from financial_data.models import StockData
+from financial_data.progress import job_progress, read_progress
+from financial_data.streaming import FEED_KEY, IntradayHub, fetch_intraday_bars, intraday_stream, job_stream
+from financial_data.utils.alpha_vantage_api import QuotaExceeded
+from financial_data.utils.coverage import record_coverage
+
+
+class StubFeed:
+    """Local intraday feed: every poll publishes one more bar; counts upstream calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, symbol):
+        self.release.wait(5)
+        with self.lock:
+            self.calls += 1
+            return [{'timestamp': f'2024-01-02 10:{minute:02d}:00', 'close': 100.0 + minute}
+                    for minute in range(self.calls + 1)]
+
+
+def _frames(subscription, count, timeout=5):
+    frames = []
+    deadline = time.monotonic() + timeout
+    while len(frames) < count and time.monotonic() < deadline:
+        frame = subscription.get(timeout=0.1)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def _payload(frame):
+    data = next(line for line in frame.decode().splitlines() if line.startswith('data: '))
+    return json.loads(data[len('data: '):])
+
+
+class IntradayHubTestCase(SimpleTestCase):
+    def test_one_upstream_poll_serves_every_subscriber(self):
+        feed = StubFeed()
+        hub = IntradayHub(fetch=feed, interval=0.05)
+        subscriptions = [hub.subscribe('sim') for _ in range(5)]
+        self.assertEqual(hub.subscriber_count('SIM'), 5)
+        feed.release.set()
+
+        received = [_frames(subscription, 3) for subscription in subscriptions]
+        self.assertTrue(all(len(frames) == 3 for frames in received))
+        self.assertTrue(all(frames == received[0] for frames in received))
+        # The first event carries the initial bars, later ones only the new bar.
+        self.assertEqual([len(_payload(frame)['bars']) for frame in received[0]], [2, 1, 1])
+
+        polls = hub.polls['SIM']
+        self.assertEqual(polls, feed.calls)
+        self.assertLess(polls, 2 * 5)
+
+        # A late subscriber starts from the snapshot instead of waiting for a poll.
+        late = hub.subscribe('SIM')
+        snapshot = _payload(_frames(late, 1)[0])
+        self.assertGreaterEqual(len(snapshot['bars']), 4)
+
+        for subscription in subscriptions + [late]:
+            subscription.close()
+        self.assertEqual(hub.subscriber_count(), 0)
+        calls = feed.calls
+        time.sleep(0.2)
+        self.assertLessEqual(feed.calls, calls + 1)  # the poller stopped with its last subscriber
+
+    @override_settings(STREAM_HEARTBEAT_SECONDS=0.05, STREAM_MAX_SECONDS=5)
+    def test_stream_unsubscribes_when_closed(self):
+        feed = StubFeed()
+        feed.release.set()
+        hub = IntradayHub(fetch=feed, interval=10)
+        stream = intraday_stream('SIM', source=hub)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        self.assertEqual(hub.subscriber_count('SIM'), 1)
+        self.assertTrue(next(stream).startswith(b'event: bars'))
+        self.assertEqual(next(stream), b': keep-alive\n\n')
+        stream.close()
+        self.assertEqual(hub.subscriber_count('SIM'), 0)
+
+
+@override_settings(STREAM_JOB_POLL_SECONDS=0.01, STREAM_MAX_SECONDS=5)
+class IntradayFeedTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('financial_data.streaming.get_intraday_data', return_value={'Note': 'API call frequency exceeded'})
+    def test_rate_limit_note_is_not_shared_with_other_hubs(self, fetch):
+        with self.assertRaises(QuotaExceeded):
+            fetch_intraday_bars('SIM')
+        self.assertIsNone(cache.get(FEED_KEY.format('SIM')))
+
+
+class JobProgressTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_progress_events_end_with_the_job(self):
+        progress = job_progress('job-0001', 'backtest')
+        progress.stage('render', total=2)
+        progress.advance()
+        self.assertEqual(read_progress('job-0001')['done'], 1)
+        progress.finish({'reports': 2})
+
+        frames = list(job_stream('job-0001'))
+        self.assertTrue(frames[0].startswith(b'retry:'))
+        self.assertEqual(len(frames), 2)
+        state = _payload(frames[1])
+        self.assertEqual((state['status'], state['result']), ('done', {'reports': 2}))
+        with self.assertRaises(ValueError):
+            job_progress('../etc', 'backtest')
+
+    def test_backtest_reports_progress_to_subscribers(self):
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.02, 120)))
+        StockData.objects.bulk_create([
+            StockData(symbol='AAPL', date=date(2020, 1, 1) + timedelta(days=i), open_price=c, high_price=c,
+                      low_price=c, close_price=round(float(c), 4), volume=1000)
+            for i, c in enumerate(closes)
+        ])
+        record_coverage('AAPL', date(2020, 1, 1), date(2020, 12, 31))
+        seen = []
+        original = cache.set
+
+        def recording_set(key, value, *args, **kwargs):
+            if key.startswith('job_progress:'):
+                seen.append(value['stage'] if value['status'] == 'running' else value['status'])
+            return original(key, value, *args, **kwargs)
+
+        with mock.patch.object(cache, 'set', side_effect=recording_set):
+            response = self.client.post('/api/backtest/', {
+                'symbol': 'AAPL', 'start_date': '2020-01-01', 'end_date': '2020-04-01',
+                'initial_investment': 1000, 'short_window': 5, 'long_window': 20,
+            }, content_type='application/json', HTTP_X_JOB_ID='backtest-42')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(seen, [None, 'fetch', 'load', 'simulate', 'save', 'done'])
+
+        events = self.client.get('/api/jobs/backtest-42/events/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(events['Content-Type'], 'text/event-stream')
+        state = _payload(list(events.streaming_content)[-1])
+        self.assertEqual(state['result'], {'backtest_id': response.json()['backtest_id']})
+        self.assertEqual(self.client.get('/api/jobs/x/events/', HTTP_ACCEPT='text/event-stream').status_code, 400)
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+    @override_settings(DEBUG=False)
+    def test_deploy_check_warns_about_a_per_process_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['financial_data.W001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                              'LOCATION': 'redis://localhost:6379/1'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
@@ -1,13 +1,41 @@
+from django.conf import settings
 from django.urls import path
-from .views import BacktestView, PredictionView, ReportView, CompanyOverviewView, IntradayDataView, APIRootView, test_alpha_vantage, PredictionComparisonView
+from .views import BacktestView, AnalysisView, PredictionView, ReportView, ReportChartView, BatchReportView, CompanyOverviewView, IntradayDataView, APIRootView, test_alpha_vantage, PredictionComparisonView, MetricsView, ScreenerView, ProfileListView, ProfileDownloadView, IntradayStreamView, JobEventsView
+
+# Under ASGI (ASYNC_VIEWS) the I/O-bound endpoints are served by async views that hold no
+# thread while waiting on Alpha Vantage; everything else runs in Django's per-request thread.
+if settings.ASYNC_VIEWS:
+    from . import async_views
+    intraday_data = async_views.intraday_data
+    company_overview = async_views.company_overview
+    report_chart = async_views.report_chart
+    intraday_events = async_views.intraday_stream
+    job_events = async_views.job_events
+    test_alpha_vantage = async_views.test_alpha_vantage
+else:
+    intraday_data = IntradayDataView.as_view()
+    company_overview = CompanyOverviewView.as_view()
+    report_chart = ReportChartView.as_view()
+    intraday_events = IntradayStreamView.as_view()
+    job_events = JobEventsView.as_view()
 
 urlpatterns = [
     path('', APIRootView.as_view(), name='api-root'),
     path('backtest/', BacktestView.as_view(), name='backtest'),
+    path('analysis/', AnalysisView.as_view(), name='analysis'),
     path('predict/', PredictionView.as_view(), name='predict'),
     path('predict/compare/', PredictionComparisonView.as_view(), name='predict-compare'),
     path('report/', ReportView.as_view(), name='report'),
-    path('company-overview/<str:symbol>/', CompanyOverviewView.as_view(), name='company-overview'),
-    path('intraday-data/<str:symbol>/', IntradayDataView.as_view(), name='intraday-data'),
+    path('report/<int:backtest_id>/chart.png', report_chart, name='report-chart'),
+    path('report/batch/', BatchReportView.as_view(), name='report-batch'),
+    path('company-overview/', company_overview, name='company-overview-bulk'),
+    path('company-overview/<str:symbol>/', company_overview, name='company-overview'),
+    path('intraday-data/<str:symbol>/', intraday_data, name='intraday-data'),
+    path('metrics/', MetricsView.as_view(), name='metrics-summary'),
+    path('stream/intraday/<str:symbol>/', intraday_events, name='intraday-stream'),
+    path('jobs/<str:job_id>/events/', job_events, name='job-events'),
+    path('screener/', ScreenerView.as_view(), name='screener'),
+    path('profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('profiles/<str:name>/', ProfileDownloadView.as_view(), name='profile-download'),
     path('test-alpha-vantage/', test_alpha_vantage, name='test_alpha_vantage'),
 ]
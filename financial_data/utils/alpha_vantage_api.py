@@ -1,71 +1,209 @@
+import contextvars
 import requests
-from datetime import datetime
+from contextlib import closing, contextmanager
 from django.conf import settings
-from financial_data.models import StockData
+from financial_data.models import StockData, DataCoverage
+from datetime import timedelta
 import logging
-from .rate_limiter import rate_limit
+import time
+from financial_data.instrumentation import (
+    ALPHA_VANTAGE_BYTES, ALPHA_VANTAGE_QUOTA_HITS, ALPHA_VANTAGE_REQUESTS, ALPHA_VANTAGE_SECONDS
+)
+from .rate_limiter import rate_limit, record_call, seconds_until_reset, MINUTE, DAY
+from .stream_parser import iter_daily_bars, UnexpectedPayload, CHUNK_SIZE
+from .bulk_writer import bulk_upsert
+from .data_version import bump_data_version
+from .coverage import missing_spans, record_coverage, trading_days_since
+from .market_calendar import latest_complete_session, previous_trading_day
 from django.core.exceptions import PermissionDenied, ImproperlyConfigured
 from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = 'https://www.alphavantage.co/query'
+INGEST_BATCH_SIZE = 1000
+# Bars returned by outputsize=compact (with a margin for a bar published late).
+COMPACT_BARS = 95
+STOCK_DATA_UPDATE_FIELDS = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
 
-def fetch_stock_data(symbol, start_date, end_date):
+# Key for the per-minute/per-day call counters in rate_limiter.
+QUOTA_KEY = 'alpha_vantage'
+# Set for a day once Alpha Vantage reports the daily limit; calls fail fast until it expires.
+LIMIT_REACHED_KEY = 'api_limit_reached'
 
-    if cache.get('api_limit_reached'):
-        raise ValueError("Daily API limit reached. Please try again tomorrow.")
+_session = contextvars.ContextVar('alpha_vantage_session', default=None)
+
+
+class QuotaExceeded(ValueError):
+    """Alpha Vantage refused the call for quota reasons; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def quota_error(data, what):
+    """QuotaExceeded for a rate-limit response body, or None."""
+    if not isinstance(data, dict):
+        return None
+    if 'Information' in data and 'rate limit' in data['Information']:
+        return QuotaExceeded(f"Alpha Vantage daily limit reached while fetching {what}", seconds_until_reset(DAY))
+    if 'Note' in data or 'Information' in data:
+        return QuotaExceeded(f"Alpha Vantage per-minute limit reached while fetching {what}", seconds_until_reset(MINUTE))
+    return None
+
+
+@contextmanager
+def shared_session():
+    """Reuse one HTTP session (and its keep-alive connection) for every call in the block."""
+    with requests.Session() as session:
+        token = _session.set(session)
+        try:
+            yield session
+        finally:
+            _session.reset(token)
+
+def base_url():
+    # Overridable so benchmarks and load tests can point at a local stub server.
+    return getattr(settings, 'ALPHA_VANTAGE_BASE_URL', None) or BASE_URL
+
+def timeouts():
+    """(connect, read) timeouts in seconds for upstream calls."""
+    return (getattr(settings, 'ALPHA_VANTAGE_CONNECT_TIMEOUT', 5.0), getattr(settings, 'ALPHA_VANTAGE_TIMEOUT', 30.0))
+
+def _get(params, stream=False):
+    function = params['function']
+    started = time.perf_counter()
+    try:
+        record_call(QUOTA_KEY)
+        response = (_session.get() or requests).get(base_url(), params=params, stream=stream, timeout=timeouts())
+    except requests.exceptions.RequestException:
+        ALPHA_VANTAGE_REQUESTS.inc(function=function, status='error')
+        raise
+    finally:
+        ALPHA_VANTAGE_SECONDS.observe(time.perf_counter() - started, function=function)
+    ALPHA_VANTAGE_REQUESTS.inc(function=function, status=response.status_code)
+    if not stream:
+        ALPHA_VANTAGE_BYTES.inc(len(response.content), function=function)
+    return response
+
+def _counted(chunks, function):
+    for chunk in chunks:
+        ALPHA_VANTAGE_BYTES.inc(len(chunk), function=function)
+        yield chunk
+
+def _json(response, function):
+    data = response.json()
+    if isinstance(data, dict) and ('Note' in data or 'Information' in data):
+        ALPHA_VANTAGE_QUOTA_HITS.inc(function=function)
+    return data
+
+def fetch_stock_data(symbol, start_date, end_date, outputsize='full', require_data=True):
+    """Ingest daily bars for ``start_date``..``end_date`` and record the span as covered.
+
+    ``outputsize='compact'`` asks for only the latest 100 bars. With
+    ``require_data=False`` an empty range (e.g. before the symbol listed) is
+    recorded as covered instead of raising. Returns the number of rows stored.
+    """
+
+    if cache.get(LIMIT_REACHED_KEY):
+        raise QuotaExceeded("Daily API limit reached. Please try again tomorrow.", seconds_until_reset(DAY))
 
     params = {
         'function': 'TIME_SERIES_DAILY',
         'symbol': symbol,
         'apikey': settings.ALPHA_VANTAGE_API_KEY,
-        'outputsize': 'full'
+        'outputsize': outputsize
     }
+    latest = []
 
     try:
-        response = requests.get(BASE_URL, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'Information' in data and 'standard API rate limit' in data['Information']:
-            cache.set('api_limit_reached', True, 86400)  # Set for 24 hours
-            raise ValueError("API rate limit reached. Please try again tomorrow.")
-
-        if 'Time Series (Daily)' not in data:
-            logger.error(f"Unexpected response format for {symbol}: {data}")
-            raise ValueError(f"Failed to fetch data for {symbol}: Unexpected response format")
-
-        daily_data = data['Time Series (Daily)']
-        stock_data_list = []
-
-        for date_str, values in daily_data.items():
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            if start_date <= date <= end_date:
-                stock_data = StockData(
+        with closing(_get(params, stream=True)) as response:
+            response.raise_for_status()
+            chunks = _counted(response.iter_content(chunk_size=CHUNK_SIZE), params['function'])
+            bars = _track_latest(iter_daily_bars(chunks, start_date, end_date), latest)
+            stock_data = (
+                StockData(
                     symbol=symbol,
-                    date=date,
-                    open_price=float(values['1. open']),
-                    high_price=float(values['2. high']),
-                    low_price=float(values['3. low']),
-                    close_price=float(values['4. close']),
-                    volume=int(values['5. volume'])
+                    date=day,
+                    open_price=open_price,
+                    high_price=high_price,
+                    low_price=low_price,
+                    close_price=close_price,
+                    volume=volume
                 )
-                stock_data_list.append(stock_data)
+                for day, open_price, high_price, low_price, close_price, volume in bars
+            )
+            try:
+                stored = bulk_upsert(
+                    StockData, stock_data,
+                    unique_fields=['symbol', 'date'],
+                    update_fields=STOCK_DATA_UPDATE_FIELDS,
+                    batch_size=INGEST_BATCH_SIZE
+                )['rows']
+            except UnexpectedPayload as e:
+                data = e.payload
+                if 'Note' in data or 'Information' in data:
+                    ALPHA_VANTAGE_QUOTA_HITS.inc(function=params['function'])
+                if 'Information' in data and 'standard API rate limit' in data['Information']:
+                    cache.set(LIMIT_REACHED_KEY, True, 86400)  # Set for 24 hours
+                    raise QuotaExceeded("API rate limit reached. Please try again tomorrow.", seconds_until_reset(DAY))
+                quota = quota_error(data, symbol)
+                if quota is not None:
+                    raise quota
+                logger.error("Unexpected response format for %s: %s", symbol, data)
+                raise ValueError(f"Failed to fetch data for {symbol}: Unexpected response format")
 
-        if not stock_data_list:
+        if not stored and require_data:
             raise ValueError(f"No data found for symbol {symbol} between {start_date} and {end_date}")
 
-        StockData.objects.bulk_create(stock_data_list, ignore_conflicts=True)
-        logger.info(f"Successfully fetched and stored data for {symbol} from {start_date} to {end_date}")
+        covered_through = min(end_date, latest_complete_session())
+        if covered_through >= previous_trading_day(latest_complete_session()):
+            # Near the present only trust what was actually published; a late bar is fetched next time.
+            covered_through = min(covered_through, max(latest, default=start_date - timedelta(days=1)))
+        record_coverage(symbol, start_date, covered_through)
 
+        if stored:
+            logger.info("Successfully fetched and stored %s rows for %s from %s to %s", stored, symbol, start_date, end_date)
+            bump_data_version(symbol)
+            from .screener import invalidate_universe_matrix
+            from .shared_prices import notify_ingested
+            invalidate_universe_matrix()
+            notify_ingested(symbol)
+        return stored
+
+    except QuotaExceeded:
+        raise
     except requests.exceptions.RequestException as e:
-        logger.error(f"Request failed for {symbol}: {e}")
+        logger.error("Request failed for %s: %s", symbol, e)
         raise ValueError(f"Failed to fetch data for {symbol}: {str(e)}")
     except Exception as e:
-        logger.error(f"Unexpected error for {symbol}: {e}")
+        logger.error("Unexpected error for %s: %s", symbol, e)
         raise ValueError(f"Failed to fetch data for {symbol}: {str(e)}")
 
+def _track_latest(bars, latest):
+    # Remembers the newest bar date seen while the bars stream through.
+    for bar in bars:
+        if not latest or bar[0] > latest[0]:
+            latest[:] = [bar[0]]
+        yield bar
+
+def ensure_stock_data(symbol, start_date, end_date):
+    """Fetch only the trading days in the range that have not been ingested yet.
+
+    All missing spans are served by one Alpha Vantage call; 'compact' (latest 100
+    bars) is enough when they are all recent. Returns the number of rows stored.
+    """
+    missing = missing_spans(symbol, start_date, end_date)
+    if not missing:
+        return 0
+    start, end = missing[0][0], missing[-1][1]
+    outputsize = 'compact' if trading_days_since(start) <= COMPACT_BARS else 'full'
+    logger.debug("Fetching %s for %s (%s missing spans, %s)", symbol, (start, end), len(missing), outputsize)
+    # A symbol with other history may simply have no bars here (e.g. before it listed).
+    has_history = DataCoverage.objects.filter(symbol=symbol).exists()
+    return fetch_stock_data(symbol, start, end, outputsize=outputsize, require_data=not has_history)
+
 def get_company_overview(symbol):
     params = {
         'function': 'OVERVIEW',
@@ -74,11 +212,11 @@ def get_company_overview(symbol):
     }
 
     try:
-        response = requests.get(BASE_URL, params=params)
+        response = _get(params)
         response.raise_for_status()
-        return response.json()
+        return _json(response, params['function'])
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch company overview for {symbol}: {e}")
+        logger.error("Failed to fetch company overview for %s: %s", symbol, e)
         raise
 
 def get_intraday_data(symbol, interval='5min'):
@@ -90,13 +228,34 @@ def get_intraday_data(symbol, interval='5min'):
     }
 
     try:
-        response = requests.get(BASE_URL, params=params)
+        response = _get(params)
         response.raise_for_status()
-        return response.json()
+        return _json(response, params['function'])
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch intraday data for {symbol}: {e}")
+        logger.error("Failed to fetch intraday data for %s: %s", symbol, e)
         raise
 
+INTRADAY_FIELDS = (('1. open', 'open'), ('2. high', 'high'), ('3. low', 'low'),
+                   ('4. close', 'close'), ('5. volume', 'volume'))
+
+def intraday_columns(payload):
+    """An intraday payload as ascending timestamp and open/high/low/close/volume arrays.
+
+    Payloads without a time series (errors, quota notes) are returned unchanged.
+    """
+    key = next((key for key in payload if key.startswith('Time Series')), None)
+    if key is None:
+        return payload
+    import numpy as np
+
+    series = payload[key]
+    timestamps = sorted(series)
+    columns = {'timestamp': timestamps}
+    for field, name in INTRADAY_FIELDS:
+        columns[name] = np.fromiter((float(series[stamp][field]) for stamp in timestamps),
+                                    dtype=float, count=len(timestamps))
+    return {'meta_data': payload.get('Meta Data', {}), 'columns': columns}
+
 def setup_alpha_vantage_api():
     api_key = getattr(settings, 'ALPHA_VANTAGE_API_KEY', None)
     if not api_key:
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+import weakref
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from financial_data.instrumentation import ALPHA_VANTAGE_BYTES, ALPHA_VANTAGE_REQUESTS, ALPHA_VANTAGE_SECONDS
+from .alpha_vantage_api import LIMIT_REACHED_KEY, QUOTA_KEY, QuotaExceeded, _json, base_url, timeouts
+from .rate_limiter import DAY, arecord_call, seconds_until_reset
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per event loop: an httpx.AsyncClient's connections belong to the loop that opened them.
+_clients = weakref.WeakKeyDictionary()
+
+
+class _Client:
+    def __init__(self):
+        connect, read = timeouts()
+        max_connections = getattr(settings, 'ALPHA_VANTAGE_MAX_CONNECTIONS', 100)
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=getattr(settings, 'ALPHA_VANTAGE_MAX_KEEPALIVE', 20)),
+        )
+        # Callers beyond the pool size wait here rather than in httpcore, whose pool rescans
+        # every queued request whenever a connection frees up.
+        self.slots = asyncio.Semaphore(max_connections)
+
+
+def _client():
+    loop = asyncio.get_running_loop()
+    instance = _clients.get(loop)
+    if instance is None or instance.http.is_closed:
+        instance = _clients[loop] = _Client()
+    return instance
+
+
+async def aclose_client():
+    """Close the running loop's client, e.g. before a short-lived loop ends."""
+    instance = _clients.pop(asyncio.get_running_loop(), None)
+    if instance is not None:
+        await instance.http.aclose()
+
+
+async def _aget(params):
+    function = params['function']
+    if await cache.aget(LIMIT_REACHED_KEY):
+        raise QuotaExceeded("Daily API limit reached. Please try again tomorrow.", seconds_until_reset(DAY))
+    client = _client()
+    async with client.slots:
+        started = time.perf_counter()
+        try:
+            await arecord_call(QUOTA_KEY)
+            response = await client.http.get(base_url(), params=params)
+        except httpx.HTTPError:
+            ALPHA_VANTAGE_REQUESTS.inc(function=function, status='error')
+            raise
+        finally:
+            ALPHA_VANTAGE_SECONDS.observe(time.perf_counter() - started, function=function)
+    ALPHA_VANTAGE_REQUESTS.inc(function=function, status=response.status_code)
+    ALPHA_VANTAGE_BYTES.inc(len(response.content), function=function)
+    return response
+
+
+async def aget_company_overview(symbol):
+    params = {
+        'function': 'OVERVIEW',
+        'symbol': symbol,
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+    try:
+        response = await _aget(params)
+        response.raise_for_status()
+        return _json(response, params['function'])
+    except httpx.HTTPError as e:
+        logger.error("Failed to fetch company overview for %s: %s", symbol, e)
+        raise
+
+
+async def aget_intraday_data(symbol, interval='5min'):
+    params = {
+        'function': 'TIME_SERIES_INTRADAY',
+        'symbol': symbol,
+        'interval': interval,
+        'apikey': settings.ALPHA_VANTAGE_API_KEY
+    }
+    try:
+        response = await _aget(params)
+        response.raise_for_status()
+        return _json(response, params['function'])
+    except httpx.HTTPError as e:
+        logger.error("Failed to fetch intraday data for %s: %s", symbol, e)
+        raise
@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+import numpy as np
+from financial_data.models import BacktestResult, Prediction
+from financial_data.instrumentation import span
+from financial_data.progress import NO_PROGRESS
+from .backtesting import simulate_strategy
+from .ml_integration import update_predictions
+from .price_series import load_price_series
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _stage(timings, name, progress=NO_PROGRESS):
+    progress.stage(name)
+    started = time.perf_counter()
+    with span(f'analysis_{name}'):
+        yield
+    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def run_analysis(params, include_chart=True, progress=NO_PROGRESS):
+    """Backtest, predict, compare and chart one symbol/range from a single series load.
+
+    The series is read once and every stage works on the same arrays; predictions
+    are appended incrementally rather than refitted. Persists the BacktestResult and the predictions, and returns
+    all outputs together with per-stage timings in milliseconds. Each stage is
+    reported to ``progress`` as it starts.
+    """
+    symbol = params['symbol']
+    start_date = params['start_date']
+    end_date = params['end_date']
+    initial_investment = params['initial_investment']
+    short_window = params.get('short_window', 50)
+    long_window = params.get('long_window', 200)
+    timings = {}
+
+    with _stage(timings, 'load', progress):
+        dates, closes, _ = load_price_series(symbol, start_date, end_date)
+    if not len(dates):
+        raise ValueError(f"No data found for symbol {symbol} between {start_date} and {end_date}")
+
+    with _stage(timings, 'backtest', progress):
+        outcome = simulate_strategy(closes, initial_investment, short_window, long_window)
+        result = BacktestResult.objects.create(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            initial_investment=initial_investment,
+            final_value=outcome['final_value'],
+            total_return=outcome['total_return'],
+            max_drawdown=outcome['max_drawdown'],
+            num_trades=outcome['num_trades']
+        )
+
+    with _stage(timings, 'predict', progress):
+        # Appends only dates not predicted yet; a no-op when the symbol is current.
+        update_predictions(symbol)
+        rows = list(
+            Prediction.objects.filter(symbol=symbol, date__range=(start_date, end_date))
+            .order_by('date').values_list('date', 'predicted_price')
+        )
+        prediction_dates = np.array([day for day, _ in rows], dtype='datetime64[D]')
+        predicted = np.array([price for _, price in rows], dtype=float)
+    if not len(rows):
+        raise ValueError(f"No predictions available for {symbol} between {start_date} and {end_date}")
+
+    with _stage(timings, 'compare', progress):
+        _, predicted_idx, actual_idx = np.intersect1d(prediction_dates, dates, assume_unique=True, return_indices=True)
+        errors = predicted[predicted_idx] - closes[actual_idx]
+        mse = float((errors ** 2).mean())
+        mae = float(abs(errors).mean())
+
+    chart = None
+    if include_chart:
+        from .report_generation import render_chart
+        with _stage(timings, 'chart', progress):
+            chart = render_chart(symbol, dates, closes, prediction_dates, predicted)
+
+    timings['total'] = round(sum(timings.values()), 2)
+    logger.debug("Analysis for %s finished in %s ms", symbol, timings['total'])
+
+    return {
+        'backtest': {
+            'backtest_id': result.id,
+            'symbol': symbol,
+            'start_date': start_date,
+            'end_date': end_date,
+            'initial_investment': initial_investment,
+            'final_value': outcome['final_value'],
+            'total_return': outcome['total_return'],
+            'max_drawdown': outcome['max_drawdown'],
+            'num_trades': outcome['num_trades'],
+        },
+        'prediction': {
+            'count': len(predicted),
+            'first_date': prediction_dates[0].item(),
+            'last_date': prediction_dates[-1].item(),
+            'last_predicted_price': float(predicted[-1]),
+            'mse': mse,
+            'mae': mae,
+        },
+        'chart_image': chart,
+        'timings_ms': timings,
+    }
@@ -1,6 +1,6 @@
-import pandas as pd
-import numpy as np
-from financial_data.models import StockData, BacktestResult
+from financial_data.models import BacktestResult
+from financial_data.instrumentation import span
+from financial_data.progress import NO_PROGRESS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,7 +8,7 @@ logger = logging.getLogger(__name__)
 def calculate_moving_average(data, window):
     return data['close_price'].rolling(window=window).mean()
 
-def backtest_strategy(params):
+def backtest_strategy(params, progress=NO_PROGRESS):
     symbol = params['symbol']
     start_date = params['start_date']
     end_date = params['end_date']
@@ -16,61 +16,33 @@ def backtest_strategy(params):
     short_window = params.get('short_window', 50)
     long_window = params.get('long_window', 200)
 
-    
-    stock_data = StockData.objects.filter(
-        symbol=symbol,
-        date__range=(start_date, end_date)
-    ).order_by('date').values('date', 'close_price')
+    from .price_series import load_price_series
 
-    if not stock_data:
+    progress.stage('load')
+    dates, closes, _ = load_price_series(symbol, start_date, end_date)
+
+    if not len(dates):
         raise ValueError(f"No data found for symbol {symbol} between {start_date} and {end_date}")
 
-    # Convert to DataFrame
-    df = pd.DataFrame(stock_data)
-    df.set_index('date', inplace=True)
-
-    
-    df['SMA_short'] = df['close_price'].rolling(window=short_window).mean()
-    df['SMA_long'] = df['close_price'].rolling(window=long_window).mean()
-
-   
-    df['signal'] = np.where(df['SMA_short'] > df['SMA_long'], 1, 0)
-    df['position'] = df['signal'].diff()
-
-    position = 0
-    balance = initial_investment
-    trades = []
-
-    
-    for date, row in df.iterrows():
-        if row['position'] == 1:  # Buy signal
-            if balance > 0:
-                position = balance / row['close_price']
-                balance = 0
-                trades.append(('buy', date, row['close_price']))
-        elif row['position'] == -1:  # Sell signal
-            if position > 0:
-                balance = position * row['close_price']
-                position = 0
-                trades.append(('sell', date, row['close_price']))
-
-
-    final_value = balance + position * df['close_price'].iloc[-1]
-    total_return = ((final_value - initial_investment) / initial_investment * 100) if initial_investment != 0 else 0
-    max_drawdown = calculate_max_drawdown(df)
-    num_trades = len(trades)
-
-   
-    result = BacktestResult.objects.create(
-        symbol=symbol,
-        start_date=start_date,
-        end_date=end_date,
-        initial_investment=initial_investment,
-        final_value=final_value,
-        total_return=total_return,
-        max_drawdown=max_drawdown,
-        num_trades=num_trades
-    )
+    progress.stage('simulate')
+    outcome = simulate_strategy(closes, initial_investment, short_window, long_window)
+    final_value = outcome['final_value']
+    total_return = outcome['total_return']
+    max_drawdown = outcome['max_drawdown']
+    num_trades = outcome['num_trades']
+
+    progress.stage('save')
+    with span('db_write'):
+        result = BacktestResult.objects.create(
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            initial_investment=initial_investment,
+            final_value=final_value,
+            total_return=total_return,
+            max_drawdown=max_drawdown,
+            num_trades=num_trades
+        )
 
     return {
         'backtest_id': result.id,
@@ -84,6 +56,59 @@ def backtest_strategy(params):
         'num_trades': num_trades
     }
 
+def simulate_strategy(closes, initial_investment, short_window=50, long_window=200):
+    """Run the SMA crossover strategy over an array of closes.
+
+    Returns final_value, total_return, max_drawdown, num_trades and the trades
+    as (side, index, price) tuples.
+    """
+    import numpy as np
+    import pandas as pd
+
+    closes = np.asarray(closes, dtype=float)
+    with span('dataframe_build'):
+        series = pd.Series(closes)
+        sma_short = series.rolling(window=short_window).mean().to_numpy()
+        sma_long = series.rolling(window=long_window).mean().to_numpy()
+        signal = np.where(sma_short > sma_long, 1, 0)
+        # Only the bars where the signal flips can trade.
+        changes = np.flatnonzero(np.diff(signal)) + 1
+
+    with span('backtest_simulation'):
+        position = 0
+        balance = initial_investment
+        trades = []
+
+        for i in changes:
+            price = closes[i]
+            if signal[i] == 1:  # Buy signal
+                if balance > 0:
+                    position = balance / price
+                    balance = 0
+                    trades.append(('buy', int(i), price))
+            elif position > 0:  # Sell signal
+                balance = position * price
+                position = 0
+                trades.append(('sell', int(i), price))
+
+        final_value = float(balance + position * closes[-1])
+        total_return = ((final_value - initial_investment) / initial_investment * 100) if initial_investment != 0 else 0
+        max_drawdown = max_drawdown_pct(closes)
+
+    return {
+        'final_value': final_value,
+        'total_return': total_return,
+        'max_drawdown': max_drawdown,
+        'num_trades': len(trades),
+        'trades': trades,
+    }
+
+def max_drawdown_pct(closes):
+    import numpy as np
+
+    running_max = np.maximum.accumulate(closes)
+    return float(((closes - running_max) / running_max).min() * 100)
+
 def calculate_max_drawdown(df):
     df['cumulative_max'] = df['close_price'].cummax()
     df['drawdown'] = (df['close_price'] - df['cumulative_max']) / df['cumulative_max']
@@ -0,0 +1,249 @@
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import connections
+from financial_data.models import StockData, Prediction, BacktestResult
+from .report_generation import build_pdf, render_chart, report_metrics, report_templates, _pyplot
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def report_filename(job):
+    return f"{job['symbol']}_{job['backtest_id']}.pdf"
+
+
+def load_report_jobs(backtest_ids):
+    """Everything needed to render each report, as plain picklable data.
+
+    Prices and predictions are read once per symbol over the union of its
+    backtests' ranges and sliced per report. Returns ``(jobs, missing_ids)``.
+    """
+    backtest_ids = list(dict.fromkeys(int(i) for i in backtest_ids))
+    results = BacktestResult.objects.in_bulk(backtest_ids)
+    missing = [i for i in backtest_ids if i not in results]
+
+    by_symbol = {}
+    for result in results.values():
+        by_symbol.setdefault(result.symbol, []).append(result)
+
+    series = {}
+    for symbol, group in by_symbol.items():
+        span_range = (min(r.start_date for r in group), max(r.end_date for r in group))
+        prices = list(StockData.objects.filter(symbol=symbol, date__range=span_range)
+                      .order_by('date').values_list('date', 'close_price'))
+        predictions = list(Prediction.objects.filter(symbol=symbol, date__range=span_range)
+                           .order_by('date').values_list('date', 'predicted_price'))
+        series[symbol] = (_columns(prices), _columns(predictions))
+
+    jobs = []
+    for backtest_id in backtest_ids:
+        result = results.get(backtest_id)
+        if result is None:
+            continue
+        (dates, closes), (prediction_dates, predicted) = series[result.symbol]
+        lo, hi = _window(dates, result)
+        plo, phi = _window(prediction_dates, result)
+        jobs.append({
+            'backtest_id': result.id,
+            'symbol': result.symbol,
+            'metrics': report_metrics(result),
+            'dates': dates[lo:hi],
+            'actual': closes[lo:hi],
+            'prediction_dates': prediction_dates[plo:phi],
+            'predicted': predicted[plo:phi],
+        })
+    return jobs, missing
+
+
+def _columns(rows):
+    import numpy as np
+
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([])
+    dates, values = zip(*rows)
+    return np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=float)
+
+
+def _window(dates, result):
+    import numpy as np
+
+    bounds = np.array([result.start_date, result.end_date], dtype='datetime64[D]')
+    return np.searchsorted(dates, bounds[0], side='left'), np.searchsorted(dates, bounds[1], side='right')
+
+
+def render_job(job):
+    """Chart + PDF for one job; returns a result dict with the PDF bytes and timings in ms."""
+    started = time.perf_counter()
+    outcome = {'backtest_id': job['backtest_id'], 'symbol': job['symbol'], 'filename': report_filename(job),
+               'pdf': None, 'error': None, 'chart_ms': 0.0, 'pdf_ms': 0.0}
+    try:
+        chart_png = None
+        if len(job['dates']):
+            chart_png = render_chart(job['symbol'], job['dates'].astype(object), job['actual'],
+                                     job['prediction_dates'].astype(object), job['predicted'])
+        else:
+            logger.warning("No price data for backtest %s; report has no chart", job['backtest_id'])
+        charted = time.perf_counter()
+        outcome['pdf'] = build_pdf(job['symbol'], job['metrics'], chart_png).getvalue()
+        outcome['chart_ms'] = (charted - started) * 1000
+        outcome['pdf_ms'] = (time.perf_counter() - charted) * 1000
+    except Exception as e:
+        logger.error("Error rendering report for backtest %s: %s", job['backtest_id'], e)
+        outcome['error'] = f'{type(e).__name__}: {e}'
+    outcome['total_ms'] = (time.perf_counter() - started) * 1000
+    return outcome
+
+
+def _init_worker():
+    # Pay for the matplotlib/reportlab imports and the stylesheet once per worker.
+    _pyplot()
+    report_templates()
+
+
+def _new_pool(workers):
+    if not connections['default'].in_atomic_block:
+        # Forked children must not inherit (and later close) the parent's DB sockets.
+        connections.close_all()
+    context = multiprocessing.get_context(getattr(settings, 'REPORT_START_METHOD', None))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+
+
+def report_pool():
+    """``(pool, processes)`` for web requests' renders; ``(None, 0)`` when REPORT_POOL_PROCESSES is 0.
+
+    One pool per web process, started on first use, so concurrent batches queue
+    for its processes instead of each forking their own.
+    """
+    global _pool
+    workers = getattr(settings, 'REPORT_POOL_PROCESSES', 2)
+    if not workers:
+        return None, 0
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(workers)
+        return _pool, workers
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_reports(jobs, workers=None):
+    """Yield ``render_job`` results as they finish.
+
+    Jobs are rendered in a process pool (matplotlib and reportlab hold the GIL):
+    with ``workers``, a pool of that many processes started for this call;
+    without, the process-wide report_pool that concurrent requests share. At
+    most two jobs per worker are in flight so memory stays flat however large
+    the batch is.
+    """
+    pool = None
+    if workers is None and len(jobs) > 1:
+        pool, workers = report_pool()
+    workers = min(workers or 1, len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield render_job(job)
+        return
+
+    shared = pool is not None
+    if not shared:
+        pool = _new_pool(workers)
+    pending = iter(jobs)
+    in_flight = {pool.submit(render_job, job) for job in itertools.islice(pending, workers * 2)}
+    try:
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = next(pending, None)
+                if job is not None:
+                    in_flight.add(pool.submit(render_job, job))
+                yield future.result()
+    except BrokenProcessPool:
+        if shared:
+            _discard_pool(pool)
+        raise
+    finally:
+        # A client that disconnects mid-download leaves nothing queued behind it.
+        for future in in_flight:
+            future.cancel()
+        if not shared:
+            pool.shutdown()
+
+
+def _manifest_entry(outcome):
+    return {key: value for key, value in outcome.items() if key != 'pdf'}
+
+
+def _missing_entries(missing):
+    return [{'backtest_id': i, 'error': 'Backtest result not found'} for i in missing]
+
+
+def write_reports(results, directory, missing=()):
+    """Write each PDF and a manifest.json (per-report timings and errors) to ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for outcome in results:
+        if outcome['pdf'] is not None:
+            with open(os.path.join(directory, outcome['filename']), 'wb') as f:
+                f.write(outcome['pdf'])
+        manifest.append(_manifest_entry(outcome))
+    manifest.extend(_missing_entries(missing))
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable buffer that zipfile streams into."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(results, missing=()):
+    """Yield a ZIP archive chunk by chunk as reports finish; manifest.json comes last.
+
+    PDFs are already compressed, so entries are stored rather than deflated.
+    """
+    sink = _Sink()
+    manifest = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for outcome in results:
+            if outcome['pdf'] is not None:
+                archive.writestr(outcome['filename'], outcome['pdf'])
+            manifest.append(_manifest_entry(outcome))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        manifest.extend(_missing_entries(missing))
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    yield sink.drain()
@@ -0,0 +1,189 @@
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from financial_data.models import StockData
+from .features import align_market, market_symbol
+from .model_store import store_dir
+from .price_series import OHLCV_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state set by _init_worker: read-only views into the parent's memmaps.
+_worker = {}
+
+
+def training_symbols():
+    return list(StockData.objects.order_by('symbol').values_list('symbol', flat=True).distinct())
+
+
+def load_universe(symbols):
+    """One ordered scan of StockData for all ``symbols`` -> ``{symbol: (dates, columns)}``."""
+    wanted = set(symbols)
+    if market_symbol():
+        wanted.add(market_symbol())
+    rows = (
+        StockData.objects.filter(symbol__in=wanted)
+        .order_by('symbol', 'date')
+        .values_list('symbol', 'date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+    )
+    collected = {}
+    for symbol, *values in rows.iterator(chunk_size=10000):
+        collected.setdefault(symbol, []).append(values)
+    universe = {}
+    for symbol, values in collected.items():
+        columns = list(zip(*values))
+        universe[symbol] = (
+            np.array(columns[0], dtype='datetime64[D]'),
+            {column: np.array(col, dtype=float) for column, col in zip(OHLCV_COLUMNS, columns[1:])},
+        )
+    return universe
+
+
+def build_training_arrays(pipeline, symbols, universe, directory):
+    """Write every symbol's training rows into two .npy memmaps under ``directory``.
+
+    Returns ``(x_path, y_path, index)`` where ``index`` maps symbol to
+    ``(offset, rows, trained_through)``. Workers map the files instead of
+    receiving pickled arrays.
+    """
+    market = universe.get(market_symbol()) if pipeline.needs_market else None
+    sets = {}
+    for symbol in symbols:
+        if symbol not in universe:
+            continue
+        dates, data = universe[symbol]
+        data = dict(data)
+        if market is not None and symbol != market_symbol():
+            data['market_close'] = align_market(dates, market[0], market[1]['close'])
+        X, y, _ = pipeline.training_set(dates, data['close'], pipeline.build(data))
+        if len(X):
+            sets[symbol] = (X, y, dates[-1].item())
+
+    total = sum(len(y) for _, y, _ in sets.values())
+    x_path = os.path.join(directory, 'X.npy')
+    y_path = os.path.join(directory, 'y.npy')
+    X_all = np.lib.format.open_memmap(x_path, mode='w+', dtype=np.float64, shape=(max(total, 1), len(pipeline.features)))
+    y_all = np.lib.format.open_memmap(y_path, mode='w+', dtype=np.float64, shape=(max(total, 1),))
+    index = {}
+    offset = 0
+    for symbol, (X, y, trained_through) in sets.items():
+        X_all[offset:offset + len(y)] = X
+        y_all[offset:offset + len(y)] = y
+        index[symbol] = (offset, len(y), trained_through)
+        offset += len(y)
+    X_all.flush()
+    y_all.flush()
+    del X_all, y_all
+    return x_path, y_path, index
+
+
+def _init_worker(x_path, y_path, store_dir, estimator, features):
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # Spawned (not forked) workers start without Django configured.
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_analyzer.settings')
+        django.setup()
+    settings.MODEL_STORE_DIR = store_dir
+    _worker.update(
+        X=np.load(x_path, mmap_mode='r'),
+        y=np.load(y_path, mmap_mode='r'),
+        estimator=estimator,
+        features=features,
+    )
+
+
+def _train_shard(shard):
+    from .ml_integration import make_estimator
+    from .model_store import save_model
+
+    results = []
+    for symbol, offset, rows, trained_through in shard:
+        started = time.perf_counter()
+        try:
+            model = make_estimator(_worker['estimator'])
+            model.fit(_worker['X'][offset:offset + rows], _worker['y'][offset:offset + rows])
+            version = save_model(symbol, model, _worker['features'], trained_through)
+            results.append((symbol, version, None, time.perf_counter() - started))
+        except Exception as e:
+            results.append((symbol, None, f'{type(e).__name__}: {e}', time.perf_counter() - started))
+    return results
+
+
+def _run_pool(shards, workers, init_args):
+    start_method = getattr(settings, 'TRAINING_START_METHOD', None)
+    if multiprocessing.current_process().daemon:
+        # A Celery prefork child is daemonic, and the stdlib will not start
+        # processes from one; billiard (Celery's own fork of it) will.
+        import billiard
+        with billiard.get_context(start_method).Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            return [result for shard in pool.imap_unordered(_train_shard, shards) for result in shard]
+    context = multiprocessing.get_context(start_method)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=init_args) as pool:
+        futures = [pool.submit(_train_shard, shard) for shard in shards]
+        return [result for future in as_completed(futures) for result in future.result()]
+
+
+def train_symbols(symbols=None, workers=None, shard_size=None):
+    """Retrain many symbols' models in a process pool; returns a summary with symbols/sec.
+
+    The parent reads StockData once, builds every feature matrix and writes the
+    training rows to memory-mapped files; workers fit and publish models to the
+    per-symbol store (atomically, via save_model).
+    """
+    from .ml_integration import model_spec
+
+    started = time.perf_counter()
+    symbols = list(symbols) if symbols else training_symbols()
+    workers = workers or getattr(settings, 'TRAINING_WORKERS', None) or os.cpu_count() or 1
+    pipeline, estimator, features = model_spec()
+
+    directory = tempfile.mkdtemp(prefix='stock_analyzer_training_')
+    try:
+        universe = load_universe(symbols)
+        x_path, y_path, index = build_training_arrays(pipeline, symbols, universe, directory)
+        del universe
+        prepared = time.perf_counter()
+
+        jobs = [(symbol, *index[symbol]) for symbol in symbols if symbol in index]
+        shard_size = shard_size or max(1, math.ceil(len(jobs) / (workers * 4)))
+        shards = [jobs[i:i + shard_size] for i in range(0, len(jobs), shard_size)]
+
+        results = []
+        if shards:
+            if not connections['default'].in_atomic_block:
+                # Forked children must not inherit (and later close) the parent's DB sockets.
+                connections.close_all()
+            init_args = (x_path, y_path, store_dir(), estimator, features)
+            results = _run_pool(shards, min(workers, len(shards)), init_args)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    trained = {symbol: version for symbol, version, error, _ in results if error is None}
+    failed = {symbol: error for symbol, _, error, _ in results if error is not None}
+    skipped = [symbol for symbol in symbols if symbol not in index]
+    summary = {
+        'trained': len(trained),
+        'failed': failed,
+        'skipped': skipped,
+        'workers': workers,
+        'prepare_seconds': prepared - started,
+        'seconds': elapsed,
+        'symbols_per_second': len(trained) / elapsed if elapsed else 0.0,
+        'features': features,
+    }
+    logger.info(
+        "Trained %s models (%s failed, %s skipped) in %.1fs with %s workers: %.1f symbols/s",
+        summary['trained'], len(failed), len(skipped), elapsed, workers, summary['symbols_per_second']
+    )
+    return summary
@@ -0,0 +1,88 @@
+import csv
+import io
+import logging
+import time
+import uuid
+from django.db import connections, router, transaction
+from .stream_parser import batched
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _copy_upsert(connection, model, objs, unique_fields, update_fields, batch_size):
+    table = connection.ops.quote_name(model._meta.db_table)
+    temp_table = connection.ops.quote_name(f"tmp_upsert_{uuid.uuid4().hex[:12]}")
+    fields = [model._meta.get_field(name) for name in unique_fields + update_fields]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    conflict = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in unique_fields)
+    updates = [connection.ops.quote_name(model._meta.get_field(name).column) for name in update_fields]
+    assignments = ', '.join(f"{col} = EXCLUDED.{col}" for col in updates)
+    # Skip rows whose values did not change so they are not rewritten.
+    changed = ' OR '.join(f"{table}.{col} IS DISTINCT FROM EXCLUDED.{col}" for col in updates)
+
+    rows = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        for batch in batched(objs, batch_size):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obj in batch:
+                writer.writerow([
+                    field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields
+                ])
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {temp_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            rows += len(batch)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {temp_table} "
+            f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments} WHERE {changed}"
+        )
+    return rows
+
+
+def _bulk_create_upsert(connection, model, objs, unique_fields, update_fields, batch_size):
+    rows = 0
+    for batch in batched(objs, batch_size):
+        model._default_manager.using(connection.alias).bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+            batch_size=batch_size,
+        )
+        rows += len(batch)
+    return rows
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=DEFAULT_BATCH_SIZE, using=None):
+    """Insert or update ``objs`` in one transaction.
+
+    On PostgreSQL rows are streamed with COPY into a temp table and merged with
+    INSERT ... ON CONFLICT DO UPDATE; elsewhere batched bulk_create with
+    update_conflicts is used. ``objs`` may be any iterable, including a generator.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    started = time.perf_counter()
+
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            method = 'copy'
+            rows = _copy_upsert(connection, model, objs, list(unique_fields), list(update_fields), batch_size)
+        else:
+            method = 'bulk_create'
+            rows = _bulk_create_upsert(connection, model, objs, list(unique_fields), list(update_fields), batch_size)
+
+    seconds = time.perf_counter() - started
+    rows_per_second = rows / seconds if seconds > 0 else 0.0
+    logger.info("Upserted %s %s rows via %s in %.3fs (%.0f rows/s)", rows, model.__name__, method, seconds, rows_per_second)
+    return {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows_per_second,
+        'method': method,
+    }
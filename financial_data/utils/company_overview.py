@@ -0,0 +1,170 @@
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from financial_data.models import CompanyOverview
+from financial_data.serializers import CompanyOverviewSerializer
+from .alpha_vantage_api import get_company_overview, quota_error
+
+logger = logging.getLogger(__name__)
+
+OVERVIEW_KEY = 'company_overview:{}'
+MISSING_KEY = 'company_overview:missing:{}'
+REFRESH_LOCK_KEY = 'company_overview:refreshing:{}'
+
+
+def _fresh_seconds():
+    return getattr(settings, 'COMPANY_OVERVIEW_TTL', 86400)
+
+
+def _stale_seconds():
+    return getattr(settings, 'COMPANY_OVERVIEW_STALE_TTL', 7 * 86400)
+
+
+def _negative_seconds():
+    return getattr(settings, 'COMPANY_OVERVIEW_NEGATIVE_TTL', 3600)
+
+
+def _number(value, cast=float):
+    """``value`` as a number, or None for Alpha Vantage's "None"/"-" placeholders and blanks."""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def overview_defaults(overview):
+    return {
+        'name': overview.get('Name'),
+        'description': overview.get('Description'),
+        'exchange': overview.get('Exchange'),
+        'currency': overview.get('Currency'),
+        'country': overview.get('Country'),
+        'sector': overview.get('Sector'),
+        'industry': overview.get('Industry'),
+        'market_capitalization': _number(overview.get('MarketCapitalization'), int) or 0,
+        'pe_ratio': _number(overview.get('PERatio')),
+        'dividend_yield': _number(overview.get('DividendYield')),
+        'beta': _number(overview.get('Beta')),
+        'fifty_two_week_high': _number(overview.get('52WeekHigh')) or 0.0,
+        'fifty_two_week_low': _number(overview.get('52WeekLow')) or 0.0,
+    }
+
+
+def _cache_entry(company):
+    return {
+        'data': dict(CompanyOverviewSerializer(company).data),
+        'updated_at': company.updated_at.timestamp(),
+    }
+
+
+def store_company_overview(symbol, overview):
+    """Persist a raw OVERVIEW payload; returns None when the symbol is unknown."""
+    symbol = symbol.upper()
+    quota = quota_error(overview, f"overview for {symbol}")
+    if quota is not None:
+        raise quota
+    if not overview.get('Symbol'):
+        # Alpha Vantage answers unknown symbols with an empty object.
+        cache.set(MISSING_KEY.format(symbol), True, _negative_seconds())
+        cache.delete(REFRESH_LOCK_KEY.format(symbol))
+        return None
+
+    company, _ = CompanyOverview.objects.update_or_create(symbol=symbol, defaults=overview_defaults(overview))
+    entry = _cache_entry(company)
+    cache.set(OVERVIEW_KEY.format(symbol), entry, _stale_seconds())
+    cache.delete(MISSING_KEY.format(symbol))
+    cache.delete(REFRESH_LOCK_KEY.format(symbol))
+    return entry['data']
+
+
+def schedule_refresh(symbol):
+    if not cache.add(REFRESH_LOCK_KEY.format(symbol), True, 300):
+        return
+    from financial_data.tasks import update_company_overview
+    try:
+        update_company_overview.delay(symbol)
+    except Exception as e:
+        cache.delete(REFRESH_LOCK_KEY.format(symbol))
+        logger.warning("Could not schedule company overview refresh for %s: %s", symbol, e)
+
+
+def load_company_overview(symbol):
+    """Read-through lookup: cache, then the CompanyOverview table, then Alpha Vantage.
+
+    Stale entries are returned immediately while a background refresh is queued.
+    Returns None for symbols Alpha Vantage does not know.
+    """
+    symbol = symbol.upper()
+    if cache.get(MISSING_KEY.format(symbol)):
+        return None
+
+    entry = cache.get(OVERVIEW_KEY.format(symbol))
+    if entry is None:
+        company = CompanyOverview.objects.filter(symbol=symbol).first()
+        if company is None:
+            return store_company_overview(symbol, get_company_overview(symbol))
+        entry = _cache_entry(company)
+        cache.set(OVERVIEW_KEY.format(symbol), entry, _stale_seconds())
+
+    if time.time() - entry['updated_at'] > _fresh_seconds():
+        schedule_refresh(symbol)
+    return entry['data']
+
+
+async def aload_company_overview(symbol):
+    """load_company_overview() for async views: the upstream call does not hold a thread."""
+    from .alpha_vantage_async import aget_company_overview
+
+    symbol = symbol.upper()
+    if await cache.aget(MISSING_KEY.format(symbol)):
+        return None
+
+    entry = await cache.aget(OVERVIEW_KEY.format(symbol))
+    if entry is None:
+        company = await CompanyOverview.objects.filter(symbol=symbol).afirst()
+        if company is None:
+            overview = await aget_company_overview(symbol)
+            return await sync_to_async(store_company_overview)(symbol, overview)
+        entry = _cache_entry(company)
+        await cache.aset(OVERVIEW_KEY.format(symbol), entry, _stale_seconds())
+
+    if time.time() - entry['updated_at'] > _fresh_seconds():
+        await sync_to_async(schedule_refresh)(symbol)
+    return entry['data']
+
+
+def load_company_overviews(symbols):
+    """Bulk lookup served from cache plus a single table query.
+
+    Symbols with no stored overview are returned in ``missing`` and queued for a
+    background fetch rather than fetched inline.
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    cached = cache.get_many([OVERVIEW_KEY.format(symbol) for symbol in symbols])
+    entries = {symbol: cached[OVERVIEW_KEY.format(symbol)] for symbol in symbols if OVERVIEW_KEY.format(symbol) in cached}
+
+    pending = [symbol for symbol in symbols if symbol not in entries]
+    if pending:
+        loaded = {}
+        for company in CompanyOverview.objects.filter(symbol__in=pending):
+            loaded[company.symbol] = _cache_entry(company)
+        if loaded:
+            cache.set_many({OVERVIEW_KEY.format(symbol): entry for symbol, entry in loaded.items()}, _stale_seconds())
+        entries.update(loaded)
+
+    now = time.time()
+    results = []
+    missing = []
+    for symbol in symbols:
+        entry = entries.get(symbol)
+        if entry is None:
+            missing.append(symbol)
+            if not cache.get(MISSING_KEY.format(symbol)):
+                schedule_refresh(symbol)
+            continue
+        if now - entry['updated_at'] > _fresh_seconds():
+            schedule_refresh(symbol)
+        results.append(entry['data'])
+    return results, missing
@@ -0,0 +1,90 @@
+import logging
+from django.db import transaction
+from financial_data.models import DataCoverage, StockData
+from .market_calendar import (
+    calendar_for, count_trading_days, latest_complete_session, next_trading_day, previous_trading_day,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _bootstrap(symbol):
+    """Derive spans from stored bars for symbols ingested before coverage was tracked."""
+    dates = list(StockData.objects.filter(symbol=symbol).order_by('date').values_list('date', flat=True))
+    if not dates:
+        return []
+    import numpy as np
+
+    days = np.array(dates, dtype='datetime64[D]')
+    # A run breaks wherever a trading day is missing between two stored bars.
+    gaps = np.busday_count(days[:-1] + 1, days[1:], busdaycal=calendar_for(dates[0], dates[-1])) > 0
+    breaks = np.flatnonzero(gaps)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(days) - 1]))
+    spans = [(dates[s], dates[e]) for s, e in zip(starts, ends)]
+    DataCoverage.objects.bulk_create([DataCoverage(symbol=symbol, start_date=s, end_date=e) for s, e in spans])
+    logger.debug("Bootstrapped %s coverage spans for %s from stored bars", len(spans), symbol)
+    return spans
+
+
+def covered_spans(symbol):
+    """Ingested ``(start, end)`` spans for ``symbol``, ordered by start."""
+    spans = list(
+        DataCoverage.objects.filter(symbol=symbol).order_by('start_date').values_list('start_date', 'end_date')
+    )
+    return spans or _bootstrap(symbol)
+
+
+def _trim(start, end):
+    """Shrink a span to its first and last trading days; None when it holds none."""
+    start, end = next_trading_day(start, include=True), previous_trading_day(end, include=True)
+    return (start, end) if start <= end else None
+
+
+def missing_spans(symbol, start_date, end_date, now=None):
+    """Trading-day spans within ``start_date``..``end_date`` that have not been ingested.
+
+    The end is clipped to the latest session whose bar should be published, and
+    weekends and exchange holidays never count as gaps.
+    """
+    span = _trim(start_date, min(end_date, latest_complete_session(now)))
+    if span is None:
+        return []
+    start, end = span
+    missing = []
+    cursor = start
+    for covered_start, covered_end in covered_spans(symbol):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, previous_trading_day(covered_start)))
+        cursor = next_trading_day(covered_end)
+    if cursor <= end:
+        missing.append((cursor, end))
+    return [span for span in (_trim(s, e) for s, e in missing) if span]
+
+
+def record_coverage(symbol, start_date, end_date):
+    """Mark ``start_date``..``end_date`` as ingested, merging with overlapping or adjacent spans."""
+    span = _trim(start_date, end_date)
+    if span is None:
+        return
+    start, end = span
+    with transaction.atomic():
+        covered_spans(symbol)  # make sure pre-existing bars are represented first
+        touching = list(
+            DataCoverage.objects.select_for_update().filter(
+                symbol=symbol, start_date__lte=next_trading_day(end), end_date__gte=previous_trading_day(start)
+            )
+        )
+        for existing in touching:
+            start, end = min(start, existing.start_date), max(end, existing.end_date)
+        DataCoverage.objects.filter(id__in=[existing.id for existing in touching]).delete()
+        DataCoverage.objects.create(symbol=symbol, start_date=start, end_date=end)
+
+
+def trading_days_since(day, now=None):
+    """Trading days from ``day`` through the latest complete session."""
+    return count_trading_days(day, latest_complete_session(now))
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db.models import Count, Max
+from financial_data.models import StockData, PredictionCursor
+
+DATA_VERSION_KEY = 'data_version:{}'
+
+
+def bump_data_version(symbol):
+    """Mark ``symbol``'s price history as changed, e.g. after an ingest that may rewrite existing bars."""
+    key = DATA_VERSION_KEY.format(symbol)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def data_version(symbol):
+    """Version string that changes whenever ``symbol``'s StockData changes.
+
+    Row count and latest date catch appends made by any writer; the ingest
+    counter catches in-place corrections written through fetch_stock_data.
+    """
+    stats = StockData.objects.filter(symbol=symbol).aggregate(rows=Count('id'), latest=Max('date'))
+    return f"{stats['rows']}-{stats['latest']}-{cache.get(DATA_VERSION_KEY.format(symbol), 0)}"
+
+
+def symbol_version(symbol):
+    """data_version plus the prediction cursor: changes on any price or prediction write for ``symbol``."""
+    cursor = PredictionCursor.objects.filter(symbol=symbol).values_list('model_version', 'last_date').first()
+    return f"{data_version(symbol)}/{cursor[0]}@{cursor[1]}" if cursor else f"{data_version(symbol)}/-"
@@ -0,0 +1,248 @@
+import hashlib
+import logging
+from datetime import date
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from django.conf import settings
+from django.core.cache import cache
+from financial_data.instrumentation import span
+from .data_version import data_version
+from .price_series import EARLIEST_DATE, load_ohlcv, load_price_series
+
+logger = logging.getLogger(__name__)
+
+FEATURE_CACHE_KEY = 'features:{}:{}:{}'
+
+
+def _rolling(values, window, reducer):
+    """Apply ``reducer`` over trailing windows; the first ``window - 1`` rows are NaN."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = reducer(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def _shift(values, periods):
+    out = np.full(len(values), np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+class Feature:
+    """One column of the feature matrix, computed from data up to and including each bar.
+
+    ``window`` is the number of bars (including the current one) needed for a value.
+    """
+    window = 1
+
+    def compute(self, data):
+        raise NotImplementedError
+
+    def __repr__(self):
+        args = ', '.join(f'{key}={value!r}' for key, value in sorted(vars(self).items()))
+        return f'{type(self).__name__}({args})'
+
+
+class Lag(Feature):
+    def __init__(self, column, periods):
+        self.column = column
+        self.periods = periods
+        self.window = periods + 1
+
+    @property
+    def name(self):
+        return f'{self.column}_lag{self.periods}'
+
+    def compute(self, data):
+        return _shift(data[self.column], self.periods)
+
+
+class PctChange(Feature):
+    def __init__(self, column, periods=1):
+        self.column = column
+        self.periods = periods
+        self.window = periods + 1
+
+    @property
+    def name(self):
+        return f'{self.column}_pct{self.periods}'
+
+    def compute(self, data):
+        values = data[self.column]
+        return values / _shift(values, self.periods) - 1
+
+
+class RelativeToMean(Feature):
+    """Value relative to its trailing mean, e.g. price vs. moving average or volume surge."""
+
+    def __init__(self, column, window):
+        self.column = column
+        self.window = window
+
+    @property
+    def name(self):
+        return f'{self.column}_vs_ma{self.window}'
+
+    def compute(self, data):
+        values = data[self.column]
+        return values / _rolling(values, self.window, np.mean) - 1
+
+
+class Volatility(Feature):
+    """Trailing standard deviation of daily log returns."""
+
+    def __init__(self, days):
+        self.days = days
+        self.window = days + 1
+
+    @property
+    def name(self):
+        return f'volatility{self.days}'
+
+    def compute(self, data):
+        returns = np.full(len(data['close']), np.nan)
+        returns[1:] = np.diff(np.log(data['close']))
+        return _rolling(returns, self.days, np.std)
+
+
+class Range(Feature):
+    """Intraday high-low range relative to the close."""
+    name = 'range'
+
+    def compute(self, data):
+        return (data['high'] - data['low']) / data['close']
+
+
+class Body(Feature):
+    """Open-to-close move of the bar."""
+    name = 'body'
+
+    def compute(self, data):
+        return data['close'] / data['open'] - 1
+
+
+class MarketReturn(Feature):
+    """Return of the market benchmark (FEATURE_MARKET_SYMBOL) over the same bars; 0 when unavailable."""
+
+    def __init__(self, periods=1):
+        self.periods = periods
+        self.window = periods + 1
+
+    @property
+    def name(self):
+        return f'market_pct{self.periods}'
+
+    def compute(self, data):
+        market = data.get('market_close')
+        if market is None:
+            return np.zeros(len(data['close']))
+        values = market / _shift(market, self.periods) - 1
+        return np.where(np.isfinite(values), values, 0.0)
+
+
+class FeaturePipeline:
+    """Declarative list of features built into one (bars x features) matrix.
+
+    Row ``t`` only uses data up to bar ``t``, so it is used to predict the close
+    of bar ``t + 1``. ``version`` changes whenever the declaration does.
+    """
+
+    def __init__(self, name, features):
+        self.name = name
+        self.features = list(features)
+        self.window = max(feature.window for feature in self.features)
+        self.needs_market = any(isinstance(feature, MarketReturn) for feature in self.features)
+        self.columns = [feature.name for feature in self.features]
+        digest = hashlib.sha1(repr(self.features).encode()).hexdigest()[:8]
+        self.version = f'{name}-{digest}'
+
+    def build(self, data):
+        with span('feature_build'):
+            matrix = np.empty((len(data['close']), len(self.features)))
+            for i, feature in enumerate(self.features):
+                matrix[:, i] = feature.compute(data)
+        return matrix
+
+    def load(self, symbol, start_date, end_date):
+        """Read the inputs for ``symbol`` and return ``(dates, close, features)``."""
+        dates, data = load_ohlcv(symbol, start_date, end_date)
+        if self.needs_market and len(dates):
+            data['market_close'] = _aligned_market(symbol, dates)
+        return dates, data['close'], self.build(data) if len(dates) else np.empty((0, len(self.features)))
+
+    def training_set(self, dates, close, features):
+        """Pair each complete feature row with the next bar's close."""
+        X, y, target_dates = features[:-1], close[1:], dates[1:]
+        valid = np.isfinite(X).all(axis=1)
+        return X[valid], y[valid], target_dates[valid]
+
+
+def align_market(dates, market_dates, market_close):
+    """Market close as of each of ``dates`` (last bar on or before it); NaN before the first."""
+    if market_dates is None or not len(market_dates):
+        return None
+    idx = np.searchsorted(market_dates, dates, side='right') - 1
+    return np.where(idx >= 0, market_close[np.maximum(idx, 0)], np.nan)
+
+
+def market_symbol():
+    return getattr(settings, 'FEATURE_MARKET_SYMBOL', 'SPY')
+
+
+def _aligned_market(symbol, dates):
+    if not market_symbol() or market_symbol() == symbol:
+        return None
+    # A few extra days so the first bar has a previous market close to compare with.
+    market_dates, market_close, _ = load_price_series(
+        market_symbol(), (dates[0] - np.timedelta64(10, 'D')).item(), dates[-1].item()
+    )
+    return align_market(dates, market_dates, market_close)
+
+
+PIPELINES = {
+    # The original model: the last five closes.
+    'lag5': FeaturePipeline('lag5', [Lag('close', k) for k in range(5)]),
+    'extended': FeaturePipeline('extended', [
+        *(Lag('close', k) for k in range(5)),
+        PctChange('close', 1),
+        PctChange('close', 5),
+        RelativeToMean('close', 5),
+        RelativeToMean('close', 20),
+        Volatility(20),
+        Range(),
+        Body(),
+        RelativeToMean('volume', 20),
+        MarketReturn(1),
+    ]),
+}
+
+
+def get_pipeline(name=None):
+    name = name or getattr(settings, 'PREDICTION_FEATURES', 'extended')
+    try:
+        return PIPELINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown feature pipeline '{name}'; expected one of {', '.join(PIPELINES)}")
+
+
+def feature_matrix(symbol, pipeline=None):
+    """Full-history ``(dates, close, features)`` for ``symbol``, cached per data version.
+
+    The cache key includes the pipeline version and the symbol's (and, for
+    cross-asset pipelines, the market symbol's) data version, so any ingest or
+    declaration change produces a fresh matrix.
+    """
+    pipeline = pipeline or get_pipeline()
+    version = data_version(symbol)
+    if pipeline.needs_market:
+        version += '/' + data_version(market_symbol())
+    key = FEATURE_CACHE_KEY.format(pipeline.version, symbol, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = pipeline.load(symbol, EARLIEST_DATE, date.today())
+    cache.set(key, result, getattr(settings, 'FEATURE_CACHE_TTL', 3600))
+    logger.debug("Built %s feature matrix for %s: %s rows", pipeline.version, symbol, len(result[0]))
+    return result
@@ -0,0 +1,130 @@
+import functools
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo('America/New_York')
+# Alpha Vantage publishes the daily bar shortly after the 16:00 close.
+DAILY_BAR_READY = time(16, 30)
+
+# Unscheduled NYSE closures (weather, national days of mourning, 9/11).
+SPECIAL_CLOSURES = {
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+}
+
+
+def _nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    last = date(year, month + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    # Anonymous Gregorian algorithm.
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(day):
+    # Saturday holidays are observed on Friday, Sunday holidays on Monday.
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@functools.lru_cache(maxsize=None)
+def holidays(year):
+    """NYSE full-day holidays observed in ``year``."""
+    days = {
+        _nth_weekday(year, 2, 0, 3),      # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),        # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),      # Labor Day
+        _nth_weekday(year, 11, 3, 4),     # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    # New Year's Day falling on a Saturday is not observed on the preceding Friday.
+    if date(year, 1, 1).weekday() != 5:
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 1998:
+        days.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days.update(day for day in SPECIAL_CLOSURES if day.year == year)
+    return frozenset(days)
+
+
+@functools.lru_cache(maxsize=64)
+def _calendar(first_year, last_year):
+    import numpy as np
+
+    closed = sorted(day for year in range(first_year, last_year + 1) for day in holidays(year))
+    return np.busdaycalendar(holidays=np.array(closed, dtype='datetime64[D]'))
+
+
+def calendar_for(start, end):
+    """numpy busdaycalendar covering ``start``..``end`` (padded a year either side for offsets)."""
+    return _calendar(start.year - 1, end.year + 1)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def trading_days(start, end):
+    """Trading days in ``start``..``end`` inclusive, as datetime64[D]."""
+    import numpy as np
+
+    if end < start:
+        return np.array([], dtype='datetime64[D]')
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    return days[np.is_busday(days, busdaycal=calendar_for(start, end))]
+
+
+def count_trading_days(start, end):
+    """Number of trading days in ``start``..``end`` inclusive."""
+    import numpy as np
+
+    if end < start:
+        return 0
+    return int(np.busday_count(start, end + timedelta(days=1), busdaycal=calendar_for(start, end)))
+
+
+def next_trading_day(day, include=False):
+    """First trading day after ``day`` (or on it, with ``include``)."""
+    day = day if include else day + timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def previous_trading_day(day, include=False):
+    """Last trading day before ``day`` (or on it, with ``include``)."""
+    day = day if include else day - timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def latest_complete_session(now=None):
+    """Most recent trading day whose daily bar should be published by ``now``."""
+    now = (now or datetime.now(EXCHANGE_TZ)).astimezone(EXCHANGE_TZ)
+    today = now.date()
+    return previous_trading_day(today, include=now.time() >= DAILY_BAR_READY)
@@ -0,0 +1,209 @@
+import logging
+from datetime import date
+import numpy as np
+from django.conf import settings
+from django.db import connections, router
+from financial_data.models import StockData, Prediction
+from financial_data.instrumentation import span
+from .price_series import load_prediction_series, load_price_series
+
+logger = logging.getLogger(__name__)
+
+# Columns are multiplied by 1.0 so SQLite divides decimals stored as integers as floats.
+DRAWDOWN_SQL = """
+WITH series AS (
+    SELECT symbol, date, close_price * 1.0 AS close,
+           MAX(close_price * 1.0) OVER (
+               PARTITION BY symbol ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+           ) AS running_max,
+           FIRST_VALUE(close_price * 1.0) OVER (PARTITION BY symbol ORDER BY date) AS first_close,
+           ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY date DESC) AS from_end
+    FROM {table}
+    WHERE symbol IN ({symbols}) AND date BETWEEN %s AND %s
+), drawdowns AS (
+    SELECT symbol, date, close, first_close, from_end,
+           (close - running_max) / NULLIF(running_max, 0) AS drawdown
+    FROM series
+), ranked AS (
+    SELECT symbol, date, close, first_close, from_end, drawdown,
+           ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY drawdown, date) AS depth_rank
+    FROM drawdowns
+)
+SELECT symbol, COUNT(*), MIN(date), MAX(date), MAX(first_close),
+       MAX(CASE WHEN from_end = 1 THEN close END),
+       MIN(drawdown),
+       MAX(CASE WHEN depth_rank = 1 THEN date END)
+FROM ranked
+GROUP BY symbol
+"""
+
+PREDICTION_ERROR_SQL = """
+SELECT p.symbol, COUNT(*),
+       AVG((p.predicted_price * 1.0 - s.close_price) * (p.predicted_price * 1.0 - s.close_price)),
+       AVG(ABS(p.predicted_price * 1.0 - s.close_price)),
+       AVG(p.predicted_price * 1.0 - s.close_price)
+FROM {predictions} p
+JOIN {prices} s ON s.symbol = p.symbol AND s.date = p.date
+WHERE p.symbol IN ({symbols}) AND p.date BETWEEN %s AND %s
+GROUP BY p.symbol
+"""
+
+
+def _connection(model):
+    return connections[router.db_for_read(model)]
+
+
+def aggregates_in_database(connection):
+    """Whether ``connection`` can run the window-function queries above."""
+    return getattr(settings, 'METRICS_IN_DATABASE', True) and connection.features.supports_over_clause
+
+
+def _as_date(value):
+    # SQLite hands back raw-SQL dates as ISO strings.
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _fetch(connection, sql, params):
+    with span('metrics_sql'), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _placeholders(symbols):
+    return ', '.join(['%s'] * len(symbols))
+
+
+def _drawdown_summary(count, first_date, last_date, first_close, last_close, max_drawdown, trough_date):
+    return {
+        'count': count,
+        'start_date': first_date,
+        'end_date': last_date,
+        'first_close': first_close,
+        'last_close': last_close,
+        'total_return': (last_close - first_close) / first_close * 100 if first_close else None,
+        'max_drawdown': max_drawdown * 100 if max_drawdown is not None else None,
+        'trough_date': trough_date,
+    }
+
+
+def _drawdown_sql(connection, symbols, start_date, end_date):
+    sql = DRAWDOWN_SQL.format(table=connection.ops.quote_name(StockData._meta.db_table),
+                              symbols=_placeholders(symbols))
+    return {
+        symbol: _drawdown_summary(count, _as_date(first_date), _as_date(last_date), _float(first_close),
+                                  _float(last_close), _float(max_drawdown), _as_date(trough_date))
+        for symbol, count, first_date, last_date, first_close, last_close, max_drawdown, trough_date
+        in _fetch(connection, sql, [*symbols, start_date, end_date])
+    }
+
+
+def _drawdowns(closes):
+    running_max = np.maximum.accumulate(closes)
+    return running_max, (closes - running_max) / running_max
+
+
+def _drawdown_numpy(symbols, start_date, end_date):
+    summaries = {}
+    for symbol in symbols:
+        dates, closes, _ = load_price_series(symbol, start_date, end_date)
+        if not len(dates):
+            continue
+        _, drawdowns = _drawdowns(closes)
+        trough = int(np.argmin(drawdowns))
+        summaries[symbol] = _drawdown_summary(
+            len(dates), dates[0].item(), dates[-1].item(), float(closes[0]), float(closes[-1]),
+            float(drawdowns[trough]), dates[trough].item(),
+        )
+    return summaries
+
+
+def drawdown_metrics(symbols, start_date, end_date, in_database=None):
+    """Buy-and-hold return and maximum drawdown (percent) per symbol.
+
+    Computed with window functions where the rows live when the database
+    supports them, otherwise from the price arrays. Symbols without bars in the
+    range are left out.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    connection = _connection(StockData)
+    if in_database is None:
+        in_database = aggregates_in_database(connection)
+    if in_database:
+        return _drawdown_sql(connection, symbols, start_date, end_date)
+    return _drawdown_numpy(symbols, start_date, end_date)
+
+
+def drawdown_detail(symbol, start_date, end_date):
+    """Per-day close, running maximum and drawdown (percent) columns for one symbol."""
+    dates, closes, _ = load_price_series(symbol, start_date, end_date)
+    running_max, drawdowns = _drawdowns(closes)
+    return {'date': dates, 'close_price': closes, 'running_max': running_max, 'drawdown': drawdowns * 100}
+
+
+def _error_summary(count, mse, mae, bias):
+    return {'count': count, 'mse': mse, 'mae': mae, 'bias': bias}
+
+
+def _prediction_errors_sql(connection, symbols, start_date, end_date):
+    sql = PREDICTION_ERROR_SQL.format(
+        predictions=connection.ops.quote_name(Prediction._meta.db_table),
+        prices=connection.ops.quote_name(StockData._meta.db_table),
+        symbols=_placeholders(symbols),
+    )
+    return {
+        symbol: _error_summary(count, _float(mse), _float(mae), _float(bias))
+        for symbol, count, mse, mae, bias in _fetch(connection, sql, [*symbols, start_date, end_date])
+    }
+
+
+def _prediction_errors_numpy(symbols, start_date, end_date):
+    summaries = {}
+    for symbol in symbols:
+        prediction_dates, predicted = load_prediction_series(symbol, start_date, end_date)
+        dates, closes, _ = load_price_series(symbol, start_date, end_date)
+        _, predicted_idx, actual_idx = np.intersect1d(prediction_dates, dates, assume_unique=True, return_indices=True)
+        if not len(predicted_idx):
+            continue
+        errors = predicted[predicted_idx] - closes[actual_idx]
+        summaries[symbol] = _error_summary(
+            len(errors), float((errors ** 2).mean()), float(np.abs(errors).mean()), float(errors.mean())
+        )
+    return summaries
+
+
+def prediction_error_metrics(symbols, start_date, end_date, in_database=None):
+    """MSE, MAE and mean error of stored predictions against closes, per symbol.
+
+    Only dates with both a prediction and a close count. The join and the
+    averages run in the database unless ``in_database`` is False (or
+    METRICS_IN_DATABASE is off). Symbols with no overlapping dates are left out.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    connection = _connection(Prediction)
+    if in_database is None:
+        in_database = aggregates_in_database(connection)
+    if in_database:
+        return _prediction_errors_sql(connection, symbols, start_date, end_date)
+    return _prediction_errors_numpy(symbols, start_date, end_date)
+
+
+def comparison_detail(symbol, start_date, end_date):
+    """Predicted and actual price columns over the union of their dates, NaN where one is missing."""
+    prediction_dates, predicted = load_prediction_series(symbol, start_date, end_date)
+    dates, closes, _ = load_price_series(symbol, start_date, end_date)
+    union = np.union1d(prediction_dates, dates)
+    predicted_price = np.full(len(union), np.nan)
+    predicted_price[np.searchsorted(union, prediction_dates)] = predicted
+    close_price = np.full(len(union), np.nan)
+    close_price[np.searchsorted(union, dates)] = closes
+    error = predicted_price - close_price
+    return {'date': union, 'predicted_price': predicted_price, 'close_price': close_price,
+            'error': error, 'absolute_error': np.abs(error)}
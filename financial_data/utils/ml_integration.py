@@ -1,137 +1,221 @@
-import joblib
-import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from financial_data.models import StockData, Prediction
-import os
+from financial_data.models import StockData, Prediction, PredictionCursor
+from datetime import date
+from django.db.models import Max, Min
 from django.conf import settings
+from django.db import transaction
+from financial_data.instrumentation import span
+from .bulk_writer import bulk_upsert
 import logging
 
 logger = logging.getLogger(__name__)
 
-MODEL_PATH = os.path.join(settings.BASE_DIR, 'financial_data', 'models', 'pretrained_model.pkl')
-
-def get_or_create_model():
-    if os.path.exists(MODEL_PATH):
-        return joblib.load(MODEL_PATH)
+ESTIMATORS = ('linear', 'ridge', 'gbr')
+
+def make_estimator(name=None):
+    """Unfitted scikit-learn regressor for PREDICTION_ESTIMATOR; all share fit/predict."""
+    name = name or getattr(settings, 'PREDICTION_ESTIMATOR', 'ridge')
+    if name == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if name == 'ridge':
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        # Features mix price levels, returns and ratios; scale before penalizing.
+        return make_pipeline(StandardScaler(), Ridge(alpha=1.0))
+    if name == 'gbr':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(n_estimators=200, max_depth=3, learning_rate=0.05, subsample=0.8, random_state=0)
+    raise ValueError(f"Unknown estimator '{name}'; expected one of {', '.join(ESTIMATORS)}")
+
+def model_spec():
+    """Current (pipeline, estimator name, feature-set id). Stored models with a
+    different feature-set id are retrained and their predictions rewritten.
+    """
+    from .features import get_pipeline
+
+    pipeline = get_pipeline()
+    estimator = getattr(settings, 'PREDICTION_ESTIMATOR', 'ridge')
+    return pipeline, estimator, f'{pipeline.version}/{estimator}'
+
+def fit_model(X, y, estimator=None):
+    with span('model_fit'):
+        model = make_estimator(estimator)
+        model.fit(X, y)
+    return model
+
+def train_model(symbol, start_date=None, end_date=None):
+    """Fit ``symbol``'s model and publish it as a new version in the model store.
+
+    Without dates the whole stored history is used (its feature matrix is
+    cached per data version). Publishing a new version makes the next
+    update_predictions call rewrite the symbol's predictions.
+    """
+    from .features import feature_matrix
+    from .model_store import save_model
+    from .price_series import EARLIEST_DATE
+
+    pipeline, estimator, features = model_spec()
+    if start_date is None and end_date is None:
+        dates, close, matrix = feature_matrix(symbol, pipeline)
     else:
-        model = LinearRegression()
-        os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-        joblib.dump(model, MODEL_PATH)
-        return model
-
-model = get_or_create_model()
-
-def train_model(symbol, start_date, end_date):
-    stock_data = StockData.objects.filter(
-        symbol=symbol,
-        date__range=(start_date, end_date)
-    ).order_by('date').values('date', 'close_price')
-
-    if not stock_data:
-        raise ValueError(f"No data found for symbol {symbol} between {start_date} and {end_date}")
-
-    df = pd.DataFrame(stock_data)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
+        dates, close, matrix = pipeline.load(symbol, start_date or EARLIEST_DATE, end_date or date.today())
 
-    # Create features
-    for i in range(1, 6):
-        df[f'price_{i}d_ago'] = df['close_price'].shift(i)
-
-    df.dropna(inplace=True)
-
-    X = df[['price_1d_ago', 'price_2d_ago', 'price_3d_ago', 'price_4d_ago', 'price_5d_ago']]
-    y = df['close_price']
-
-    model.fit(X, y)
-    joblib.dump(model, MODEL_PATH)
-
-def prepare_data(symbol, start_date, end_date):
-    stock_data = StockData.objects.filter(
-        symbol=symbol,
-        date__range=(start_date, end_date)
-    ).order_by('date').values('date', 'close_price')
-
-    if not stock_data:
+    if not len(dates):
         raise ValueError(f"No data found for symbol {symbol} between {start_date} and {end_date}")
 
-    df = pd.DataFrame(stock_data)
-    df.set_index('date', inplace=True)
-    df['return'] = df['close_price'].pct_change()
-    df['MA5'] = df['close_price'].rolling(window=5).mean()
-    df['MA20'] = df['close_price'].rolling(window=20).mean()
-    df = df.dropna()
-
-    features = ['close_price', 'return', 'MA5', 'MA20']
-    X = df[features]
-    
-    return X, df.index
+    X, y, _ = pipeline.training_set(dates, close, matrix)
+    if not len(X):
+        raise ValueError(f"Not enough history for {symbol} to train the {pipeline.name} features")
+    model = fit_model(X, y, estimator)
+    save_model(symbol, model, features, dates[-1].item())
+    return model
+
+def _history_start(symbol, last_date, rows):
+    # The first new date is predicted from the feature row at last_date, which
+    # needs the ``rows`` bars up to and including it.
+    from .price_series import EARLIEST_DATE
+
+    dates = list(
+        StockData.objects.filter(symbol=symbol, date__lte=last_date)
+        .order_by('-date').values_list('date', flat=True)[:rows]
+    )
+    return dates[-1] if len(dates) == rows else EARLIEST_DATE
+
+def _history_end(symbol, first_date, rows):
+    # Feature rows within ``rows`` bars of first_date reach back before it, so
+    # bars backfilled there change (or complete) them.
+    dates = list(
+        StockData.objects.filter(symbol=symbol, date__gte=first_date)
+        .order_by('date').values_list('date', flat=True)[:rows]
+    )
+    return dates[-1] if dates else first_date
+
+def _predictable(pipeline, symbol, start_date, end_date, after=None):
+    """Feature rows and target dates for ``start_date``..``end_date``, only targets after ``after`` if given."""
+    import numpy as np
+
+    X, _, target_dates = pipeline.training_set(*pipeline.load(symbol, start_date, end_date))
+    if after is not None:
+        keep = target_dates > np.datetime64(after, 'D')
+        X, target_dates = X[keep], target_dates[keep]
+    return X, target_dates
+
+def update_predictions(symbol):
+    """Bring ``symbol``'s stored predictions up to date; returns the number of rows written.
+
+    The PredictionCursor records the span of bars already predicted. Only
+    bars appended after it or backfilled before it get features built and are
+    predicted. The full history is rewritten only when the symbol's model
+    version differs from the one recorded on the cursor (or there is no cursor
+    yet). A symbol without a model for the current feature set is trained first.
+    """
+    import numpy as np
+    from .features import feature_matrix
+    from .model_store import load_model
+    from .price_series import EARLIEST_DATE
+
+    bounds = StockData.objects.filter(symbol=symbol).aggregate(earliest=Min('date'), latest=Max('date'))
+    earliest, latest = bounds['earliest'], bounds['latest']
+    if latest is None:
+        raise ValueError(f"No data found for symbol {symbol}")
+
+    pipeline, _, features = model_spec()
+    entry = load_model(symbol)
+    if entry is None or entry['features'] != features:
+        train_model(symbol)
+        entry = load_model(symbol)
+
+    cursor = PredictionCursor.objects.filter(symbol=symbol).first()
+    rewrite = cursor is None or cursor.model_version != entry['version'] or cursor.first_date is None
+    if not rewrite and cursor.first_date <= earliest and cursor.last_date >= latest:
+        return 0
+
+    if rewrite:
+        X, _, target_dates = pipeline.training_set(*feature_matrix(symbol, pipeline))
+    else:
+        parts, predicted_through = [], cursor.last_date
+        if earliest < cursor.first_date:
+            head_end = _history_end(symbol, cursor.first_date, pipeline.window)
+            parts.append(_predictable(pipeline, symbol, EARLIEST_DATE, head_end))
+            predicted_through = max(predicted_through, head_end)
+        if latest > predicted_through:
+            parts.append(_predictable(
+                pipeline, symbol, _history_start(symbol, predicted_through, pipeline.window), latest,
+                after=predicted_through
+            ))
+        X = np.concatenate([part[0] for part in parts])
+        target_dates = np.concatenate([part[1] for part in parts])
+    if not len(target_dates):
+        if not rewrite:
+            # Nothing predictable in the new bars yet; don't look at them again.
+            PredictionCursor.objects.filter(pk=cursor.pk).update(first_date=earliest)
+        return 0
+
+    with span('model_predict'):
+        prices = entry['model'].predict(X)
+
+    prediction_data = [
+        Prediction(symbol=symbol, date=day, predicted_price=round(float(price), 2))
+        for day, price in zip(target_dates.tolist(), prices)
+    ]
+    with span('db_write'), transaction.atomic():
+        if rewrite:
+            Prediction.objects.filter(symbol=symbol).delete()
+        stats = bulk_upsert(
+            Prediction, prediction_data,
+            unique_fields=['symbol', 'date'],
+            update_fields=['predicted_price']
+        )
+        PredictionCursor.objects.update_or_create(
+            symbol=symbol,
+            defaults={
+                'model_version': entry['version'],
+                'first_date': earliest,
+                'last_date': prediction_data[-1].date if rewrite else max(cursor.last_date, prediction_data[-1].date),
+            }
+        )
+
+    logger.debug(
+        "%s %s predictions for %s with model %s (%.0f rows/s)",
+        'Rewrote' if rewrite else 'Added', len(prediction_data), symbol, entry['version'], stats['rows_per_second']
+    )
+    return len(prediction_data)
 
 def predict_stock_prices(symbol, start_date, end_date):
+    """Stored predictions for the range, after appending any dates not yet predicted."""
     try:
-        logger.debug(f"Starting prediction for {symbol} from {start_date} to {end_date}")
-        train_model(symbol, start_date, end_date)
-
-        stock_data = StockData.objects.filter(
-            symbol=symbol,
-            date__range=(start_date, end_date)
-        ).order_by('date').values('date', 'close_price')
-
-        logger.debug(f"Fetched {len(stock_data)} stock data points")
-
-        df = pd.DataFrame(stock_data)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-
-        for i in range(1, 6):
-            df[f'price_{i}d_ago'] = df['close_price'].shift(i)
-
-        df.dropna(inplace=True)
-
-        X = df[['price_1d_ago', 'price_2d_ago', 'price_3d_ago', 'price_4d_ago', 'price_5d_ago']]
-        
-        predictions = model.predict(X)
-        
-        prediction_data = [
-            Prediction(symbol=symbol, date=date, predicted_price=price)
-            for date, price in zip(df.index, predictions)
-        ]
-
-        Prediction.objects.filter(symbol=symbol, date__range=(start_date, end_date)).delete()
-        Prediction.objects.bulk_create(prediction_data)
-
-        logger.debug(f"Generated and saved {len(prediction_data)} predictions")
-
-        return prediction_data  
+        logger.debug("Reading predictions for %s from %s to %s", symbol, start_date, end_date)
+        update_predictions(symbol)
+        with span('orm_load'):
+            predictions = list(Prediction.objects.filter(
+                symbol=symbol,
+                date__range=(start_date, end_date)
+            ).order_by('date'))
+        if not predictions:
+            raise ValueError(f"No predictions available for {symbol} between {start_date} and {end_date}")
+        return predictions
 
     except Exception as e:
-        logger.error(f"Error in predict_stock_prices: {str(e)}")
+        logger.error("Error in predict_stock_prices: %s", e)
         raise
 
-def compare_predictions(symbol, start_date, end_date):
-    predictions = Prediction.objects.filter(
-        symbol=symbol,
-        date__range=(start_date, end_date)
-    ).values('date', 'predicted_price')
-    
-    actual_prices = StockData.objects.filter(
-        symbol=symbol,
-        date__range=(start_date, end_date)
-    ).values('date', 'close_price')
-    
-    df_pred = pd.DataFrame(predictions)
-    df_actual = pd.DataFrame(actual_prices)
-    
-    df_combined = pd.merge(df_pred, df_actual, on='date', how='outer')
-    df_combined['error'] = df_combined['predicted_price'] - df_combined['close_price']
-    df_combined['absolute_error'] = abs(df_combined['error'])
-    
-    mse = (df_combined['error'] ** 2).mean()
-    mae = df_combined['absolute_error'].mean()
-    
-    return {
-        'mse': mse,
-        'mae': mae,
-        'comparison': df_combined.to_dict(orient='records')
-    }
+def predict_price_series(symbol, start_date, end_date):
+    """Like predict_stock_prices, but as ``(dates, predicted)`` arrays instead of model instances."""
+    from .price_series import load_prediction_series
+
+    update_predictions(symbol)
+    dates, predicted = load_prediction_series(symbol, start_date, end_date)
+    if not len(dates):
+        raise ValueError(f"No predictions available for {symbol} between {start_date} and {end_date}")
+    return dates, predicted
+
+def compare_predictions(symbol, start_date, end_date, detail=False):
+    """Error summary of stored predictions against closes; per-date columns only with ``detail``."""
+    from .metrics import comparison_detail, prediction_error_metrics
+
+    summary = prediction_error_metrics([symbol], start_date, end_date).get(symbol)
+    result = summary or {'count': 0, 'mse': None, 'mae': None, 'bias': None}
+    if detail:
+        result['comparison'] = comparison_detail(symbol, start_date, end_date)
+    return result
@@ -0,0 +1,81 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_RE = re.compile(r'^[A-Z0-9.\-]{1,10}$')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def store_dir():
+    path = getattr(settings, 'MODEL_STORE_DIR', None) or os.path.join(settings.BASE_DIR, 'financial_data', 'models', 'symbols')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def model_path(symbol):
+    symbol = symbol.upper()
+    if not SYMBOL_RE.match(symbol):
+        raise ValueError(f"Invalid symbol for model store: {symbol!r}")
+    return os.path.join(store_dir(), f'{symbol}.joblib')
+
+
+def save_model(symbol, model, features, trained_through):
+    """Publish a fitted model for ``symbol`` as a new version; returns the version string.
+
+    The file is written next to its destination and renamed into place, so
+    concurrent readers see either the old or the new model, never a partial one.
+    """
+    import joblib
+
+    path = model_path(symbol)
+    version = f"{features}@{time.strftime('%Y%m%dT%H%M%S')}.{time.time_ns() % 10**9:09d}"
+    entry = {'model': model, 'version': version, 'features': features, 'trained_through': trained_through}
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f'.{symbol}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(entry, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info("Stored model %s for %s (trained through %s)", version, symbol, trained_through)
+    return version
+
+
+def load_model(symbol):
+    """Return ``{'model', 'version', 'features', 'trained_through'}`` or None.
+
+    Entries are cached per process and reloaded when the file changes.
+    """
+    path = model_path(symbol)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    import joblib
+    with _cache_lock:
+        entry = joblib.load(path)
+        _cache[path] = (mtime, entry)
+    return entry
+
+
+def delete_model(symbol):
+    path = model_path(symbol)
+    _cache.pop(path, None)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,72 @@
+from datetime import date
+import numpy as np
+from financial_data.models import StockData, Prediction
+from financial_data.instrumentation import span
+from .shared_prices import reader
+
+# Lower bound for "the whole history" queries.
+EARLIEST_DATE = date(1900, 1, 1)
+
+
+def load_price_series(symbol, start_date, end_date):
+    """Return ``(dates, close, volume)`` NumPy arrays for a symbol, ordered by date.
+
+    Served as zero-copy views from the shared price segment when the symbol is
+    published there, otherwise read from StockData.
+    """
+    series = reader.get(symbol, start_date, end_date)
+    if series is not None:
+        return series
+
+    with span('orm_load'):
+        rows = list(
+            StockData.objects.filter(
+                symbol=symbol,
+                date__range=(start_date, end_date)
+            ).order_by('date').values_list('date', 'close_price', 'volume')
+        )
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([]), np.array([])
+    dates, closes, volumes = zip(*rows)
+    return (
+        np.array(dates, dtype='datetime64[D]'),
+        np.array(closes, dtype=float),
+        np.array(volumes, dtype=float),
+    )
+
+
+def load_prediction_series(symbol, start_date, end_date):
+    """Return ``(dates, predicted)`` NumPy arrays of stored predictions, ordered by date."""
+    with span('orm_load'):
+        rows = list(
+            Prediction.objects.filter(
+                symbol=symbol,
+                date__range=(start_date, end_date)
+            ).order_by('date').values_list('date', 'predicted_price')
+        )
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), np.array([])
+    dates, predicted = zip(*rows)
+    return np.array(dates, dtype='datetime64[D]'), np.array(predicted, dtype=float)
+
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def load_ohlcv(symbol, start_date, end_date):
+    """Return ``(dates, {'open', 'high', 'low', 'close', 'volume'})`` arrays from StockData.
+
+    The shared segment only carries close and volume, so this always reads the table.
+    """
+    with span('orm_load'):
+        rows = list(
+            StockData.objects.filter(
+                symbol=symbol,
+                date__range=(start_date, end_date)
+            ).order_by('date').values_list('date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume')
+        )
+    if not rows:
+        return np.array([], dtype='datetime64[D]'), {column: np.array([]) for column in OHLCV_COLUMNS}
+    columns = list(zip(*rows))
+    dates = np.array(columns[0], dtype='datetime64[D]')
+    return dates, {column: np.array(values, dtype=float) for column, values in zip(OHLCV_COLUMNS, columns[1:])}
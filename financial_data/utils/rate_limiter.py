@@ -13,3 +13,44 @@ def rate_limit(key, limit, period):
     
     cache.set(cache_key, count + 1, timeout=period)
     return True
+
+
+MINUTE = 60
+DAY = 86400
+
+
+def _window_key(key, period, now=None):
+    return f"quota:{key}:{period}:{int(now or time.time()) // period}"
+
+
+def record_call(key):
+    """Count one upstream call against the per-minute and per-day windows."""
+    for period in (MINUTE, DAY):
+        window = _window_key(key, period)
+        try:
+            cache.incr(window)
+        except ValueError:
+            cache.set(window, 1, timeout=period)
+
+
+async def arecord_call(key):
+    """record_call() for async callers."""
+    for period in (MINUTE, DAY):
+        window = _window_key(key, period)
+        try:
+            await cache.aincr(window)
+        except ValueError:
+            await cache.aset(window, 1, timeout=period)
+
+
+def calls_made(key, period):
+    return cache.get(_window_key(key, period), 0)
+
+
+def seconds_until_reset(period, now=None):
+    now = now or time.time()
+    return int(period - now % period) + 1
+
+
+def remaining(key, limit, period):
+    return max(limit - calls_made(key, period), 0)
@@ -1,170 +1,206 @@
 # financial_data/utils/report_generation.py
 
-import matplotlib
-matplotlib.use('Agg')  # Use the 'Agg' backend which doesn't require a GUI
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import io
-import base64
-from reportlab.lib.pagesizes import letter
+import functools
+import hashlib
 from financial_data.models import StockData, Prediction, BacktestResult
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as PlatypusImage
-from reportlab.lib.styles import getSampleStyleSheet
+from financial_data.instrumentation import span
+from .data_version import symbol_version
 import logging
 
 logger = logging.getLogger(__name__)
 
 def fetch_chart_data(backtest_result):
     try:
-        stock_data = StockData.objects.filter(
-            symbol=backtest_result.symbol,
-            date__range=(backtest_result.start_date, backtest_result.end_date)
-        ).order_by('date')
-        
-        predictions = Prediction.objects.filter(
-            symbol=backtest_result.symbol,
-            date__range=(backtest_result.start_date, backtest_result.end_date)
-        ).order_by('date')
-        
+        with span('orm_load'):
+            stock_data = list(StockData.objects.filter(
+                symbol=backtest_result.symbol,
+                date__range=(backtest_result.start_date, backtest_result.end_date)
+            ).order_by('date'))
+
+            predictions = list(Prediction.objects.filter(
+                symbol=backtest_result.symbol,
+                date__range=(backtest_result.start_date, backtest_result.end_date)
+            ).order_by('date'))
+
         return stock_data, predictions
     except Exception as e:
-        logger.error(f"Error fetching data: {str(e)}")
+        logger.error("Error fetching data: %s", e)
         raise
 
-def generate_performance_chart(backtest_result):
-    try:
-        logger.debug(f"Generating performance chart for backtest_id: {backtest_result.id}")
-        stock_data, predictions = fetch_chart_data(backtest_result)
-        
-        logger.debug(f"Fetched {len(stock_data)} stock data points and {len(predictions)} prediction points")
+def _pyplot():
+    # matplotlib is imported on first chart, not when the web process boots.
+    import matplotlib
+    matplotlib.use('Agg')  # Use the 'Agg' backend which doesn't require a GUI
+    import matplotlib.pyplot as plt
+    return plt
 
-        if not stock_data:
-            raise ValueError("No data available for the specified date range")
-        
+def render_chart(symbol, dates, actual_prices, prediction_dates=(), predicted_prices=()):
+    """Plot actual and predicted closes; returns the PNG as bytes."""
+    plt = _pyplot()
+    import matplotlib.dates as mdates
+
+    with span('chart_render'):
         fig, ax = plt.subplots(figsize=(12, 6))
-        
-        # Prepare data
-        dates = [data.date for data in stock_data]
-        actual_prices = [float(data.close_price) for data in stock_data]
-        predicted_prices = [float(pred.predicted_price) for pred in predictions]
-        
-        logger.debug(f"Date range: {min(dates)} to {max(dates)}")
-        logger.debug(f"Actual price range: {min(actual_prices)} to {max(actual_prices)}")
-        logger.debug(f"Predicted price range: {min(predicted_prices) if predicted_prices else 'N/A'} to {max(predicted_prices) if predicted_prices else 'N/A'}")
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # min/max are computed only when someone reads debug output.
+            logger.debug("Date range: %s to %s", min(dates), max(dates))
+            logger.debug("Actual price range: %s to %s", min(actual_prices), max(actual_prices))
+            logger.debug("Predicted price range: %s to %s", min(predicted_prices) if len(predicted_prices) else 'N/A', max(predicted_prices) if len(predicted_prices) else 'N/A')
 
         # Plot actual prices
         ax.plot(dates, actual_prices, label='Actual', color='blue')
-        
+
         # Plot predicted prices
-        if predicted_prices:
-            ax.plot(dates, predicted_prices, label='Predicted', color='orange', linestyle='--')
+        if len(predicted_prices):
+            ax.plot(prediction_dates, predicted_prices, label='Predicted', color='orange', linestyle='--')
         else:
             logger.warning("No prediction data available for plotting")
 
         # Format x-axis to show every month
         ax.xaxis.set_major_locator(mdates.MonthLocator())
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-        
+
         # Rotate and align the tick labels so they look better
         fig.autofmt_xdate()
-        
+
         # Use a scientific notation for y-axis if the range is large
         ax.yaxis.set_major_formatter(plt.ScalarFormatter(useMathText=True))
         ax.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
-        
-        ax.set_title(f'{backtest_result.symbol} Stock Price - Actual vs Predicted')
+
+        ax.set_title(f'{symbol} Stock Price - Actual vs Predicted')
         ax.set_xlabel('Date')
         ax.set_ylabel('Price')
         ax.legend(loc='upper left')
-        
+
         plt.tight_layout()
-        
-        # Save to BytesIO object
+
         buffer = io.BytesIO()
         plt.savefig(buffer, format='png', dpi=300)
-        buffer.seek(0)
-        image_png = buffer.getvalue()
-        buffer.close()
-        
-        # Encode the image to base64
-        graphic = base64.b64encode(image_png)
-        graphic = graphic.decode('utf-8')
-        
         plt.close(fig)  # Close the figure to free up memory
+    return buffer.getvalue()
+
+def chart_inputs(backtest_result):
+    """render_chart() arguments for ``backtest_result``, loaded from the database.
+
+    Plain lists, so rendering can happen in another process.
+    """
+    stock_data, predictions = fetch_chart_data(backtest_result)
+
+    logger.debug("Fetched %s stock data points and %s prediction points", len(stock_data), len(predictions))
+
+    if not stock_data:
+        raise ValueError("No data available for the specified date range")
+
+    return (
+        backtest_result.symbol,
+        [data.date for data in stock_data],
+        [float(data.close_price) for data in stock_data],
+        [pred.date for pred in predictions],
+        [float(pred.predicted_price) for pred in predictions],
+    )
+
+def generate_performance_chart(backtest_result):
+    try:
+        logger.debug("Generating performance chart for backtest_id: %s", backtest_result.id)
+        chart_png = render_chart(*chart_inputs(backtest_result))
         
         logger.debug("Performance chart generated successfully")
-        return graphic
+        return chart_png
     except Exception as e:
-        logger.error(f"Error generating performance chart: {str(e)}")
+        logger.error("Error generating performance chart: %s", e)
         raise
 
-def generate_pdf_report(backtest_result, chart_img):
-    try:
-        buffer = io.BytesIO()
+def chart_etag(backtest_result):
+    """Changes whenever the chart for ``backtest_result`` would: new prices or new/rewritten predictions."""
+    key = f"{backtest_result.id}:{symbol_version(backtest_result.symbol)}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def report_templates():
+    """Paragraph styles and the metrics TableStyle, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 1), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return getSampleStyleSheet(), table_style
+
+def report_metrics(backtest_result):
+    return [
+        ["Metric", "Value"],
+        ["Initial Investment", f"${backtest_result.initial_investment:.2f}"],
+        ["Final Value", f"${backtest_result.final_value:.2f}"],
+        ["Total Return", f"{backtest_result.total_return:.2%}"],
+        ["Max Drawdown", f"{backtest_result.max_drawdown:.2%}"],
+        ["Number of Trades", str(backtest_result.num_trades)]
+    ]
+
+def build_pdf(symbol, metrics, chart_png=None):
+    """Lay out the report from plain data (no ORM access); returns a BytesIO."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Image as PlatypusImage
+
+    styles, table_style = report_templates()
+    buffer = io.BytesIO()
+    with span('pdf_build'):
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         story = []
 
         # Add title
-        styles = getSampleStyleSheet()
-        story.append(Paragraph(f"Backtest Report for {backtest_result.symbol}", styles['Title']))
+        story.append(Paragraph(f"Backtest Report for {symbol}", styles['Title']))
         story.append(Spacer(1, 12))
 
         # Add performance metrics
-        data = [
-            ["Metric", "Value"],
-            ["Initial Investment", f"${backtest_result.initial_investment:.2f}"],
-            ["Final Value", f"${backtest_result.final_value:.2f}"],
-            ["Total Return", f"{backtest_result.total_return:.2%}"],
-            ["Max Drawdown", f"{backtest_result.max_drawdown:.2%}"],
-            ["Number of Trades", str(backtest_result.num_trades)]
-        ]
-
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = Table(metrics)
+        table.setStyle(table_style)
 
         story.append(table)
         story.append(Spacer(1, 12))
 
         # Add performance chart
-        if chart_img:
+        if chart_png:
             story.append(Paragraph("Performance Chart", styles['Heading2']))
             story.append(Spacer(1, 12))
-            
-            # Decode the base64 image
-            image_data = base64.b64decode(chart_img)
-            img = PlatypusImage(io.BytesIO(image_data), width=500, height=300)
-            
+
+            # BytesIO over bytes shares the buffer until written to, so this does not copy the PNG
+            img = PlatypusImage(io.BytesIO(chart_png), width=500, height=300)
+
             story.append(img)
 
         doc.build(story)
-        buffer.seek(0)
-        return buffer
+    buffer.seek(0)
+    return buffer
+
+def generate_pdf_report(backtest_result, chart_png):
+    try:
+        return build_pdf(backtest_result.symbol, report_metrics(backtest_result), chart_png)
     except Exception as e:
-        logger.error(f"Error in generate_pdf_report: {str(e)}")
+        logger.error("Error in generate_pdf_report: %s", e)
         raise ValueError(f"Failed to generate PDF report: {str(e)}")
 
 def generate_report(params):
     try:
         backtest_result = BacktestResult.objects.get(id=params['backtest_id'])
-        chart_img = generate_performance_chart(backtest_result)
-        pdf_buffer = generate_pdf_report(backtest_result, chart_img)
+        chart_png = generate_performance_chart(backtest_result)
+        pdf_buffer = generate_pdf_report(backtest_result, chart_png)
         return pdf_buffer
     except Exception as e:
-        logger.error(f"Error in generate_report: {str(e)}")
+        logger.error("Error in generate_report: %s", e)
         raise ValueError(f"Failed to generate report: {str(e)}")
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from financial_data.models import StockData, CompanyOverview
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+# When prices were last ingested; matrices loaded before then are reloaded in every process.
+UNIVERSE_CHANGED_KEY = 'screener:universe_changed'
+
+
+class PriceMatrix:
+    """Close prices for a whole universe as a (symbols x dates) array.
+
+    Gaps are forward-filled per symbol; columns before a symbol's first bar stay NaN.
+    """
+
+    def __init__(self, symbols, dates, close):
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.close = close
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_arrays(cls, symbols, dates, closes):
+        symbol_values, symbol_idx = np.unique(np.asarray(symbols), return_inverse=True)
+        date_values, date_idx = np.unique(np.asarray(dates, dtype='datetime64[D]'), return_inverse=True)
+        close = np.full((len(symbol_values), len(date_values)), np.nan)
+        close[symbol_idx, date_idx] = np.asarray(closes, dtype=float)
+        return cls(symbol_values.tolist(), date_values, forward_fill(close))
+
+    @property
+    def as_of(self):
+        return self.dates[-1].astype(date) if len(self.dates) else None
+
+    def rows(self, symbols):
+        return np.array([self.index[symbol] for symbol in symbols if symbol in self.index], dtype=int)
+
+
+def forward_fill(values):
+    mask = np.isnan(values)
+    idx = np.where(~mask, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    return filled
+
+
+def trailing_means(close, window, end):
+    """Means of the ``window`` columns ending at ``end - 1`` and at ``end``; NaN if incomplete."""
+    nan = np.full(close.shape[0], np.nan)
+    if end - window - 1 < 0:
+        return nan, nan
+    # NaN propagates through the sums, so partial windows never compare true.
+    current = close[:, end - window:end].sum(axis=1)
+    previous = current - close[:, end - 1] + close[:, end - window - 1]
+    return previous / window, current / window
+
+
+def sma_crossover(matrix, short_window=50, long_window=200, direction='up', offset=0):
+    """Symbols whose short SMA crossed the long SMA on the bar ``offset`` bars before the last."""
+    end = matrix.close.shape[1] - offset
+    short_prev, short_now = trailing_means(matrix.close, short_window, end)
+    long_prev, long_now = trailing_means(matrix.close, long_window, end)
+    with np.errstate(invalid='ignore'):
+        if direction == 'down':
+            crossed = (short_prev >= long_prev) & (short_now < long_now)
+        else:
+            crossed = (short_prev <= long_prev) & (short_now > long_now)
+    return [
+        {
+            'symbol': matrix.symbols[i],
+            'short_sma': float(short_now[i]),
+            'long_sma': float(long_now[i]),
+        }
+        for i in np.flatnonzero(crossed)
+    ]
+
+
+def top_returns(matrix, period=TRADING_DAYS_PER_YEAR, limit=20, symbols=None, ascending=False):
+    close = matrix.close
+    if close.shape[1] <= period:
+        return []
+    rows = matrix.rows(symbols) if symbols is not None else np.arange(close.shape[0])
+    if not len(rows):
+        return []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = close[rows, -1] / close[rows, -1 - period] - 1.0
+    valid = np.flatnonzero(np.isfinite(returns))
+    order = valid[np.argsort(returns[valid])]
+    if not ascending:
+        order = order[::-1]
+    return [
+        {'symbol': matrix.symbols[rows[i]], 'return': float(returns[i])}
+        for i in order[:limit]
+    ]
+
+
+def load_price_matrix(start_date, end_date=None, symbols=None):
+    queryset = StockData.objects.filter(date__gte=start_date)
+    if end_date is not None:
+        queryset = queryset.filter(date__lte=end_date)
+    if symbols is not None:
+        queryset = queryset.filter(symbol__in=symbols)
+    rows = list(queryset.values_list('symbol', 'date', 'close_price'))
+    if not rows:
+        return PriceMatrix([], np.array([], dtype='datetime64[D]'), np.empty((0, 0)))
+    symbol_col, date_col, close_col = zip(*rows)
+    return PriceMatrix.from_arrays(symbol_col, date_col, [float(value) for value in close_col])
+
+
+_matrix_lock = threading.Lock()
+_matrix_cache = {'matrix': None, 'loaded_at': 0.0}
+
+
+def get_universe_matrix():
+    """Process-wide matrix covering SCREENER_LOOKBACK_DAYS.
+
+    Reloaded every SCREENER_MATRIX_TTL seconds, and on the next call after any
+    process ingests prices (invalidate_universe_matrix).
+    """
+    ttl = getattr(settings, 'SCREENER_MATRIX_TTL', 300)
+    changed = cache.get(UNIVERSE_CHANGED_KEY, 0.0)
+    with _matrix_lock:
+        loaded_at = _matrix_cache['loaded_at']
+        if _matrix_cache['matrix'] is None or time.time() - loaded_at > ttl or loaded_at <= changed:
+            lookback = getattr(settings, 'SCREENER_LOOKBACK_DAYS', 450)
+            started = time.perf_counter()
+            # Stamped before the read, so an ingest that lands during it triggers another reload.
+            loaded_at = time.time()
+            _matrix_cache['matrix'] = load_price_matrix(date.today() - timedelta(days=lookback))
+            _matrix_cache['loaded_at'] = loaded_at
+            matrix = _matrix_cache['matrix']
+            logger.info("Loaded screener matrix %s in %.2fs", matrix.close.shape, time.perf_counter() - started)
+        return _matrix_cache['matrix']
+
+
+def invalidate_universe_matrix():
+    """Make every process reload its universe matrix on next use, e.g. after an ingest."""
+    cache.set(UNIVERSE_CHANGED_KEY, time.time(), None)
+    with _matrix_lock:
+        _matrix_cache['matrix'] = None
+
+
+def _attach_overviews(results):
+    overviews = {
+        row['symbol']: row
+        for row in CompanyOverview.objects.filter(
+            symbol__in=[result['symbol'] for result in results]
+        ).values('symbol', 'name', 'sector', 'industry', 'market_capitalization')
+    }
+    for result in results:
+        overview = overviews.get(result['symbol'], {})
+        result['name'] = overview.get('name')
+        result['sector'] = overview.get('sector')
+        result['industry'] = overview.get('industry')
+        result['market_capitalization'] = overview.get('market_capitalization')
+    return results
+
+
+def run_screen(params, matrix=None):
+    matrix = matrix if matrix is not None else get_universe_matrix()
+    screen = params.get('filter')
+
+    symbols = None
+    sector = params.get('sector')
+    if sector:
+        symbols = list(CompanyOverview.objects.filter(sector__iexact=sector).values_list('symbol', flat=True))
+
+    if screen == 'sma_cross':
+        results = sma_crossover(
+            matrix,
+            short_window=int(params.get('short_window', 50)),
+            long_window=int(params.get('long_window', 200)),
+            direction=params.get('direction', 'up'),
+            offset=int(params.get('offset', 0)),
+        )
+        if symbols is not None:
+            allowed = set(symbols)
+            results = [result for result in results if result['symbol'] in allowed]
+        limit = params.get('limit')
+        if limit:
+            results = results[:int(limit)]
+    elif screen == 'top_return':
+        results = top_returns(
+            matrix,
+            period=int(params.get('period', TRADING_DAYS_PER_YEAR)),
+            limit=int(params.get('limit', 20)),
+            symbols=symbols,
+            ascending=params.get('order') == 'asc',
+        )
+    else:
+        raise ValueError(f"Unknown screen: {screen}. Expected 'sma_cross' or 'top_return'")
+
+    return {
+        'filter': screen,
+        'as_of': matrix.as_of,
+        'universe_size': len(matrix.symbols),
+        'results': _attach_overviews(results),
+    }
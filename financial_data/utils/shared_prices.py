@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from financial_data.models import StockData, BacktestResult
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: header | JSON index | dates (int64 days) | close (float64) | volume (float64)
+MAGIC = b'SAP1'
+HEADER = struct.Struct('<4sQ')
+
+# When ``symbol`` last had rows ingested, and whether a segment rebuild is already queued.
+INGESTED_KEY = 'shared_prices:ingested:{}'
+REFRESH_PENDING_KEY = 'shared_prices:refresh_pending'
+
+
+def _pointer_path():
+    return getattr(settings, 'SHARED_PRICES_POINTER', None) or os.path.join(
+        tempfile.gettempdir(), 'stock_analyzer_shared_prices.json'
+    )
+
+
+def _align(value, boundary=8):
+    return (value + boundary - 1) // boundary * boundary
+
+
+def _untrack(shm):
+    # Attached or published segments must outlive this process; stop the
+    # resource tracker from unlinking them when it exits.
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+def _layout(rows, index_size):
+    dates_at = _align(HEADER.size + index_size)
+    close_at = dates_at + rows * 8
+    volume_at = close_at + rows * 8
+    return dates_at, close_at, volume_at, volume_at + rows * 8
+
+
+def _day_number(value):
+    return int(np.asarray(value, dtype='datetime64[D]').astype(np.int64))
+
+
+def build_segment(series, created=None):
+    """Copy ``{symbol: (dates, close, volume)}`` into a new shared memory segment.
+
+    The index keeps each symbol's first and last date, so readers can tell
+    which requests the segment fully answers. ``created`` is when the rows
+    were read (now by default).
+    """
+    index = {}
+    offset = 0
+    for symbol, (dates, close, volume) in series.items():
+        length = len(dates)
+        if not length:
+            continue
+        index[symbol] = [offset, length, _day_number(dates[0]), _day_number(dates[-1])]
+        offset += length
+    meta = json.dumps({'rows': offset, 'symbols': index, 'created': created or time.time()}).encode()
+    dates_at, close_at, volume_at, size = _layout(offset, len(meta))
+
+    name = f"sap_{os.getpid()}_{time.time_ns()}"
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    _untrack(shm)
+    buf = shm.buf
+    HEADER.pack_into(buf, 0, MAGIC, len(meta))
+    buf[HEADER.size:HEADER.size + len(meta)] = meta
+
+    all_dates = np.ndarray((offset,), dtype=np.int64, buffer=buf, offset=dates_at)
+    all_close = np.ndarray((offset,), dtype=np.float64, buffer=buf, offset=close_at)
+    all_volume = np.ndarray((offset,), dtype=np.float64, buffer=buf, offset=volume_at)
+    for symbol, (start, length, _, _) in index.items():
+        dates, close, volume = series[symbol]
+        all_dates[start:start + length] = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+        all_close[start:start + length] = close
+        all_volume[start:start + length] = volume
+    del all_dates, all_close, all_volume
+    return shm
+
+
+def publish(series, created=None, pinned=None):
+    """Publish a new segment and atomically point readers at it; returns the segment name.
+
+    ``pinned`` is an explicit symbol list that later refreshes republish
+    instead of the hot set (see pinned_symbols).
+    """
+    shm = build_segment(series, created)
+    pointer = _pointer_path()
+    previous = _read_pointer(pointer)
+
+    tmp_path = f"{pointer}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'name': shm.name, 'symbols': len(series), 'pinned': pinned}, f)
+    os.replace(tmp_path, pointer)
+    name = shm.name
+    shm.close()
+
+    if previous and previous.get('name') != name:
+        # Readers that already attached keep their mapping until they close it.
+        try:
+            old = shared_memory.SharedMemory(name=previous['name'])
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+    logger.info("Published shared price segment %s with %s symbols", name, len(series))
+    return name
+
+
+def _read_pointer(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class SharedPriceReader:
+    """Per-process, read-only view of the current published segment."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pointer_mtime = None
+        self._shm = None
+        self._index = {}
+        self._created = 0.0
+        self._arrays = None
+        self._retired = []
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(_pointer_path()).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._pointer_mtime:
+            return
+        with self._lock:
+            if mtime == self._pointer_mtime:
+                return
+            pointer = _read_pointer(_pointer_path()) if mtime else None
+            if pointer is None:
+                self._detach()
+            elif self._shm is None or self._shm.name != pointer['name']:
+                self._attach(pointer['name'])
+            self._pointer_mtime = mtime
+
+    def _attach(self, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            logger.warning("Shared price segment %s is gone", name)
+            self._detach()
+            return
+        _untrack(shm)
+        magic, index_size = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            shm.close()
+            raise ValueError(f"Shared memory segment {name} is not a price segment")
+        meta = json.loads(bytes(shm.buf[HEADER.size:HEADER.size + index_size]))
+        rows = meta['rows']
+        dates_at, close_at, volume_at, _ = _layout(rows, index_size)
+        arrays = (
+            np.ndarray((rows,), dtype='datetime64[D]', buffer=shm.buf, offset=dates_at),
+            np.ndarray((rows,), dtype=np.float64, buffer=shm.buf, offset=close_at),
+            np.ndarray((rows,), dtype=np.float64, buffer=shm.buf, offset=volume_at),
+        )
+        for array in arrays:
+            array.setflags(write=False)
+        self._detach()
+        self._shm, self._index, self._arrays = shm, meta['symbols'], arrays
+        self._created = meta['created']
+
+    def _detach(self):
+        if self._shm is not None:
+            self._retired.append(self._shm)
+        self._shm, self._index, self._arrays = None, {}, None
+        still_exported = []
+        for shm in self._retired:
+            try:
+                shm.close()
+            except BufferError:
+                # Callers still hold views into it; try again on the next swap.
+                still_exported.append(shm)
+        self._retired = still_exported
+
+    def _stale(self, symbol, created):
+        ingested = cache.get(INGESTED_KEY.format(symbol))
+        return ingested is not None and ingested >= created
+
+    def get(self, symbol, start_date=None, end_date=None):
+        """Views of ``symbol``'s bars in the range, or None to read StockData instead.
+
+        A range reaching past the symbol's first or last published date is only
+        answered when nothing was ingested for the symbol since the segment was
+        built: a backfill or newer bars may exist that the segment lacks.
+        """
+        self._refresh()
+        index, arrays, created = self._index, self._arrays, self._created
+        entry = index.get(symbol)
+        if entry is None:
+            self.misses += 1
+            return None
+        offset, length, first, last = entry
+        start = np.datetime64(start_date, 'D') if start_date else None
+        end = np.datetime64(end_date, 'D') if end_date else None
+        outside = ((start is None or start.astype(np.int64) < first)
+                   or (end is None or end.astype(np.int64) > last))
+        if outside and self._stale(symbol, created):
+            self.misses += 1
+            return None
+        dates, close, volume = (array[offset:offset + length] for array in arrays)
+        lo = np.searchsorted(dates, start) if start is not None else 0
+        hi = np.searchsorted(dates, end, side='right') if end is not None else length
+        if hi <= lo:
+            # Nothing published in the range; the table may still have rows there.
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dates[lo:hi], close[lo:hi], volume[lo:hi]
+
+    def contains(self, symbol):
+        self._refresh()
+        return symbol in self._index
+
+    def stats(self):
+        return {
+            'segment': self._shm.name if self._shm is not None else None,
+            'symbols': len(self._index),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+reader = SharedPriceReader()
+
+
+def hot_symbols(limit=None):
+    limit = limit or getattr(settings, 'SHARED_PRICES_MAX_SYMBOLS', 500)
+    symbols = list(getattr(settings, 'SHARED_PRICES_SYMBOLS', []))
+    ranked = (
+        BacktestResult.objects.values('symbol')
+        .annotate(requests=Count('id'))
+        .order_by('-requests')
+        .values_list('symbol', flat=True)[:limit]
+    )
+    for symbol in ranked:
+        if symbol not in symbols:
+            symbols.append(symbol)
+    return symbols[:limit]
+
+
+def pinned_symbols():
+    """The symbols last published explicitly, or None when the segment holds the hot set."""
+    pointer = _read_pointer(_pointer_path())
+    return pointer.get('pinned') if pointer else None
+
+
+def publish_hot_symbols(symbols=None, pinned=False):
+    """Publish ``symbols`` (the hot set by default); with ``pinned``, refreshes keep publishing them."""
+    # Taken before reading rows: an ingest that races the read marks the new segment stale.
+    created = time.time()
+    symbols = list(symbols) if symbols is not None else hot_symbols()
+    rows = (
+        StockData.objects.filter(symbol__in=symbols)
+        .order_by('symbol', 'date')
+        .values_list('symbol', 'date', 'close_price', 'volume')
+    )
+    collected = {}
+    for symbol, day, close, volume in rows.iterator(chunk_size=10000):
+        dates, closes, volumes = collected.setdefault(symbol, ([], [], []))
+        dates.append(day)
+        closes.append(float(close))
+        volumes.append(float(volume))
+    series = {
+        symbol: (np.array(dates, dtype='datetime64[D]'), np.array(closes), np.array(volumes))
+        for symbol, (dates, closes, volumes) in collected.items()
+    }
+    return publish(series, created, pinned=symbols if pinned else None)
+
+
+def _refresh_delay():
+    return getattr(settings, 'SHARED_PRICES_REFRESH_DELAY', 60)
+
+
+def notify_ingested(symbol):
+    """Mark ``symbol``'s published series as possibly incomplete and schedule one rebuild.
+
+    Ingests within SHARED_PRICES_REFRESH_DELAY seconds of each other share a
+    single rebuild. Until it runs, readers go to the table for ranges the
+    segment does not span.
+    """
+    if not reader.contains(symbol):
+        return
+    cache.set(INGESTED_KEY.format(symbol), time.time(), None)
+    delay = _refresh_delay()
+    if not cache.add(REFRESH_PENDING_KEY, True, delay + 300):
+        return
+    from financial_data.tasks import refresh_shared_prices
+    try:
+        refresh_shared_prices.apply_async(countdown=delay)
+    except Exception as e:
+        cache.delete(REFRESH_PENDING_KEY)
+        logger.warning("Could not schedule shared price refresh after ingesting %s: %s", symbol, e)
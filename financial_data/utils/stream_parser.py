@@ -0,0 +1,82 @@
+import json
+import re
+from datetime import date
+
+SERIES_KEY = b'"Time Series (Daily)"'
+CHUNK_SIZE = 64 * 1024
+
+# One complete day inside the series object: "2024-01-02": { "1. open": "187.15", ... }
+_ENTRY_RE = re.compile(rb'"(\d{4}-\d{2}-\d{2})"\s*:\s*\{([^{}]*)\}')
+_FIELD_RE = re.compile(rb'"\d\.\s*([a-z ]+)"\s*:\s*"([^"]*)"')
+
+
+class UnexpectedPayload(ValueError):
+    def __init__(self, payload):
+        super().__init__("Response does not contain a daily time series")
+        self.payload = payload
+
+
+def parse_iso_date(value):
+    # Fixed-format YYYY-MM-DD; avoids the strptime format machinery.
+    return date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+
+
+def iter_daily_bars(chunks, start_date, end_date):
+    """Yield (date, open, high, low, close, volume) for days in [start_date, end_date].
+
+    ``chunks`` is any iterable of bytes, e.g. ``response.iter_content()``. Only the
+    current chunk plus one partial entry is held in memory. ISO dates sort
+    lexicographically, so out-of-range days are skipped on the raw key bytes
+    before anything is parsed or allocated.
+    """
+    lower = start_date.isoformat().encode()
+    upper = end_date.isoformat().encode()
+
+    chunks = iter(chunks)
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        pos = buffer.find(SERIES_KEY)
+        if pos != -1:
+            buffer = buffer[pos + len(SERIES_KEY):]
+            break
+    else:
+        try:
+            payload = json.loads(buffer or b'{}')
+        except ValueError:
+            payload = {'raw': buffer[:500].decode('utf-8', 'replace')}
+        raise UnexpectedPayload(payload)
+
+    while True:
+        consumed = 0
+        for match in _ENTRY_RE.finditer(buffer):
+            consumed = match.end()
+            key = match.group(1)
+            if key < lower or key > upper:
+                continue
+            fields = dict(_FIELD_RE.findall(match.group(2)))
+            yield (
+                parse_iso_date(key),
+                float(fields[b'open']),
+                float(fields[b'high']),
+                float(fields[b'low']),
+                float(fields[b'close']),
+                int(fields[b'volume']),
+            )
+        if consumed:
+            buffer = buffer[consumed:]
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        buffer += chunk
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,38 +1,68 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import FileResponse, HttpResponse
-from .models import StockData, BacktestResult, CompanyOverview
+from django.http import FileResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .models import StockData, BacktestResult
 from .utils.backtesting import backtest_strategy
-from .utils.ml_integration import predict_stock_prices, compare_predictions
-from .utils.report_generation import generate_performance_chart, generate_pdf_report
-from .serializers import BacktestResultSerializer, CompanyOverviewSerializer
-from .utils.alpha_vantage_api import get_company_overview, get_intraday_data, test_alpha_vantage_connection, fetch_stock_data
+from .utils.ml_integration import predict_price_series, compare_predictions, update_predictions
+from .utils.report_generation import generate_performance_chart, generate_pdf_report, chart_etag
+from .utils.batch_reports import load_report_jobs, render_reports, stream_zip
+from .profiling import list_profiles, profile_path
+from .response_cache import CachedResponseMixin
+from .renderers import EventStreamRenderer, ORJSONRenderer, response_shape, shape_table
+from .progress import JOB_ID_PATTERN, NO_PROGRESS, job_progress, request_job_id, track
+from .streaming import intraday_stream, job_stream
+from .utils.company_overview import load_company_overview, load_company_overviews
+from .utils.alpha_vantage_api import (
+    QuotaExceeded, get_intraday_data, intraday_columns, quota_error, test_alpha_vantage_connection, ensure_stock_data,
+)
 from datetime import date, datetime, timedelta
 from rest_framework.reverse import reverse
 from rest_framework.exceptions import APIException
+import base64
 import logging
+import time
 from rest_framework import status
 
 logger = logging.getLogger(__name__)
 
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+def _detail_requested(request):
+    return request.query_params.get('detail', '').lower() in ('1', 'true', 'yes')
+
+def _has_stock_data(symbol, start_date, end_date):
+    return StockData.objects.filter(symbol=symbol, date__range=(start_date, end_date)).exists()
+
 class APIRootView(APIView):
     def get(self, request, format=None):
         try:
             return Response({
                 'backtest': reverse('backtest', request=request, format=format),
+                'analysis': reverse('analysis', request=request, format=format),
                 'predict': reverse('predict', request=request, format=format),
                 'report': reverse('report', request=request, format=format),
+                'report-batch': reverse('report-batch', request=request, format=format),
                 'company-overview': reverse('company-overview', request=request, format=format, args=['AAPL']),
                 'intraday-data': reverse('intraday-data', request=request, format=format, args=['AAPL']),
+                'screener': reverse('screener', request=request, format=format),
+                'metrics': reverse('metrics-summary', request=request, format=format),
+                'intraday-stream': reverse('intraday-stream', request=request, format=format, args=['AAPL']),
                 'test-alpha-vantage': reverse('test_alpha_vantage', request=request, format=format),
             })
         except Exception as e:
-            logger.error(f"Error in APIRootView: {str(e)}")
+            logger.error("Error in APIRootView: %s", e)
             raise APIException(f"An error occurred: {str(e)}")
 
 class BacktestView(APIView):
     def post(self, request):
+        progress = NO_PROGRESS
         try:
+            progress = job_progress(request_job_id(request), 'backtest')
             params = request.data
             symbol = params['symbol']
             start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
@@ -41,18 +71,16 @@ class BacktestView(APIView):
             short_window = int(params.get('short_window', 50))
             long_window = int(params.get('long_window', 200))
 
-            logger.debug(f"Starting backtest for {symbol} from {start_date} to {end_date}")
-
-            existing_data = StockData.objects.filter(
-                symbol=symbol,
-                date__range=(start_date, end_date)
-            ).exists()
+            logger.debug("Starting backtest for %s from %s to %s", symbol, start_date, end_date)
 
-            if not existing_data:
-                try:
-                    fetch_stock_data(symbol, start_date, end_date)
-                except ValueError as ve:
+            progress.stage('fetch')
+            try:
+                ensure_stock_data(symbol, start_date, end_date)
+            except ValueError as ve:
+                if not _has_stock_data(symbol, start_date, end_date):
+                    progress.fail(str(ve))
                     return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+                logger.warning("Could not fetch missing bars for %s; using stored data: %s", symbol, ve)
 
             result = backtest_strategy({
                 'symbol': symbol,
@@ -61,18 +89,74 @@ class BacktestView(APIView):
                 'initial_investment': initial_investment,
                 'short_window': short_window,
                 'long_window': long_window
-            })
+            }, progress)
 
+            progress.finish({'backtest_id': result['backtest_id']})
             return Response(result)
         except KeyError as ke:
+            progress.fail(f'Missing required parameter: {ke}')
             return Response({'error': f'Missing required parameter: {str(ke)}'}, status=status.HTTP_400_BAD_REQUEST)
         except ValueError as ve:
+            progress.fail(str(ve))
             return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in BacktestView: {str(e)}")
+            logger.error("Error in BacktestView: %s", e)
+            progress.fail('An unexpected error occurred')
             return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class PredictionView(APIView):
+class AnalysisView(APIView):
+    """Backtest, prediction, comparison and chart in one request over a single data load."""
+
+    def post(self, request):
+        progress = NO_PROGRESS
+        try:
+            progress = job_progress(request_job_id(request), 'analysis')
+            params = request.data
+            symbol = params['symbol']
+            start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+            initial_investment = float(params['initial_investment'])
+            short_window = int(params.get('short_window', 50))
+            long_window = int(params.get('long_window', 200))
+            include_chart = str(params.get('include_chart', 'true')).lower() not in ('0', 'false', 'no')
+
+            progress.stage('fetch')
+            try:
+                ensure_stock_data(symbol, start_date, end_date)
+            except ValueError as ve:
+                if not _has_stock_data(symbol, start_date, end_date):
+                    raise
+                logger.warning("Could not fetch missing bars for %s; using stored data: %s", symbol, ve)
+
+            from .utils.analysis import run_analysis
+            result = run_analysis({
+                'symbol': symbol,
+                'start_date': start_date,
+                'end_date': end_date,
+                'initial_investment': initial_investment,
+                'short_window': short_window,
+                'long_window': long_window
+            }, include_chart=include_chart, progress=progress)
+            backtest_id = result['backtest']['backtest_id']
+            result['report_url'] = reverse('report', request=request) + f"?backtest_id={backtest_id}"
+            result['chart_url'] = reverse('report-chart', request=request, args=[backtest_id])
+            if result['chart_image'] is not None:
+                # JSON has no binary type; clients that can fetch chart_url should pass include_chart=false
+                result['chart_image'] = base64.b64encode(result['chart_image']).decode('ascii')
+            progress.finish({'backtest_id': backtest_id})
+            return Response(result)
+        except KeyError as ke:
+            progress.fail(f'Missing required parameter: {ke}')
+            return Response({'error': f'Missing required parameter: {str(ke)}'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as ve:
+            progress.fail(str(ve))
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error in AnalysisView: %s", e)
+            progress.fail('An unexpected error occurred')
+            return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PredictionView(CachedResponseMixin, APIView):
     def get(self, request):
         try:
             symbol = request.query_params.get('symbol')
@@ -82,25 +166,31 @@ class PredictionView(APIView):
             end_date = date.today()
             start_date = end_date - timedelta(days=365)  
             
-            predictions = predict_stock_prices(symbol, start_date, end_date)
-       
-            actual_prices = StockData.objects.filter(
-                symbol=symbol,
-                date__range=(start_date, end_date)
-            ).values('date', 'close_price')
-            
+            shape = response_shape(request)
+            from .utils.price_series import load_price_series
+
+            prediction_dates, predicted = predict_price_series(symbol, start_date, end_date)
+            dates, closes, _ = load_price_series(symbol, start_date, end_date)
+
             return Response({
                 'symbol': symbol,
-                'predictions': [{'date': pred.date, 'predicted_price': pred.predicted_price} for pred in predictions],
-                'actual_prices': list(actual_prices)
+                'predictions': shape_table({'date': prediction_dates, 'predicted_price': predicted}, shape),
+                'actual_prices': shape_table({'date': dates, 'close_price': closes}, shape),
             })
         except ValueError as ve:
             return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in PredictionView: {str(e)}")
+            logger.error("Error in PredictionView: %s", e)
             return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class ReportView(APIView):
+class ReportView(CachedResponseMixin, APIView):
+    # Backtest results never change and the JSON report no longer embeds the chart,
+    # so JSON reports are cached by backtest id alone.
+    cache_versioned = False
+
+    def cache_request(self, request):
+        return request.GET.get('format', 'pdf').lower() == 'json'
+
     def get(self, request):
         try:
             backtest_id = request.query_params.get('backtest_id')
@@ -114,20 +204,6 @@ class ReportView(APIView):
             except BacktestResult.DoesNotExist:
                 return Response({'error': 'Backtest result not found'}, status=status.HTTP_404_NOT_FOUND)
 
-            # Generate predictions
-            try:
-                predict_stock_prices(backtest_result.symbol, backtest_result.start_date, backtest_result.end_date)
-                logger.debug(f"Predictions generated for {backtest_result.symbol}")
-            except Exception as e:
-                logger.error(f"Error generating predictions: {str(e)}")
-
-            try:
-                chart_img = generate_performance_chart(backtest_result)
-                logger.debug(f"Chart image generated: {bool(chart_img)}")
-            except Exception as e:
-                logger.error(f"Error generating performance chart: {str(e)}")
-                chart_img = None  
-
             if format.lower() == 'json':
                 report_data = {
                     'backtest_id': backtest_result.id,
@@ -139,39 +215,166 @@ class ReportView(APIView):
                     'total_return': float(backtest_result.total_return),
                     'max_drawdown': float(backtest_result.max_drawdown),
                     'num_trades': backtest_result.num_trades,
-                    'chart_image': chart_img,
+                    # Built without request= so DRF does not carry ?format=json over to the image URL
+                    'chart_url': request.build_absolute_uri(reverse('report-chart', args=[backtest_result.id])),
                 }
                 return Response(report_data)
-            else:
-                try:
-                    pdf_buffer = generate_pdf_report(backtest_result, chart_img)
-                    return FileResponse(pdf_buffer, as_attachment=True, filename='backtest_report.pdf')
-                except Exception as e:
-                    logger.error(f"Error generating PDF report: {str(e)}")
-                    return Response({'error': f'Error generating PDF report: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            # Append any predictions not stored yet; usually nothing to do
+            try:
+                written = update_predictions(backtest_result.symbol)
+                logger.debug("Predictions updated for %s (%s new)", backtest_result.symbol, written)
+            except Exception as e:
+                logger.error("Error generating predictions: %s", e)
+
+            try:
+                chart_png = generate_performance_chart(backtest_result)
+            except Exception as e:
+                logger.error("Error generating performance chart: %s", e)
+                chart_png = None
+            try:
+                pdf_buffer = generate_pdf_report(backtest_result, chart_png)
+                return FileResponse(pdf_buffer, as_attachment=True, filename='backtest_report.pdf')
+            except Exception as e:
+                logger.error("Error generating PDF report: %s", e)
+                return Response({'error': f'Error generating PDF report: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            logger.error(f"Error in ReportView: {str(e)}")
+            logger.error("Error in ReportView: %s", e)
             return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CompanyOverviewView(APIView):
+class ReportChartView(APIView):
+    """The report's performance chart as image/png, with an ETag so unchanged charts are not re-sent."""
+
+    def get(self, request, backtest_id):
+        try:
+            backtest_result = BacktestResult.objects.get(id=backtest_id)
+        except BacktestResult.DoesNotExist:
+            return Response({'error': 'Backtest result not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            update_predictions(backtest_result.symbol)
+        except Exception as e:
+            logger.error("Error generating predictions: %s", e)
+
+        etag = quote_etag(chart_etag(backtest_result))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is None:
+            try:
+                chart_png = generate_performance_chart(backtest_result)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+            except Exception as e:
+                logger.error("Error generating performance chart: %s", e)
+                return Response({'error': 'Error generating performance chart'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            response = HttpResponse(chart_png, content_type='image/png')
+        else:
+            response = not_modified
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, max_age=getattr(settings, 'REPORT_CHART_MAX_AGE', 300))
+        return response
+
+class BatchReportView(APIView):
+    """POST {"backtest_ids": [...]} -> ZIP of PDF reports plus manifest.json, streamed as they render."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            progress = job_progress(request_job_id(request), 'report-batch')
+        except ValueError as ve:
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        backtest_ids = request.data.get('backtest_ids')
+        if not isinstance(backtest_ids, list) or not backtest_ids:
+            return Response({'error': 'backtest_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = getattr(settings, 'REPORT_BATCH_MAX_IDS', 500)
+        if len(backtest_ids) > limit:
+            return Response({'error': f'At most {limit} reports per batch'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            jobs, missing = load_report_jobs(backtest_ids)
+        except (TypeError, ValueError):
+            return Response({'error': 'backtest_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not jobs:
+            progress.fail('Backtest results not found')
+            return Response({'error': 'Backtest results not found', 'missing': missing}, status=status.HTTP_404_NOT_FOUND)
+
+        progress.stage('render', total=len(jobs))
+        results = track(render_reports(jobs), progress)
+        response = StreamingHttpResponse(stream_zip(results, missing), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="backtest_reports.zip"'
+        return response
+
+class IntradayStreamView(APIView):
+    """GET -> text/event-stream of new intraday bars for ``symbol``.
+
+    All subscribers in the process share one upstream poller per symbol. On
+    reconnect, EventSource's Last-Event-ID skips bars the client already has.
+    """
+    renderer_classes = [EventStreamRenderer, ORJSONRenderer]
+
     def get(self, request, symbol):
+        return _event_stream_response(intraday_stream(symbol, request.headers.get('Last-Event-ID')))
+
+class JobEventsView(APIView):
+    """GET -> text/event-stream of progress events for a job started with the same X-Job-Id."""
+    renderer_classes = [EventStreamRenderer, ORJSONRenderer]
+
+    def get(self, request, job_id):
+        if not JOB_ID_PATTERN.match(job_id):
+            return Response({'error': 'Invalid job id'}, status=status.HTTP_400_BAD_REQUEST)
+        return _event_stream_response(job_stream(job_id))
+
+def _event_stream_response(frames):
+    response = StreamingHttpResponse(frames, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+class CompanyOverviewView(APIView):
+    def get(self, request, symbol=None):
         try:
-            overview = get_company_overview(symbol)
-            serializer = CompanyOverviewSerializer(data=overview)
-            if serializer.is_valid():
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            if symbol is None:
+                symbols = [s.strip() for s in request.query_params.get('symbols', '').split(',') if s.strip()]
+                if not symbols:
+                    return Response({'error': 'Symbols parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+                overviews, missing = load_company_overviews(symbols)
+                return Response({'results': overviews, 'missing': missing})
+
+            overview = load_company_overview(symbol)
+            if overview is None:
+                return Response({'error': f'Unknown symbol: {symbol}'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(overview)
+        except ValueError as ve:
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in CompanyOverviewView: {str(e)}")
+            logger.error("Error in CompanyOverviewView: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class IntradayDataView(APIView):
+class IntradayDataView(CachedResponseMixin, APIView):
+    # Straight from Alpha Vantage, not the database: expire by time instead of data version.
+    cache_versioned = False
+
+    @property
+    def cache_timeout(self):
+        return getattr(settings, 'INTRADAY_CACHE_TTL', 60)
+
     def get(self, request, symbol):
         try:
+            shape = response_shape(request)
             intraday_data = get_intraday_data(symbol)
+            # Rate-limit notes arrive as 200s; answered with a 429 so neither cache keeps them.
+            quota = quota_error(intraday_data, f"intraday data for {symbol}")
+            if quota is not None:
+                raise quota
+            if shape == 'columns':
+                intraday_data = intraday_columns(intraday_data)
             return Response(intraday_data)
+        except QuotaExceeded as e:
+            return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={'Retry-After': str(e.retry_after)})
+        except ValueError as ve:
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in IntradayDataView: {str(e)}")
+            logger.error("Error in IntradayDataView: %s", e)
             return Response({"error": str(e)}, status=500)
 
 def test_alpha_vantage(request):
@@ -179,10 +382,10 @@ def test_alpha_vantage(request):
         test_alpha_vantage_connection()
         return HttpResponse("Alpha Vantage API test successful!")
     except Exception as e:
-        logger.error(f"Error in test_alpha_vantage: {str(e)}")
+        logger.error("Error in test_alpha_vantage: %s", e)
         return HttpResponse(f"Error: {str(e)}", status=500)
 
-class PredictionComparisonView(APIView):
+class PredictionComparisonView(CachedResponseMixin, APIView):
     def get(self, request):
         try:
             symbol = request.query_params.get('symbol')
@@ -192,11 +395,91 @@ class PredictionComparisonView(APIView):
             end_date = date.today()
             start_date = end_date - timedelta(days=30)  # Compare last 30 days
             
-            comparison = compare_predictions(symbol, start_date, end_date)
+            shape = response_shape(request)
+            comparison = compare_predictions(symbol, start_date, end_date, detail=_detail_requested(request))
+            if 'comparison' in comparison:
+                comparison['comparison'] = shape_table(comparison['comparison'], shape)
             
             return Response(comparison)
         except ValueError as ve:
             return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in PredictionComparisonView: {str(e)}")
+            logger.error("Error in PredictionComparisonView: %s", e)
+            return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class MetricsView(CachedResponseMixin, APIView):
+    """Drawdown/return and prediction-error summaries for up to METRICS_MAX_SYMBOLS symbols.
+
+    Aggregated in the database where possible; ``detail=1`` adds the per-date rows
+    (``shape=columns`` for arrays per field).
+    """
+    def cache_symbol(self, request, *args, **kwargs):
+        return self._symbols(request)
+
+    def _symbols(self, request):
+        raw = request.GET.get('symbols') or request.GET.get('symbol') or ''
+        return list(dict.fromkeys(symbol.strip().upper() for symbol in raw.split(',') if symbol.strip()))
+
+    def get(self, request):
+        from .utils.metrics import comparison_detail, drawdown_detail, drawdown_metrics, prediction_error_metrics
+
+        try:
+            symbols = self._symbols(request)
+            if not symbols:
+                return Response({'error': 'symbols parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(symbols) > settings.METRICS_MAX_SYMBOLS:
+                return Response({'error': f'At most {settings.METRICS_MAX_SYMBOLS} symbols per request'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            end_date = _parse_date(request.query_params.get('end_date')) or date.today()
+            start_date = _parse_date(request.query_params.get('start_date')) or end_date - timedelta(days=365)
+
+            drawdowns = drawdown_metrics(symbols, start_date, end_date)
+            errors = prediction_error_metrics(symbols, start_date, end_date)
+            metrics = {symbol: {'prices': drawdowns.get(symbol), 'predictions': errors.get(symbol)}
+                       for symbol in symbols}
+            if _detail_requested(request):
+                shape = response_shape(request)
+                for symbol, entry in metrics.items():
+                    entry['drawdown_detail'] = shape_table(drawdown_detail(symbol, start_date, end_date), shape)
+                    entry['comparison'] = shape_table(comparison_detail(symbol, start_date, end_date), shape)
+            return Response({'start_date': start_date, 'end_date': end_date, 'metrics': metrics})
+        except ValueError as ve:
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error in MetricsView: %s", e)
             return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ScreenerView(APIView):
+    def get(self, request):
+        try:
+            if not request.query_params.get('filter'):
+                return Response({'error': 'Filter parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+            from .utils.screener import run_screen
+
+            started = time.perf_counter()
+            result = run_screen(request.query_params)
+            result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return Response(result)
+        except ValueError as ve:
+            return Response({'error': str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error in ScreenerView: %s", e)
+            return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ProfileListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        profiles = list_profiles()
+        for profile in profiles:
+            profile['url'] = reverse('profile-download', request=request, args=[profile['name']])
+        return Response({'profiles': profiles})
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profile_path(name)
+        if path is None:
+            raise Http404('Profile not found')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
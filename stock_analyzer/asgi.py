@@ -0,0 +1,8 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_analyzer.settings')
+# Route the I/O-bound endpoints to their async views (see financial_data/urls.py).
+os.environ.setdefault('ASYNC_VIEWS', 'true')
+
+application = get_asgi_application()
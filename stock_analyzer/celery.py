@@ -0,0 +1,9 @@
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stock_analyzer.settings')
+
+app = Celery('stock_analyzer')
+# Every CELERY_* Django setting configures the app (CELERY_TASK_ROUTES -> task_routes, ...).
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 import dj_database_url
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -46,6 +47,9 @@ TEMPLATES = [
 
 # Add or update the MIDDLEWARE setting
 MIDDLEWARE = [
+    'financial_data.instrumentation.ServerTimingMiddleware',
+    'financial_data.profiling.ProfilingMiddleware',
+    'financial_data.db_router.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,13 +63,72 @@ MIDDLEWARE = [
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
 # Update the DATABASES configuration
+# DB_CONN_MAX_AGE keeps connections open between requests; behind pgbouncer in transaction
+# pooling mode set DATABASE_POOLER=pgbouncer, which also turns off server-side cursors
+# (they do not survive the pooler switching server connections between transactions).
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+DATABASE_POOLER = os.getenv('DATABASE_POOLER')
+_pooled = DATABASE_POOLER == 'pgbouncer'
+
 DATABASES = {
     'default': dj_database_url.config(
         default=f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}",
-        conn_max_age=600
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+        disable_server_side_cursors=_pooled,
     )
 }
 
+# Optional read replica for StockData/Prediction range scans (financial_data/db_router.py).
+# Reads go back to the primary for DATABASE_REPLICA_PIN_SECONDS after any price/prediction write;
+# the write time is shared through the default cache, so a non-zero window requires CACHE_URL.
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_REPLICA_PIN_SECONDS = float(os.getenv('DATABASE_REPLICA_PIN_SECONDS', 5))
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES[DATABASE_REPLICA_ALIAS] = dj_database_url.parse(
+        os.getenv('DATABASE_REPLICA_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+        disable_server_side_cursors=_pooled,
+        # Tests read the replica alias through the primary's test database.
+        test_options={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['financial_data.db_router.AnalyticsRouter']
+
+# orjson renders NumPy arrays, dates and Decimals natively (financial_data/renderers.py)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'financial_data.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# The default cache holds state every web and worker process must see (Alpha Vantage quota
+# counters, job progress, the intraday feed, replica pins): set CACHE_URL (redis://...) to share
+# it. Without one each process gets its own LocMemCache, which only suits tests and runserver.
+# 'responses' holds compressed GET responses (financial_data/response_cache.py); LocMemCache
+# evicts least-recently-used entries beyond MAX_ENTRIES.
+CACHE_URL = os.getenv('CACHE_URL')
+CACHES = {
+    'default': (
+        {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+        if CACHE_URL else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    ),
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TTL', 300)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2000)), 'CULL_FREQUENCY': 10},
+    },
+}
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 1 << 20))
+# Intraday bars come straight from Alpha Vantage, so they are cached by time only
+INTRADAY_CACHE_TTL = int(os.getenv('INTRADAY_CACHE_TTL', 60))
+
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -89,34 +152,235 @@ ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY')
 if not ALPHA_VANTAGE_API_KEY:
     raise ValueError("ALPHA_VANTAGE_API_KEY is not set in the environment variables")
 
+# Point at a local stub server for benchmarks and load tests
+ALPHA_VANTAGE_BASE_URL = os.getenv('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co/query')
+# Upstream timeouts in seconds (connect, then each read), and the connection pool of the async
+# client used by the ASGI views (one pool per worker's event loop)
+ALPHA_VANTAGE_CONNECT_TIMEOUT = float(os.getenv('ALPHA_VANTAGE_CONNECT_TIMEOUT', 5))
+ALPHA_VANTAGE_TIMEOUT = float(os.getenv('ALPHA_VANTAGE_TIMEOUT', 30))
+ALPHA_VANTAGE_MAX_CONNECTIONS = int(os.getenv('ALPHA_VANTAGE_MAX_CONNECTIONS', 100))
+ALPHA_VANTAGE_MAX_KEEPALIVE = int(os.getenv('ALPHA_VANTAGE_MAX_KEEPALIVE', 20))
 
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-        'file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': 'debug.log',
-        },
+# Add a Server-Timing header to every response (otherwise only when requested with X-Server-Timing: 1)
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'False') == 'True'
+
+# On-demand profiling: send X-Profile: <PROFILING_HEADER_TOKEN> (optionally X-Profile-Mode: sampling),
+# or sample PROFILING_SAMPLE_RATE of requests under PROFILING_PATHS. Listed at /api/profiles/ (staff only).
+PROFILING_DIR = os.getenv('PROFILING_DIR')
+PROFILING_HEADER_TOKEN = os.getenv('PROFILING_HEADER_TOKEN')
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'cprofile')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.0))
+PROFILING_PATHS = ('/api/analysis/', '/api/backtest/', '/api/predict/', '/api/report/')
+PROFILING_TASKS = (
+    'financial_data.tasks.update_stock_data',
+    'financial_data.tasks.update_company_overview',
+    'financial_data.tasks.refresh_shared_prices',
+    'financial_data.tasks.refresh_symbols',
+)
+PROFILING_TASK_SAMPLE_RATE = float(os.getenv('PROFILING_TASK_SAMPLE_RATE', 0.0))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))
+
+# manage.py benchmark: baseline JSON and the slowdown (percent) that fails the run
+BENCHMARK_BASELINE = os.getenv('BENCHMARK_BASELINE', os.path.join(BASE_DIR, 'benchmarks', 'baseline.json'))
+BENCHMARK_MAX_REGRESSION = float(os.getenv('BENCHMARK_MAX_REGRESSION', 20.0))
+
+# Probe the Alpha Vantage setup after migrate (off by default: no network on migrate)
+ALPHA_VANTAGE_CHECK_ON_MIGRATE = os.getenv('ALPHA_VANTAGE_CHECK_ON_MIGRATE', 'False') == 'True'
+
+# Company overview read-through cache (seconds)
+COMPANY_OVERVIEW_TTL = int(os.getenv('COMPANY_OVERVIEW_TTL', 86400))
+COMPANY_OVERVIEW_STALE_TTL = int(os.getenv('COMPANY_OVERVIEW_STALE_TTL', 7 * 86400))
+COMPANY_OVERVIEW_NEGATIVE_TTL = int(os.getenv('COMPANY_OVERVIEW_NEGATIVE_TTL', 3600))
+
+# Screener universe matrix
+SCREENER_LOOKBACK_DAYS = int(os.getenv('SCREENER_LOOKBACK_DAYS', 450))
+SCREENER_MATRIX_TTL = int(os.getenv('SCREENER_MATRIX_TTL', 300))
+
+# Shared-memory price segment published for the most requested symbols. The segment lives in
+# /dev/shm and SHARED_PRICES_POINTER names it; Celery workers rebuild it after ingests, so web and
+# worker processes must share both (docker-compose.yml shares web's IPC namespace and a volume).
+SHARED_PRICES_POINTER = os.getenv('SHARED_PRICES_POINTER')
+SHARED_PRICES_MAX_SYMBOLS = int(os.getenv('SHARED_PRICES_MAX_SYMBOLS', 500))
+SHARED_PRICES_SYMBOLS = [s for s in os.getenv('SHARED_PRICES_SYMBOLS', '').split(',') if s]
+# Ingests into published symbols within this many seconds share one segment rebuild
+SHARED_PRICES_REFRESH_DELAY = int(os.getenv('SHARED_PRICES_REFRESH_DELAY', 60))
+
+# Per-symbol prediction models (utils/model_store.py)
+MODEL_STORE_DIR = os.getenv('MODEL_STORE_DIR', os.path.join(BASE_DIR, 'financial_data', 'models', 'symbols'))
+# Feature pipeline (utils/features.py: 'lag5' or 'extended') and estimator ('linear', 'ridge' or 'gbr')
+PREDICTION_FEATURES = os.getenv('PREDICTION_FEATURES', 'extended')
+PREDICTION_ESTIMATOR = os.getenv('PREDICTION_ESTIMATOR', 'ridge')
+FEATURE_MARKET_SYMBOL = os.getenv('FEATURE_MARKET_SYMBOL', 'SPY')
+FEATURE_CACHE_TTL = int(os.getenv('FEATURE_CACHE_TTL', 3600))
+# Batch retraining (manage.py train_models / tasks.train_models); None = one worker per CPU
+TRAINING_WORKERS = int(os.getenv('TRAINING_WORKERS', 0)) or None
+TRAINING_START_METHOD = os.getenv('TRAINING_START_METHOD') or None
+# Batch PDF reports: manage.py generate_reports starts REPORT_WORKERS processes (None = one per CPU);
+# POST /api/report/batch/ renders in one shared pool of REPORT_POOL_PROCESSES per web process (0 = inline)
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 0)) or None
+REPORT_POOL_PROCESSES = int(os.getenv('REPORT_POOL_PROCESSES', 2))
+REPORT_START_METHOD = os.getenv('REPORT_START_METHOD') or None
+REPORT_BATCH_MAX_IDS = int(os.getenv('REPORT_BATCH_MAX_IDS', 500))
+# Cache-Control max-age for /api/report/<id>/chart.png (revalidated through its ETag afterwards)
+REPORT_CHART_MAX_AGE = int(os.getenv('REPORT_CHART_MAX_AGE', 300))
+
+# Return/drawdown and prediction-error summaries (utils/metrics.py, /api/metrics/) are
+# aggregated with SQL window functions when the database supports them
+METRICS_IN_DATABASE = os.getenv('METRICS_IN_DATABASE', 'true').lower() in ('1', 'true', 'yes')
+METRICS_MAX_SYMBOLS = int(os.getenv('METRICS_MAX_SYMBOLS', 100))
+
+# Server-Sent Events (financial_data/streaming.py): /api/stream/intraday/<symbol>/ and
+# /api/jobs/<id>/events/. Each open stream holds a worker thread under WSGI, so run gunicorn
+# with gthread workers. Intraday bars are polled upstream once per interval per symbol.
+STREAM_INTRADAY_INTERVAL = int(os.getenv('STREAM_INTRADAY_INTERVAL', 60))
+STREAM_HEARTBEAT_SECONDS = int(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+STREAM_MAX_SECONDS = int(os.getenv('STREAM_MAX_SECONDS', 300))
+STREAM_JOB_POLL_SECONDS = float(os.getenv('STREAM_JOB_POLL_SECONDS', 0.5))
+STREAM_QUEUE_SIZE = int(os.getenv('STREAM_QUEUE_SIZE', 100))
+STREAM_RETRY_MS = int(os.getenv('STREAM_RETRY_MS', 3000))
+# Job progress states (financial_data/progress.py) live in the default cache for this long
+JOB_PROGRESS_TTL = int(os.getenv('JOB_PROGRESS_TTL', 3600))
+
+# ASGI mode (stock_analyzer/asgi.py, SERVER_MODE=asgi in the container) turns this on: the
+# intraday, company overview, chart, stream and test-alpha-vantage endpoints are then served by
+# async views (financial_data/async_views.py). Charts are drawn in OFFLOAD_PROCESSES worker
+# processes per server worker; 0 draws them on threads instead.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'false').lower() in ('1', 'true', 'yes')
+OFFLOAD_PROCESSES = int(os.getenv('OFFLOAD_PROCESSES', 2))
+OFFLOAD_START_METHOD = os.getenv('OFFLOAD_START_METHOD') or None
+
+# Celery (stock_analyzer/celery.py). Interactive work (single-symbol refreshes triggered by
+# requests) goes to 'interactive'; universe refreshes and retraining go to 'bulk', so run
+# dedicated workers, e.g. `celery -A stock_analyzer worker -Q interactive` and `-Q bulk -c 2`.
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND') or (
+    'cache+memory://' if CELERY_BROKER_URL.startswith('memory://') else CELERY_BROKER_URL
+)
+CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', 86400))
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_DEFAULT_QUEUE = 'interactive'
+CELERY_TASK_ROUTES = {
+    'financial_data.tasks.refresh_universe': {'queue': 'bulk'},
+    'financial_data.tasks.refresh_symbols': {'queue': 'bulk'},
+    'financial_data.tasks.train_models': {'queue': 'bulk'},
+}
+# Long bulk chunks must not sit prefetched behind each other; redeliver them if a worker dies.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+# Redis redelivers an unacknowledged message after visibility_timeout, and a countdown task stays
+# unacknowledged until it runs: this must outlast the longest countdown (refresh chunks spread
+# over the day's quota, retries waiting for the daily window to reopen). It is also how long a
+# task lost with its worker waits to be redelivered.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', 90000))}
+CELERY_TIMEZONE = 'America/New_York'
+CELERY_BEAT_SCHEDULE = {
+    # After the daily bars are published (16:30 ET); only stale symbols are fetched.
+    'refresh-universe': {
+        'task': 'financial_data.tasks.refresh_universe',
+        'schedule': crontab(hour=17, minute=45, day_of_week='mon-fri'),
     },
-    'root': {
-        'handlers': ['console', 'file'],
-        'level': 'DEBUG',
+    # Early next morning, spending whatever quota the evening refresh left for retries.
+    'refresh-universe-catch-up': {
+        'task': 'financial_data.tasks.refresh_universe',
+        'schedule': crontab(hour=6, minute=0, day_of_week='tue-sat'),
     },
-    'loggers': {
-        'django': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
-            'propagate': True,
+    'train-models': {
+        'task': 'financial_data.tasks.train_models',
+        'schedule': crontab(hour=20, minute=0, day_of_week='mon-fri'),
+    },
+}
+
+# Alpha Vantage quota, counted per minute and per day in the default cache (which must be
+# shared between web and worker processes in production). Bulk refreshes leave
+# ALPHA_VANTAGE_INTERACTIVE_RESERVE calls a day for requests.
+ALPHA_VANTAGE_DAILY_LIMIT = int(os.getenv('ALPHA_VANTAGE_DAILY_LIMIT', 500))
+ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', 5))
+ALPHA_VANTAGE_INTERACTIVE_RESERVE = int(os.getenv('ALPHA_VANTAGE_INTERACTIVE_RESERVE', 50))
+# Symbols per refresh_symbols task, and the retry backoff (seconds) for failed fetches
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 25))
+TASK_RETRY_BACKOFF = int(os.getenv('TASK_RETRY_BACKOFF', 30))
+TASK_RETRY_BACKOFF_MAX = int(os.getenv('TASK_RETRY_BACKOFF_MAX', 3600))
+
+
+# LOG_MODE=production moves log I/O off the request thread (QueueHandler ->
+# QueueListener), emits JSON records and samples DEBUG records.
+LOG_MODE = os.getenv('LOG_MODE', 'development')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FILE = os.getenv('LOG_FILE', 'debug.log')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.01))
+
+if LOG_MODE == 'production':
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'json': {
+                '()': 'financial_data.logging_utils.JsonFormatter',
+            },
+        },
+        'filters': {
+            'sample_debug': {
+                '()': 'financial_data.logging_utils.DebugSamplingFilter',
+                'rate': LOG_DEBUG_SAMPLE_RATE,
+            },
+        },
+        'handlers': {
+            'async': {
+                '()': 'financial_data.logging_utils.AsyncQueueHandler',
+                'filename': LOG_FILE,
+                'stream': True,
+                'formatter': 'json',
+                'filters': ['sample_debug'],
+            },
+        },
+        'root': {
+            'handlers': ['async'],
+            'level': 'WARNING',
         },
-        'financial_data': {
+        'loggers': {
+            'django': {
+                'handlers': ['async'],
+                'level': 'INFO',
+                'propagate': False,
+            },
+            'financial_data': {
+                'handlers': ['async'],
+                'level': LOG_LEVEL,
+                'propagate': False,
+            },
+        },
+    }
+else:
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+            },
+            'file': {
+                'level': 'DEBUG',
+                'class': 'logging.FileHandler',
+                'filename': 'debug.log',
+            },
+        },
+        'root': {
             'handlers': ['console', 'file'],
             'level': 'DEBUG',
-            'propagate': True,
         },
-    },
-}
+        'loggers': {
+            'django': {
+                'handlers': ['console', 'file'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
+            'financial_data': {
+                'handlers': ['console', 'file'],
+                'level': 'DEBUG',
+                'propagate': True,
+            },
+            # Per-request and per-connection chatter from the async Alpha Vantage client.
+            'httpx': {'level': 'WARNING'},
+            'httpcore': {'level': 'WARNING'},
+        },
+    }